@@ -0,0 +1,204 @@
+"""
+Rule-based alerts evaluated on every ingested telemetry point.
+
+Each rule looks only at the new point and a small per-tractor state kept in
+memory, so evaluation is O(1) per point. A condition raises an alert when it
+starts and, while it persists, again every ALERT_REPEAT_MINUTES; event rules
+(telemetry gaps) raise one alert per occurrence. Gaps are measured between
+points of the same active operation only, so the pause between two
+operations, or while no operation is running, is not reported.
+
+Rules and thresholds are configured through the environment:
+
+    ALERT_RULES                 comma-separated rules to enable (default: all)
+    ALERT_OVERSPEED_KMH         overspeed threshold (25)
+    ALERT_IDLE_MINUTES          engine on, stationary, PTO off for this long (10)
+    ALERT_TELEMETRY_GAP_MINUTES silence between two points of an active operation (5)
+    ALERT_REPEAT_MINUTES        re-alert interval for persisting conditions (30)
+    ALERT_COALESCE_MINUTES      window for folding repeats into one alert (60)
+
+State is per worker process. With several workers a tractor's points may be
+split between them, which delays idling alerts and can report gaps that
+another worker did not see; route a tractor's telemetry to one worker where
+that matters.
+"""
+import os
+import uuid
+import threading
+from datetime import timedelta
+
+from ingest import add_handler
+
+ALERT_OVERSPEED_KMH = float(os.environ.get("ALERT_OVERSPEED_KMH", "25"))
+ALERT_IDLE_MINUTES = float(os.environ.get("ALERT_IDLE_MINUTES", "10"))
+ALERT_TELEMETRY_GAP_MINUTES = float(os.environ.get("ALERT_TELEMETRY_GAP_MINUTES", "5"))
+ALERT_REPEAT_MINUTES = float(os.environ.get("ALERT_REPEAT_MINUTES", "30"))
+ALERT_RULES = os.environ.get("ALERT_RULES", "overspeed,idling,no_operation,telemetry_gap")
+ALERT_COALESCE_MINUTES = float(os.environ.get("ALERT_COALESCE_MINUTES", "60"))
+
+
+def insert_alert(cursor, tractor_id, operation_id, alert_type, message, timestamp):
+    """Record an alert event and return the alert row it ended up in.
+
+    An unresolved alert of the same type for the tractor and operation seen
+    within ALERT_COALESCE_MINUTES absorbs the event (occurrence_count and
+    last_seen are bumped); otherwise a new row is inserted. Two first events
+    racing in separate transactions can still produce two rows; later events
+    then coalesce into the newer one.
+    """
+    cursor.execute(
+        """WITH open_alert AS (
+               SELECT id FROM alerts
+               WHERE tractor_id = %(tractor_id)s AND alert_type = %(alert_type)s AND is_resolved = FALSE
+                 AND operation_id IS NOT DISTINCT FROM %(operation_id)s
+                 AND COALESCE(last_seen, timestamp) >= %(window_start)s
+               ORDER BY COALESCE(last_seen, timestamp) DESC
+               LIMIT 1
+               FOR UPDATE
+           ), coalesced AS (
+               UPDATE alerts
+               SET occurrence_count = occurrence_count + 1,
+                   last_seen = GREATEST(COALESCE(last_seen, timestamp), %(timestamp)s),
+                   message = %(message)s
+               WHERE id IN (SELECT id FROM open_alert)
+               RETURNING *
+           ), inserted AS (
+               INSERT INTO alerts (id, tractor_id, operation_id, alert_type, message, timestamp, last_seen)
+               SELECT %(id)s, %(tractor_id)s, %(operation_id)s, %(alert_type)s, %(message)s, %(timestamp)s, %(timestamp)s
+               WHERE NOT EXISTS (SELECT 1 FROM open_alert)
+               ON CONFLICT (tractor_id, operation_id, alert_type, timestamp) DO NOTHING
+               RETURNING *
+           )
+           SELECT * FROM coalesced UNION ALL SELECT * FROM inserted""",
+        {
+            "id": str(uuid.uuid4()),
+            "tractor_id": tractor_id,
+            "operation_id": operation_id,
+            "alert_type": alert_type,
+            "message": message,
+            "timestamp": timestamp,
+            "window_start": timestamp - timedelta(minutes=ALERT_COALESCE_MINUTES),
+        }
+    )
+    alert = cursor.fetchone()
+    if not alert:
+        cursor.execute(
+            "SELECT * FROM alerts WHERE tractor_id = %s AND operation_id = %s AND alert_type = %s AND timestamp = %s",
+            (tractor_id, operation_id, alert_type, timestamp)
+        )
+        alert = cursor.fetchone()
+    return alert
+
+
+class TractorState:
+    __slots__ = ("operation_id", "last_seen", "idle_since", "active", "last_fired")
+
+    def __init__(self):
+        self.operation_id = None
+        self.last_seen = None
+        self.idle_since = None
+        self.active = set()
+        self.last_fired = {}
+
+
+class Rule:
+    def __init__(self, name, alert_type, check, event=False):
+        self.name = name
+        self.alert_type = alert_type
+        self.check = check
+        self.event = event
+
+
+def _minutes(delta):
+    return delta.total_seconds() / 60
+
+
+def _overspeed(state, point):
+    speed = point["speed"] or 0
+    if speed > ALERT_OVERSPEED_KMH:
+        return f"Speed {speed:.1f} km/h exceeds the {ALERT_OVERSPEED_KMH:g} km/h limit"
+    return None
+
+
+def _idling(state, point):
+    if not point["engine_on"] or point["is_moving"] or point["pto_on"]:
+        state.idle_since = None
+        return None
+    if state.idle_since is None:
+        state.idle_since = point["timestamp"]
+        return None
+    idle = _minutes(point["timestamp"] - state.idle_since)
+    if idle >= ALERT_IDLE_MINUTES:
+        return f"Engine idling with PTO off for {idle:.0f} minutes"
+    return None
+
+
+def _no_operation(state, point):
+    if point["engine_on"] and point.get("operation_status") != "active":
+        return "Engine running without an active operation"
+    return None
+
+
+def _telemetry_gap(state, point):
+    if state.last_seen is None or point["timestamp"] <= state.last_seen:
+        return None
+    gap = _minutes(point["timestamp"] - state.last_seen)
+    if gap >= ALERT_TELEMETRY_GAP_MINUTES:
+        return f"No telemetry for {gap:.0f} minutes since {state.last_seen.isoformat()}"
+    return None
+
+
+RULES = [
+    Rule("overspeed", "overspeed", _overspeed),
+    Rule("idling", "idling", _idling),
+    Rule("no_operation", "engine_without_operation", _no_operation),
+    Rule("telemetry_gap", "telemetry_gap", _telemetry_gap, event=True),
+]
+
+
+class AlertEngine:
+    def __init__(self, rules, repeat=timedelta(minutes=ALERT_REPEAT_MINUTES)):
+        self.rules = rules
+        self.repeat = repeat
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def evaluate(self, point):
+        """Update the tractor's state with a point; returns [(rule, message)] to raise."""
+        tractor_id = str(point["tractor_id"])
+        now = point["timestamp"]
+        fired = []
+        with self._lock:
+            state = self._states.get(tractor_id)
+            if state is None:
+                state = self._states[tractor_id] = TractorState()
+            operation_id = point["operation_id"] if point.get("operation_status") == "active" else None
+            if operation_id is None or str(operation_id) != state.operation_id:
+                state.last_seen = None
+            state.operation_id = str(operation_id) if operation_id is not None else None
+            for rule in self.rules:
+                message = rule.check(state, point)
+                if message is None:
+                    state.active.discard(rule.name)
+                    continue
+                if not rule.event and rule.name in state.active and now - state.last_fired[rule.name] < self.repeat:
+                    continue
+                state.active.add(rule.name)
+                state.last_fired[rule.name] = now
+                fired.append((rule, message))
+            if operation_id is not None and (state.last_seen is None or now > state.last_seen):
+                state.last_seen = now
+        return fired
+
+    def on_point(self, cursor, point):
+        for rule, message in self.evaluate(point):
+            insert_alert(cursor, point["tractor_id"], point["operation_id"], rule.alert_type, message, point["timestamp"])
+
+    def forget(self, tractor_id):
+        with self._lock:
+            self._states.pop(str(tractor_id), None)
+
+
+_enabled = {name.strip() for name in ALERT_RULES.split(",") if name.strip()}
+ALERT_ENGINE = AlertEngine([rule for rule in RULES if rule.name in _enabled])
+add_handler(ALERT_ENGINE.on_point)
@@ -0,0 +1,285 @@
+"""
+Bulk import of tractors and implements from CSV or JSON files.
+
+Rows are read from the upload as a stream (CSV, newline-delimited JSON, or a
+JSON array decoded one element at a time), validated against TractorCreate/ImplementCreate and written in
+batches of IMPORT_BATCH_SIZE with one multi-row INSERT ... ON CONFLICT each.
+Rows that collide with an existing registration number or implement name are
+skipped or updated depending on the mode and reported per row; a batch that
+fails for any other reason is retried row by row under savepoints.
+"""
+import io
+import os
+import csv
+import json
+import uuid
+
+import psycopg2
+from psycopg2.extras import execute_values
+from pydantic import ValidationError
+
+from database import get_db_cursor
+from schemas import TractorCreate, ImplementCreate
+from refcache import TRACTORS, IMPLEMENTS, invalidate
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", "500"))
+IMPORT_MODES = ("skip", "update")
+JSON_CHUNK_CHARS = 64 * 1024
+JSON_MAX_ROW_CHARS = 1024 * 1024
+
+
+class ImportKind:
+    def __init__(self, schema, table, cache, key_fields, columns, conflict_target, conflict_message, values):
+        self.schema = schema
+        self.table = table
+        self.cache = cache
+        self.key_fields = key_fields
+        self.columns = columns
+        self.conflict_target = conflict_target
+        self.conflict_message = conflict_message
+        self.values = values
+
+    def row(self, owner_id, data):
+        return (str(uuid.uuid4()), owner_id) + self.values(data)
+
+    def insert_sql(self, mode):
+        columns = ", ".join(self.columns)
+        sql = f"INSERT INTO {self.table} (id, {columns}) VALUES %s ON CONFLICT ({self.conflict_target}) "
+        if mode == "update":
+            updates = ", ".join(
+                f"{c} = EXCLUDED.{c}" for c in self.columns
+                if c != "owner_id" and c not in self.conflict_target.split(", ")
+            )
+            # Only the owner's own assets may be overwritten.
+            sql += f"DO UPDATE SET {updates} WHERE {self.table}.owner_id = EXCLUDED.owner_id "
+        else:
+            sql += "DO NOTHING "
+        return sql + "RETURNING id, (xmax = 0) AS inserted"
+
+
+def _tractor_values(data):
+    return (
+        data.manufacturerName, data.model, data.registrationNumber,
+        json.dumps(data.specifications) if data.specifications else None,
+        data.isActive if data.isActive is not None else True,
+    )
+
+
+def _implement_values(data):
+    return (
+        data.operationType.value, data.name, data.brandName, data.workingWidth,
+        json.dumps(data.specifications) if data.specifications else None,
+        data.isActive if data.isActive is not None else True,
+    )
+
+
+TRACTOR_IMPORT = ImportKind(
+    TractorCreate, "tractors", TRACTORS, ("registrationNumber",),
+    ("owner_id", "manufacturer_name", "model", "registration_number", "specifications", "is_active"),
+    "registration_number", "Tractor with given registration number already exists", _tractor_values,
+)
+IMPLEMENT_IMPORT = ImportKind(
+    ImplementCreate, "implements", IMPLEMENTS, ("name",),
+    ("owner_id", "operation_type", "name", "brand_name", "working_width", "specifications", "is_active"),
+    "owner_id, name", "Implement with this name already exists for the owner", _implement_values,
+)
+
+
+def _camel(key):
+    key = key.strip()
+    if "_" not in key:
+        return key
+    head, *rest = key.split("_")
+    return head + "".join(part.capitalize() for part in rest)
+
+
+def _clean_csv_row(row):
+    cleaned = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        value = value.strip() if isinstance(value, str) else value
+        if value == "":
+            continue
+        key = _camel(key)
+        if key == "specifications":
+            try:
+                value = json.loads(value)
+            except ValueError:
+                pass
+        cleaned[key] = value
+    return cleaned
+
+
+def iter_rows(file, filename=None, content_type=None):
+    """Yield (row number, dict) pairs from a CSV, NDJSON or JSON array upload."""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+
+    if name.endswith(".csv") or "csv" in content_type:
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, _clean_csv_row(row)
+        return
+
+    first = text.read(1)
+    while first and first.isspace():
+        first = text.read(1)
+    if first == "[":
+        for number, row in enumerate(_iter_json_array(text), start=1):
+            yield number, {_camel(k): v for k, v in row.items()} if isinstance(row, dict) else row
+        return
+
+    number = 0
+    for line in _prepend(first, text):
+        line = line.strip()
+        if not line:
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, {_camel(k): v for k, v in row.items()} if isinstance(row, dict) else row
+
+
+def _iter_json_array(text):
+    """Yield the elements of a JSON array whose opening bracket was already read."""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    position = 0
+    eof = False
+    need_comma = after_comma = False
+    while True:
+        while position < len(buffer) and buffer[position].isspace():
+            position += 1
+        if position == len(buffer):
+            if eof:
+                raise ValueError("Unterminated JSON array")
+            buffer = text.read(JSON_CHUNK_CHARS)
+            position = 0
+            eof = not buffer
+            continue
+        if buffer[position] == "]":
+            if after_comma:
+                raise ValueError("Trailing comma in JSON array")
+            return
+        if need_comma:
+            if buffer[position] != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, found {buffer[position]!r}")
+            position += 1
+            need_comma, after_comma = False, True
+            continue
+        try:
+            row, end = decoder.raw_decode(buffer, position)
+            complete = end < len(buffer) or eof
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            complete = False
+        if not complete:
+            # The element may continue in the next chunk.
+            if len(buffer) - position > JSON_MAX_ROW_CHARS:
+                raise ValueError("JSON array element too large")
+            chunk = text.read(JSON_CHUNK_CHARS)
+            buffer = buffer[position:] + chunk
+            position = 0
+            eof = not chunk
+            continue
+        yield row
+        buffer = buffer[end:]
+        position = 0
+        need_comma, after_comma = True, False
+
+
+def _prepend(first, text):
+    line = first + text.readline()
+    while line:
+        yield line
+        line = text.readline()
+
+
+def _write_batch(cursor, kind, mode, batch):
+    """Insert a batch; returns {row number: (id, inserted)} for rows written."""
+    returned = execute_values(
+        cursor, kind.insert_sql(mode), [row for _, row in batch],
+        page_size=IMPORT_BATCH_SIZE, fetch=True
+    )
+    by_id = {str(r["id"]): r["inserted"] for r in returned}
+    written = {}
+    for number, row in batch:
+        if row[0] in by_id:
+            written[number] = (row[0], by_id[row[0]])
+    if mode == "update" and len(returned) > len(written):
+        # Updated rows keep their existing id; match them back by key.
+        key_index = 1 + kind.columns.index(kind.conflict_target.split(", ")[-1])
+        cursor.execute(
+            f"SELECT id, {kind.columns[key_index - 1]} AS key FROM {kind.table} WHERE id = ANY(%s::uuid[])",
+            ([str(r["id"]) for r in returned if not r["inserted"]],)
+        )
+        updated = {r["key"]: str(r["id"]) for r in cursor.fetchall()}
+        for number, row in batch:
+            if number not in written and row[key_index] in updated:
+                written[number] = (updated[row[key_index]], False)
+    return written
+
+
+def _flush(cursor, kind, mode, batch, report):
+    cursor.execute("SAVEPOINT import_batch")
+    try:
+        written = _write_batch(cursor, kind, mode, batch)
+        cursor.execute("RELEASE SAVEPOINT import_batch")
+    except psycopg2.Error:
+        cursor.execute("ROLLBACK TO SAVEPOINT import_batch")
+        written = {}
+        for number, row in batch:
+            cursor.execute("SAVEPOINT import_row")
+            try:
+                written.update(_write_batch(cursor, kind, mode, [(number, row)]))
+                cursor.execute("RELEASE SAVEPOINT import_row")
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT import_row")
+                report["failed"].append({"row": number, "error": str(e.diag.message_primary or "Constraint violation")})
+                written[number] = None
+
+    for number, _ in batch:
+        result = written.get(number, ())
+        if result is None:
+            continue
+        if not result:
+            report["conflicts"].append({"row": number, "error": kind.conflict_message})
+        elif result[1]:
+            report["created"] += 1
+        else:
+            report["updated"] += 1
+            invalidate(cursor, kind.cache, result[0])
+
+
+def import_assets(conn, kind, owner_id, rows, mode="skip"):
+    """Validate and upsert rows from iter_rows; returns the per-row report."""
+    report = {"created": 0, "updated": 0, "conflicts": [], "invalid": [], "failed": []}
+    seen = set()
+    batch = []
+    cursor = get_db_cursor(conn)
+
+    for number, raw in rows:
+        try:
+            data = kind.schema.model_validate(raw)
+        except ValidationError as e:
+            report["invalid"].append({"row": number, "error": e.errors(include_url=False)})
+            continue
+        key = tuple(getattr(data, field) for field in kind.key_fields)
+        if key in seen:
+            report["conflicts"].append({"row": number, "error": "Duplicate of an earlier row in the file"})
+            continue
+        seen.add(key)
+        batch.append((number, kind.row(owner_id, data)))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _flush(cursor, kind, mode, batch, report)
+            batch = []
+
+    if batch:
+        _flush(cursor, kind, mode, batch, report)
+    conn.commit()
+    cursor.close()
+    return report
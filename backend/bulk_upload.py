@@ -0,0 +1,298 @@
+"""
+Bulk upload of records queued offline by field devices.
+
+A batch mixes operations, fuel logs and alerts, each carrying a
+client-generated idempotency key. Operations are applied first and may carry
+a client-generated id, so fuel logs and alerts recorded during an operation
+can reference it in the same batch. Keys already seen for the user are reported
+as replayed with the id of the original record, so a device can resend its
+whole queue after a dropped connection. New items are inserted with one
+multi-row INSERT per type inside a savepoint; if that fails, the type falls
+back to one savepoint per item so a single bad record only fails itself.
+
+Alerts go through insert_alert and the start/stop points of operations
+through process_point, as with the live endpoints, so coalescing, counters,
+state intervals and summaries see offline records too. Those handlers also
+keep per-tractor state in memory, which a rollback does not undo, so the
+state of every tractor whose operation is rolled back is dropped with it. Items without a
+clientTimestamp are stamped with the upload time plus their index in
+microseconds, so two of them never collide on a timestamp key.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extras import execute_values
+from pydantic import ValidationError
+
+from alerting import ALERT_ENGINE, insert_alert
+from database import get_db_cursor
+from geofence import EXIT_DETECTOR
+from ingest import process_point
+from maintenance import count_operation
+from progress import PROGRESS
+from summaries import compute_summary
+from schemas import FuelLogCreate, AlertCreate, OfflineOperationCreate
+from refcache import TRACTORS, IMPLEMENTS
+from tenancy import owned_ids, operation_tractors
+
+# Applied in this order: operations before the records that refer to them.
+ITEM_SCHEMAS = {
+    "operation": OfflineOperationCreate,
+    "fuelLog": FuelLogCreate,
+    "alert": AlertCreate,
+}
+
+ITEM_ENTITIES = {
+    "operation": "operations",
+    "fuelLog": "fuel_logs",
+    "alert": "alerts",
+}
+
+INSERT_SQL = {
+    "fuelLog": """INSERT INTO fuel_logs (id, tractor_id, operator_id, operation_id, quantity, notes, timestamp)
+                  VALUES %s
+                  ON CONFLICT (tractor_id, timestamp) DO NOTHING
+                  RETURNING id""",
+    "operation": """INSERT INTO operations (id, tractor_id, implement_id, operator_id, operation_type, status, start_time, end_time, notes)
+                    VALUES %s
+                    RETURNING id""",
+}
+
+TELEMETRY_SQL = """INSERT INTO telemetry (id, operation_id, tractor_id, engine_on, pto_on, is_moving, speed, timestamp)
+                   VALUES (%s, %s, %s, %s, FALSE, FALSE, 0, %s)
+                   ON CONFLICT (operation_id, tractor_id, timestamp) DO NOTHING
+                   RETURNING *, %s AS operation_status"""
+
+KEYS_SQL = """INSERT INTO idempotency_keys (user_id, idempotency_key, entity, entity_id)
+              VALUES %s"""
+
+
+def _naive(value):
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone().replace(tzinfo=None)
+    return value
+
+
+def _uuid(value):
+    try:
+        return str(uuid.UUID(str(value)))
+    except ValueError:
+        return None
+
+
+def _entity_row(item, user_id):
+    data = item["record"]
+    timestamp = item["timestamp"]
+    if item["type"] == "fuelLog":
+        return (item["id"], data.tractorId, user_id, data.operationId, data.quantity, data.notes, timestamp)
+    end_time = _naive(data.endTime)
+    status = "completed" if end_time else "active"
+    return (item["id"], data.tractorId, data.implementId, user_id, data.operationType.value,
+            status, timestamp, end_time, data.notes)
+
+
+def _ingest_point(cursor, operation_id, tractor_id, engine_on, timestamp, status):
+    cursor.execute(TELEMETRY_SQL, (str(uuid.uuid4()), operation_id, tractor_id, engine_on, timestamp, status))
+    point = cursor.fetchone()
+    if point:
+        process_point(cursor, point)
+
+
+def _ingest_operations(cursor, items):
+    # Mirror create_operation/stop_operation: an engine-on point at start and
+    # an engine-off point at the end of a finished operation.
+    for item in sorted(items, key=lambda item: item["timestamp"]):
+        data = item["record"]
+        _ingest_point(cursor, item["id"], data.tractorId, True, item["timestamp"], "active")
+        if data.endTime:
+            PROGRESS.finish(cursor, item["id"])
+            _ingest_point(cursor, item["id"], data.tractorId, False, _naive(data.endTime), "completed")
+            count_operation(cursor, data.tractorId)
+
+
+def _forget(items):
+    for item in items:
+        if item["type"] == "operation":
+            ALERT_ENGINE.forget(_uuid(item["record"].tractorId))
+            EXIT_DETECTOR.forget(_uuid(item["record"].tractorId))
+            PROGRESS.forget(item["id"])
+
+
+def _insert_alerts(cursor, items):
+    # An alert may be folded into an open one; the item then refers to it.
+    for item in items:
+        data = item["record"]
+        alert = insert_alert(cursor, data.tractorId, data.operationId, data.alertType, data.message, item["timestamp"])
+        item["id"] = str(alert["id"])
+    return {item["id"] for item in items}
+
+
+def _error_message(error):
+    if isinstance(error, psycopg2.errors.ForeignKeyViolation):
+        return "Unknown tractor, implement or operation"
+    if isinstance(error, psycopg2.errors.UniqueViolation):
+        return "Conflicts with an existing record"
+    return "Constraint violation"
+
+
+def _insert(cursor, item_type, items, user_id):
+    """Insert items of one type; returns the set of ids actually inserted."""
+    if item_type == "alert":
+        inserted_ids = _insert_alerts(cursor, items)
+    else:
+        inserted = execute_values(
+            cursor, INSERT_SQL[item_type], [_entity_row(item, user_id) for item in items], fetch=True
+        )
+        inserted_ids = {str(row["id"]) for row in inserted}
+    # Keys of rows skipped by ON CONFLICT must not be remembered.
+    keys = [(user_id, item["key"], ITEM_ENTITIES[item_type], item["id"]) for item in items if item["id"] in inserted_ids]
+    if keys:
+        execute_values(cursor, KEYS_SQL, keys)
+    if item_type == "operation":
+        _ingest_operations(cursor, [item for item in items if item["id"] in inserted_ids])
+    return inserted_ids
+
+
+def _lookup_keys(cursor, user_id, keys):
+    cursor.execute(
+        """SELECT idempotency_key, entity, entity_id FROM idempotency_keys
+           WHERE user_id = %s AND idempotency_key = ANY(%s)""",
+        (user_id, list(keys))
+    )
+    return {row["idempotency_key"]: str(row["entity_id"]) for row in cursor.fetchall()}
+
+
+def _check_tenant(conn, tenant, pending, results):
+    """Fail items whose tractor, implement or operation belongs to another tenant.
+
+    An operation referenced by a fuel log or alert must have been run by the
+    item's tractor, either already stored or created earlier in the batch.
+    """
+    tractors = owned_ids(TRACTORS, conn, tenant, [item["record"].tractorId for item in pending])
+    implements = owned_ids(
+        IMPLEMENTS, conn, tenant,
+        [item["record"].implementId for item in pending if item["type"] == "operation"]
+    )
+    stored = operation_tractors(
+        conn, [item["record"].operationId for item in pending if item["type"] != "operation" and item["record"].operationId]
+    )
+    operations = {_uuid(operation_id): tractor_id for operation_id, tractor_id in stored.items()}
+    allowed = []
+    for item in sorted(pending, key=lambda item: item["type"] != "operation"):
+        record = item["record"]
+        if record.tractorId not in tractors:
+            results[item["index"]] = {"status": "failed", "error": "Tractor not found"}
+        elif item["type"] == "operation":
+            if record.implementId not in implements:
+                results[item["index"]] = {"status": "failed", "error": "Implement not found"}
+            else:
+                operations[item["id"]] = _uuid(record.tractorId)
+                allowed.append(item)
+        elif record.operationId and operations.get(_uuid(record.operationId)) != _uuid(record.tractorId):
+            results[item["index"]] = {"status": "failed", "error": "Operation not found"}
+        else:
+            allowed.append(item)
+    return allowed
+
+
+def apply_batch(conn, user_id, tenant, items, atomic=False):
+    """Apply a batch of BulkUploadItem and return (ok, per-item results).
+
+    With atomic=True nothing is committed unless every item is created or
+    replayed.
+    """
+    results = [None] * len(items)
+    pending = []
+    first_index = {}
+    now = datetime.now()
+
+    for index, item in enumerate(items):
+        key = item.idempotencyKey
+        if key in first_index:
+            results[index] = {"status": "duplicate", "duplicateOf": first_index[key]}
+            continue
+        first_index[key] = index
+        try:
+            record = ITEM_SCHEMAS[item.type.value].model_validate(item.data)
+        except ValidationError as e:
+            results[index] = {"status": "invalid", "error": e.errors(include_url=False)}
+            continue
+        timestamp = _naive(item.clientTimestamp) or now + timedelta(microseconds=index)
+        if item.type.value == "operation" and record.startTime:
+            timestamp = _naive(record.startTime)
+        item_id = getattr(record, "id", None) or uuid.uuid4()
+        pending.append({
+            "index": index, "key": key, "type": item.type.value, "record": record,
+            "timestamp": timestamp, "id": str(item_id),
+        })
+
+    cursor = get_db_cursor(conn)
+    replayed = _lookup_keys(cursor, user_id, [item["key"] for item in pending]) if pending else {}
+    new_items = []
+    for item in pending:
+        if item["key"] in replayed:
+            results[item["index"]] = {"status": "replayed", "id": replayed[item["key"]]}
+        else:
+            new_items.append(item)
+    if new_items:
+        new_items = _check_tenant(conn, tenant, new_items, results)
+
+    for item_type in ITEM_SCHEMAS:
+        group = [item for item in new_items if item["type"] == item_type]
+        if not group:
+            continue
+        cursor.execute("SAVEPOINT bulk_group")
+        try:
+            inserted_ids = _insert(cursor, item_type, group, user_id)
+            cursor.execute("RELEASE SAVEPOINT bulk_group")
+            for item in group:
+                results[item["index"]] = (
+                    {"status": "created", "id": item["id"]} if item["id"] in inserted_ids
+                    else {"status": "conflict", "error": "Conflicts with an existing record"}
+                )
+            continue
+        except psycopg2.Error:
+            cursor.execute("ROLLBACK TO SAVEPOINT bulk_group")
+            _forget(group)
+
+        for item in group:
+            cursor.execute("SAVEPOINT bulk_item")
+            try:
+                inserted_ids = _insert(cursor, item_type, [item], user_id)
+                cursor.execute("RELEASE SAVEPOINT bulk_item")
+                results[item["index"]] = (
+                    {"status": "created", "id": item["id"]} if item["id"] in inserted_ids
+                    else {"status": "conflict", "error": "Conflicts with an existing record"}
+                )
+            except psycopg2.Error as e:
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_item")
+                _forget([item])
+                if getattr(e.diag, "constraint_name", None) == "idempotency_keys_pkey":
+                    # A concurrent upload of the same queue won the race.
+                    existing = _lookup_keys(cursor, user_id, [item["key"]])
+                    results[item["index"]] = {"status": "replayed", "id": existing.get(item["key"])}
+                else:
+                    results[item["index"]] = {"status": "failed", "error": _error_message(e)}
+
+    # Summaries include the fuel logs of the batch, so they come last.
+    for item in new_items:
+        if item["type"] == "operation" and item["record"].endTime and results[item["index"]]["status"] == "created":
+            compute_summary(cursor, item["id"])
+
+    ok = all(r["status"] in ("created", "replayed", "duplicate") for r in results)
+    if atomic and not ok:
+        conn.rollback()
+        _forget(new_items)
+        for result in results:
+            if result["status"] == "created":
+                result["status"] = "skipped"
+                result.pop("id")
+    else:
+        conn.commit()
+    cursor.close()
+
+    for index, item in enumerate(items):
+        results[index] = {"index": index, "idempotencyKey": item.idempotencyKey, "type": item.type.value, **results[index]}
+    return ok, results
@@ -0,0 +1,229 @@
+"""
+Coverage tiles: worked ground rasterised into web-mercator z/x/y tiles.
+
+A tile is built from the telemetry of one scope (an operation, a field, or a
+day of the tenant's fleet) inside the tile's bounds plus a margin. Each
+worked segment (the earlier point was moving with the PTO on, or just moving
+for operations that never report PTO, as in summaries.py) is sampled at sub-
+radius steps and the samples are dilated by half the implement's working
+width, per operation, with NumPy. The tile value is the number of operations
+that covered a pixel, rendered as a green PNG or packed as a 1-bit bitmap.
+
+Segments longer than COVERAGE_MAX_SEGMENT_M are treated as gaps, which also
+keeps the margin query exact: any segment that reaches the tile has an end
+within the margin.
+
+Tiles are cached on disk under COVERAGE_DIR, keyed by the newest telemetry
+timestamp of the scope. Telemetry timestamps are assigned on ingest, so a new
+point changes the key and older tiles of the scope are removed when the next
+tile is written.
+"""
+import os
+import math
+import shutil
+import struct
+import zlib
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from database import get_db_cursor
+from geo import EARTH_RADIUS_M
+
+COVERAGE_DIR = os.environ.get(
+    "COVERAGE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "tiles")
+)
+COVERAGE_MAX_SEGMENT_M = float(os.environ.get("COVERAGE_MAX_SEGMENT_M", "100"))
+TILE_SIZE = 256
+MAX_ZOOM = 22
+SCOPES = ("operation", "field", "day")
+FORMATS = {"png": "image/png", "bin": "application/octet-stream"}
+
+# Green ramp by number of covering operations (1, 2, 3+), RGBA.
+PALETTE = np.array([
+    [0, 0, 0, 0],
+    [76, 175, 80, 140],
+    [46, 125, 50, 190],
+    [27, 94, 32, 230],
+], dtype=np.uint8)
+
+SCOPE_FILTERS = {
+    "operation": "t.operation_id = %(scope_id)s",
+    "field": "t.field_id = %(scope_id)s",
+    "day": "t.tractor_id IN (SELECT id FROM tractors WHERE owner_id = %(tenant)s) "
+           "AND t.timestamp >= %(day_start)s AND t.timestamp < %(day_end)s",
+}
+
+
+def tile_bounds(z, x, y):
+    """(min_lat, min_lon, max_lat, max_lon) of a tile."""
+    n = 2 ** z
+
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+
+def metres_per_pixel(z, latitude):
+    return 2 * math.pi * EARTH_RADIUS_M * math.cos(math.radians(latitude)) / (TILE_SIZE * 2 ** z)
+
+
+def _pixels(lat, lon, z, x, y):
+    """Project degrees to pixel coordinates within tile (x, y)."""
+    scale = TILE_SIZE * 2 ** z
+    lat = np.radians(np.clip(lat, -85.0511, 85.0511))
+    px = (lon + 180) / 360 * scale - x * TILE_SIZE
+    py = (1 - np.log(np.tan(lat) + 1 / np.cos(lat)) / math.pi) / 2 * scale - y * TILE_SIZE
+    return px, py
+
+
+def _dilate(mask, radius):
+    """Grow a boolean mask by about radius pixels (alternating cross and square: an octagon)."""
+    for step in range(radius):
+        grown = mask.copy()
+        grown[1:, :] |= mask[:-1, :]
+        grown[:-1, :] |= mask[1:, :]
+        grown[:, 1:] |= mask[:, :-1]
+        grown[:, :-1] |= mask[:, 1:]
+        if step % 2:
+            grown[1:, 1:] |= mask[:-1, :-1]
+            grown[1:, :-1] |= mask[:-1, 1:]
+            grown[:-1, 1:] |= mask[1:, :-1]
+            grown[:-1, :-1] |= mask[1:, 1:]
+        mask = grown
+    return mask
+
+
+def rasterize(tracks, z, x, y):
+    """Count of covering operations per pixel for [(px, py, worked, width_m), ...] tracks."""
+    counts = np.zeros((TILE_SIZE, TILE_SIZE), dtype=np.uint16)
+    latitude = tile_bounds(z, x, y)[0]
+    mpp = metres_per_pixel(z, latitude)
+    max_segment = COVERAGE_MAX_SEGMENT_M / mpp
+    for px, py, worked, width in tracks:
+        if len(px) < 2:
+            continue
+        radius = width / 2 / mpp
+        pad = int(math.ceil(radius)) + 1
+        size = TILE_SIZE + 2 * pad
+
+        x0, y0, x1, y1 = px[:-1], py[:-1], px[1:], py[1:]
+        lengths = np.hypot(x1 - x0, y1 - y0)
+        keep = worked[:-1] & (lengths <= max_segment)
+        x0, y0, x1, y1, lengths = x0[keep], y0[keep], x1[keep], y1[keep], lengths[keep]
+        if not len(lengths):
+            continue
+
+        steps = np.maximum(1, np.ceil(lengths / max(0.5, radius))).astype(np.int64)
+        segment = np.repeat(np.arange(len(steps)), steps + 1)
+        offsets = np.arange(len(segment)) - np.repeat(np.cumsum(steps + 1) - (steps + 1), steps + 1)
+        t = offsets / np.repeat(steps, steps + 1)
+        sx = np.rint(x0[segment] + (x1 - x0)[segment] * t).astype(np.int64) + pad
+        sy = np.rint(y0[segment] + (y1 - y0)[segment] * t).astype(np.int64) + pad
+        inside = (sx >= 0) & (sx < size) & (sy >= 0) & (sy < size)
+        if not inside.any():
+            continue
+
+        mask = np.zeros((size, size), dtype=bool)
+        mask[sy[inside], sx[inside]] = True
+        mask = _dilate(mask, int(round(radius)))
+        counts += mask[pad:pad + TILE_SIZE, pad:pad + TILE_SIZE]
+    return counts
+
+
+def encode_png(counts):
+    rgba = PALETTE[np.minimum(counts, len(PALETTE) - 1)]
+    raw = b"".join(b"\x00" + row.tobytes() for row in rgba)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    header = struct.pack(">IIBBBBB", TILE_SIZE, TILE_SIZE, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b"")
+
+
+def encode_bitmap(counts):
+    """Row-major 1-bit coverage mask, most significant bit first (8 KiB per tile)."""
+    return np.packbits(counts > 0).tobytes()
+
+
+def scope_params(scope, scope_id, tenant):
+    params = {"scope_id": scope_id, "tenant": tenant}
+    if scope == "day":
+        day_start = datetime.fromisoformat(scope_id).replace(hour=0, minute=0, second=0, microsecond=0)
+        params["scope_id"] = day_start.date().isoformat()
+        params["day_start"] = day_start
+        params["day_end"] = day_start + timedelta(days=1)
+    return params
+
+
+def scope_version(cursor, scope, params):
+    cursor.execute(
+        f"SELECT MAX(t.timestamp) AS newest FROM telemetry t WHERE {SCOPE_FILTERS[scope]}",
+        params
+    )
+    newest = cursor.fetchone()["newest"]
+    return newest.strftime("%Y%m%d%H%M%S%f") if newest else "empty"
+
+
+def load_tracks(cursor, scope, params, z, x, y):
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(z, x, y)
+    margin_lat = math.degrees((COVERAGE_MAX_SEGMENT_M + 50) / EARTH_RADIUS_M)
+    margin_lon = margin_lat / max(0.01, math.cos(math.radians(max(abs(min_lat), abs(max_lat)))))
+    cursor.execute(
+        f"""SELECT t.operation_id, t.latitude, t.longitude, t.is_moving, t.pto_on,
+                   COALESCE(i.working_width, 2) AS working_width
+            FROM telemetry t
+            JOIN operations o ON o.id = t.operation_id
+            LEFT JOIN implements i ON i.id = o.implement_id
+            WHERE {SCOPE_FILTERS[scope]}
+              AND t.latitude BETWEEN %(min_lat)s AND %(max_lat)s
+              AND t.longitude BETWEEN %(min_lon)s AND %(max_lon)s
+            ORDER BY t.operation_id, t.timestamp""",
+        dict(params, min_lat=min_lat - margin_lat, max_lat=max_lat + margin_lat,
+             min_lon=min_lon - margin_lon, max_lon=max_lon + margin_lon)
+    )
+    rows = cursor.fetchall()
+    tracks = []
+    start = 0
+    for end in range(1, len(rows) + 1):
+        if end < len(rows) and rows[end]["operation_id"] == rows[start]["operation_id"]:
+            continue
+        chunk = rows[start:end]
+        lat = np.array([r["latitude"] for r in chunk], dtype=float)
+        lon = np.array([r["longitude"] for r in chunk], dtype=float)
+        moving = np.array([bool(r["is_moving"]) for r in chunk])
+        pto = np.array([bool(r["pto_on"]) for r in chunk])
+        px, py = _pixels(lat, lon, z, x, y)
+        tracks.append((px, py, moving & pto if pto.any() else moving, float(chunk[0]["working_width"])))
+        start = end
+    return tracks
+
+
+def get_tile(conn, scope, scope_id, tenant, z, x, y, fmt):
+    """Tile bytes from the disk cache, rendering and storing it if needed."""
+    cursor = get_db_cursor(conn)
+    params = scope_params(scope, scope_id, tenant)
+    version = scope_version(cursor, scope, params)
+    key = f"{tenant}-{params['scope_id']}" if scope == "day" else str(params["scope_id"])
+    scope_dir = os.path.join(COVERAGE_DIR, scope, key)
+    path = os.path.join(scope_dir, version, str(z), str(x), f"{y}.{fmt}")
+    if os.path.exists(path):
+        cursor.close()
+        with open(path, "rb") as f:
+            return f.read()
+
+    counts = rasterize(load_tracks(cursor, scope, params, z, x, y), z, x, y)
+    cursor.close()
+    data = encode_png(counts) if fmt == "png" else encode_bitmap(counts)
+
+    for stale in os.listdir(scope_dir) if os.path.isdir(scope_dir) else ():
+        if stale != version:
+            shutil.rmtree(os.path.join(scope_dir, stale), ignore_errors=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial = f"{path}.{os.getpid()}.tmp"
+    with open(partial, "wb") as f:
+        f.write(data)
+    os.replace(partial, path)
+    return data
@@ -1,4 +1,6 @@
 import os
+import time
+import uuid
 import psycopg2
 from psycopg2.extras import RealDictCursor
 from urllib.parse import urlparse
@@ -7,9 +9,13 @@ from dotenv import load_dotenv
 load_dotenv()
 
 DATABASE_URL = os.environ.get("DATABASE_URL")
+STREAM_CHUNK_ROWS = int(os.environ.get("STREAM_CHUNK_ROWS", "2000"))
 
 db_config = None
 
+_query_observers = []
+_connect_observers = []
+
 def _initialize_db_config():
     global db_config, DATABASE_URL
     if not DATABASE_URL:
@@ -36,162 +42,91 @@ def get_db_config():
         _initialize_db_config()
     return db_config
 
-def get_db():
+def add_query_observer(observer):
+    """Register observer(query, params, seconds, rowcount), called after each query."""
+    _query_observers.append(observer)
+
+def add_connect_observer(observer):
+    """Register observer(seconds), called after each connection is opened."""
+    _connect_observers.append(observer)
+
+class ObservedCursor(RealDictCursor):
+    def execute(self, query, vars=None):
+        if not _query_observers:
+            return super().execute(query, vars)
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            elapsed = time.perf_counter() - started
+            for observer in _query_observers:
+                observer(query, vars, elapsed, self.rowcount)
+
+def _connect():
     config = get_db_config()
+    started = time.perf_counter()
     conn = psycopg2.connect(**config)
+    elapsed = time.perf_counter() - started
+    for observer in _connect_observers:
+        observer(elapsed)
+    return conn
+
+def get_db():
+    conn = _connect()
     try:
         yield conn
     finally:
         conn.close()
 
 def get_db_cursor(conn):
-    return conn.cursor(cursor_factory=RealDictCursor)
+    return conn.cursor(cursor_factory=ObservedCursor)
+
+def stream_query(query, params=None, chunk_size=STREAM_CHUNK_ROWS, cursor_factory=RealDictCursor):
+    """Yield lists of at most chunk_size rows from a server-side cursor.
+
+    The cursor runs on its own read-only connection, so the generator can
+    outlive the request's connection (streaming responses) and only one chunk
+    is in memory at a time. Closing the generator closes the connection.
+    """
+    conn = _connect()
+    try:
+        conn.set_session(readonly=True)
+        cursor = conn.cursor(name=f"stream_{uuid.uuid4().hex}", cursor_factory=cursor_factory)
+        cursor.itersize = chunk_size
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+    finally:
+        conn.close()
+
+def stream_keyset(query, params, key, after, chunk_size=STREAM_CHUNK_ROWS):
+    """Yield lists of at most chunk_size rows of a keyset-paginated query.
+
+    The query filters on ``<key> > %(after)s``, orders by the key and ends
+    with ``LIMIT %(limit)s``. Each chunk is read on a connection of its own
+    that is closed before the chunk is yielded, so unlike stream_query no
+    transaction is held open while a slow consumer works through the rows.
+    """
+    while True:
+        conn = _connect()
+        try:
+            conn.set_session(readonly=True)
+            cursor = get_db_cursor(conn)
+            cursor.execute(query, dict(params, after=after, limit=chunk_size))
+            rows = cursor.fetchall()
+            cursor.close()
+        finally:
+            conn.close()
+        if rows:
+            yield rows
+        if len(rows) < chunk_size:
+            return
+        after = rows[-1][key]
 
 def init_db():
-    config = get_db_config()
-    conn = psycopg2.connect(**config)
-    cursor = conn.cursor()
-    
-    cursor.execute("""
-        DO $$ BEGIN
-            CREATE TYPE user_role AS ENUM ('owner', 'operator', 'farmer');
-        EXCEPTION WHEN duplicate_object THEN NULL;
-        END $$;
-    """)
-    
-    cursor.execute("""
-        DO $$ BEGIN
-            CREATE TYPE operation_type AS ENUM ('tillage', 'sowing', 'spraying', 'weeding', 'harvesting', 'threshing', 'grading');
-        EXCEPTION WHEN duplicate_object THEN NULL;
-        END $$;
-    """)
-    
-    cursor.execute("""
-        DO $$ BEGIN
-            CREATE TYPE operation_status AS ENUM ('active', 'completed', 'cancelled');
-        EXCEPTION WHEN duplicate_object THEN NULL;
-        END $$;
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            username TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            full_name TEXT NOT NULL,
-            role user_role NOT NULL DEFAULT 'operator',
-            phone TEXT,
-            is_active BOOLEAN NOT NULL DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tractors (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            owner_id UUID NOT NULL REFERENCES users(id),
-            manufacturer_name TEXT NOT NULL,
-            model TEXT NOT NULL,
-            registration_number TEXT UNIQUE NOT NULL,
-            specifications JSONB,
-            is_active BOOLEAN NOT NULL DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS implements (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            owner_id UUID NOT NULL REFERENCES users(id),
-            operation_type operation_type NOT NULL,
-            name TEXT NOT NULL,
-            brand_name TEXT NOT NULL,
-            specifications JSONB,
-            working_width FLOAT NOT NULL,
-            is_active BOOLEAN NOT NULL DEFAULT TRUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS operations (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            tractor_id UUID NOT NULL REFERENCES tractors(id),
-            implement_id UUID NOT NULL REFERENCES implements(id),
-            operator_id UUID NOT NULL REFERENCES users(id),
-            operation_type operation_type NOT NULL,
-            status operation_status NOT NULL DEFAULT 'active',
-            start_time TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            end_time TIMESTAMP,
-            notes TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS telemetry (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            operation_id UUID NOT NULL REFERENCES operations(id),
-            tractor_id UUID NOT NULL REFERENCES tractors(id),
-            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            engine_on BOOLEAN NOT NULL,
-            latitude FLOAT,
-            longitude FLOAT,
-            is_moving BOOLEAN NOT NULL DEFAULT FALSE,
-            pto_on BOOLEAN NOT NULL DEFAULT FALSE,
-            speed FLOAT DEFAULT 0,
-            implement_data JSONB
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS fuel_logs (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            tractor_id UUID NOT NULL REFERENCES tractors(id),
-            operator_id UUID NOT NULL REFERENCES users(id),
-            operation_id UUID REFERENCES operations(id),
-            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            quantity FLOAT NOT NULL,
-            notes TEXT
-        );
-    """)
-    
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS alerts (
-            id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
-            tractor_id UUID NOT NULL REFERENCES tractors(id),
-            operation_id UUID REFERENCES operations(id),
-            timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-            alert_type TEXT NOT NULL,
-            message TEXT NOT NULL,
-            is_resolved BOOLEAN NOT NULL DEFAULT FALSE
-        );
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS users_phone_unique ON users (phone) WHERE phone IS NOT NULL;
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS implements_owner_name_unique ON implements (owner_id, name);
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS operations_active_unique ON operations (tractor_id) WHERE status = 'active';
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS telemetry_unique ON telemetry (operation_id, tractor_id, timestamp);
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS fuel_logs_unique ON fuel_logs (tractor_id, timestamp);
-    """)
-
-    cursor.execute("""
-        CREATE UNIQUE INDEX IF NOT EXISTS alerts_unique ON alerts (tractor_id, operation_id, alert_type, timestamp);
-    """)
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    from migrate import migrate
+    return migrate()
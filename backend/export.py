@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Columnar export of telemetry, operations and fuel logs (Parquet or Arrow).
+
+Rows are read from a server-side cursor in EXPORT_BATCH_ROWS chunks, turned
+into Arrow record batches column by column and written as they arrive: one
+Parquet row group, or one Arrow IPC stream batch, per chunk, compressed with
+zstd. Memory use depends on the batch size, not on the export size, so the
+same code serves the HTTP endpoint (streamed to the client) and this script
+(written to local disk).
+
+Telemetry is ordered by tractor and time, which both follows the tractor
+index and compresses well.
+
+    python export.py --owner <owner id> --start 2024-01-01 --end 2024-07-01 \\
+        --datasets telemetry,operations --format parquet --output-dir exports
+"""
+import os
+import sys
+import argparse
+from datetime import datetime
+
+import psycopg2.extensions
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import stream_query
+
+EXPORT_BATCH_ROWS = int(os.environ.get("EXPORT_BATCH_ROWS", "100000"))
+FORMATS = {"parquet": "application/vnd.apache.parquet", "arrow": "application/vnd.apache.arrow.stream"}
+
+TENANT = "tractor_id IN (SELECT id FROM tractors WHERE owner_id = %(owner_id)s)"
+
+
+class Dataset:
+    def __init__(self, name, table, time_column, order, schema):
+        self.name = name
+        self.table = table
+        self.time_column = time_column
+        self.order = order
+        self.schema = schema
+
+    def query(self, tractor_ids=None):
+        conditions = [TENANT, f"{self.time_column} >= %(start)s", f"{self.time_column} < %(end)s"]
+        if tractor_ids:
+            conditions.append("tractor_id = ANY(%(tractor_ids)s::uuid[])")
+        return (
+            f"SELECT {', '.join(self.schema.names)} FROM {self.table} "
+            f"WHERE {' AND '.join(conditions)} ORDER BY {self.order}"
+        )
+
+
+UUID = pa.string()
+TIMESTAMP = pa.timestamp("us")
+
+DATASETS = {
+    "telemetry": Dataset("telemetry", "telemetry", "timestamp", "tractor_id, timestamp", pa.schema([
+        ("id", UUID), ("operation_id", UUID), ("tractor_id", UUID), ("field_id", UUID),
+        ("timestamp", TIMESTAMP), ("engine_on", pa.bool_()), ("pto_on", pa.bool_()), ("is_moving", pa.bool_()),
+        ("latitude", pa.float64()), ("longitude", pa.float64()), ("speed", pa.float64()),
+    ])),
+    "operations": Dataset("operations", "operations", "start_time", "start_time", pa.schema([
+        ("id", UUID), ("tractor_id", UUID), ("implement_id", UUID), ("operator_id", UUID),
+        ("operation_type", pa.string()), ("status", pa.string()),
+        ("start_time", TIMESTAMP), ("end_time", TIMESTAMP), ("notes", pa.string()),
+    ])),
+    "fuel_logs": Dataset("fuel_logs", "fuel_logs", "timestamp", "timestamp", pa.schema([
+        ("id", UUID), ("tractor_id", UUID), ("operator_id", UUID), ("operation_id", UUID),
+        ("quantity", pa.float64()), ("timestamp", TIMESTAMP), ("notes", pa.string()),
+    ])),
+}
+
+
+def _record_batch(schema, rows):
+    columns = list(zip(*rows))
+    return pa.record_batch(
+        [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+        schema=schema
+    )
+
+
+def _open_writer(sink, schema, fmt):
+    if fmt == "parquet":
+        return pq.ParquetWriter(sink, schema, compression="zstd")
+    return pa.ipc.new_stream(sink, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+
+def write_export(sink, dataset, fmt, params, tractor_ids=None, batch_rows=EXPORT_BATCH_ROWS):
+    """Write one dataset to a file path or file-like sink; yields the running row count per batch."""
+    params = dict(params, tractor_ids=[str(i) for i in tractor_ids or []])
+    writer = _open_writer(sink, dataset.schema, fmt)
+    rows_written = 0
+    try:
+        for rows in stream_query(dataset.query(tractor_ids), params, batch_rows, psycopg2.extensions.cursor):
+            batch = _record_batch(dataset.schema, rows)
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=len(rows))
+            else:
+                writer.write_batch(batch)
+            rows_written += len(rows)
+            yield rows_written
+    finally:
+        writer.close()
+
+
+class _Buffer:
+    """Write-only file object whose contents are drained by the response generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data):
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_export(dataset, fmt, params, tractor_ids=None):
+    """Export as a generator of bytes, one piece per batch, for a streaming response."""
+    buffer = _Buffer()
+    for _ in write_export(buffer, dataset, fmt, params, tractor_ids):
+        data = buffer.drain()
+        if data:
+            yield data
+    data = buffer.drain()
+    if data:
+        yield data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--owner", required=True, help="owner (tenant) id whose data is exported")
+    parser.add_argument("--start", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--end", required=True, type=datetime.fromisoformat)
+    parser.add_argument("--tractor", action="append", help="limit to this tractor id (repeatable)")
+    parser.add_argument("--datasets", default="telemetry", help=f"comma-separated: {', '.join(DATASETS)}")
+    parser.add_argument("--format", choices=FORMATS, default="parquet")
+    parser.add_argument("--output-dir", default="exports")
+    args = parser.parse_args()
+
+    names = [name.strip() for name in args.datasets.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DATASETS]
+    if unknown:
+        raise SystemExit(f"Unknown datasets: {', '.join(unknown)}")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    params = {"owner_id": args.owner, "start": args.start, "end": args.end}
+    for name in names:
+        path = os.path.join(args.output_dir, f"{name}.{args.format}")
+        started = datetime.now()
+        rows = 0
+        for rows in write_export(path, DATASETS[name], args.format, params, args.tractor):
+            print(f"  {name}: {rows} rows", end="\r")
+        seconds = (datetime.now() - started).total_seconds()
+        print(f"{name}: {rows} rows -> {path} ({os.path.getsize(path) / 1e6:.1f} MB, {seconds:.1f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Synthetic fleet data generator for scale testing.
+
+Creates owners, operators, tractors and implements, then for every tractor a
+sequence of non-overlapping operations with dense GPS telemetry following a
+back-and-forth pattern over a rectangular field, plus fuel logs and alerts.
+All rows are streamed into Postgres with COPY. COPY bypasses the ingest
+handlers, so each tractor's state intervals and counters are then rebuilt
+with the migrations' rebuild functions and its operations are summarised.
+All generated operations are completed, so there is no live progress.
+
+Output is deterministic for a given --seed: every tractor draws from its own
+random stream, so the data does not depend on --jobs either.
+
+Example (roughly 100M telemetry rows):
+
+    python fleet_datagen.py --owners 200 --tractors-per-owner 5 \\
+        --operations-per-tractor 50 --interval-seconds 1 --jobs 8
+"""
+import os
+import sys
+import math
+import uuid
+import random
+import argparse
+import multiprocessing
+from datetime import datetime, timedelta
+
+import bcrypt
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_db_config
+from summaries import compute_summary
+
+OPERATION_TYPES = ["tillage", "sowing", "spraying", "weeding", "harvesting", "threshing", "grading"]
+ALERT_TYPES = ["breakdown", "maintenance", "low_fuel", "overspeed"]
+MANUFACTURERS = [("Mahindra", "575 DI"), ("John Deere", "5050D"), ("Sonalika", "DI 745"),
+                 ("Swaraj", "744 FE"), ("New Holland", "3630"), ("Massey Ferguson", "1035 DI")]
+METERS_PER_DEGREE = 111320.0
+NULL = "\\N"
+
+
+class IteratorFile:
+    """Minimal read-only file object over an iterator of text lines, for COPY."""
+
+    def __init__(self, lines):
+        self._lines = lines
+        self._buffer = ""
+
+    def read(self, size=-1):
+        chunks = [self._buffer]
+        length = len(self._buffer)
+        while size < 0 or length < size:
+            try:
+                line = next(self._lines)
+            except StopIteration:
+                break
+            chunks.append(line)
+            length += len(line)
+        data = "".join(chunks)
+        if size < 0:
+            self._buffer = ""
+            return data
+        self._buffer = data[size:]
+        return data[:size]
+
+
+def copy_rows(cursor, table, columns, rows):
+    lines = ("\t".join(row) + "\n" for row in rows)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN",
+        IteratorFile(lines),
+        size=1 << 20
+    )
+
+
+def make_uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def fmt_bool(value):
+    return "t" if value else "f"
+
+
+def fmt_ts(value):
+    return value.isoformat(sep=" ")
+
+
+def build_fleet(args):
+    rng = random.Random(f"{args.seed}:fleet")
+    password = bcrypt.hashpw(b"password", bcrypt.gensalt(rounds=4)).decode("utf-8")
+
+    users, tractors, implements = [], [], []
+    for o in range(args.owners):
+        owner_id = make_uuid(rng)
+        farm_lat = rng.uniform(17.0, 27.0)
+        farm_lon = rng.uniform(73.0, 85.0)
+        users.append((owner_id, f"gen{args.seed}_owner_{o}", password, f"Owner {o}", "owner", NULL))
+
+        operator_ids = []
+        for p in range(args.operators_per_owner):
+            operator_id = make_uuid(rng)
+            operator_ids.append(operator_id)
+            users.append((operator_id, f"gen{args.seed}_operator_{o}_{p}", password, f"Operator {o}-{p}", "operator", owner_id))
+
+        owner_implements = []
+        for i in range(args.implements_per_owner):
+            implement = {
+                "id": make_uuid(rng),
+                "owner_id": owner_id,
+                "operation_type": OPERATION_TYPES[i % len(OPERATION_TYPES)],
+                "name": f"Implement {o}-{i}",
+                "brand_name": rng.choice(["Fieldking", "Lemken", "Shaktiman", "Landforce"]),
+                "working_width": round(rng.uniform(1.5, 6.0), 2),
+            }
+            owner_implements.append(implement)
+            implements.append(implement)
+
+        for t in range(args.tractors_per_owner):
+            manufacturer, model = rng.choice(MANUFACTURERS)
+            tractors.append({
+                "index": len(tractors),
+                "id": make_uuid(rng),
+                "owner_id": owner_id,
+                "manufacturer_name": manufacturer,
+                "model": model,
+                "registration_number": f"GEN{args.seed}-{o:05d}-{t:03d}",
+                "farm_lat": farm_lat,
+                "farm_lon": farm_lon,
+                "operator_ids": operator_ids or [owner_id],
+                "implements": owner_implements,
+            })
+    return users, tractors, implements
+
+
+def field_segments(rng, working_width):
+    """Straight passes joined by headland turns, in local metres."""
+    length = rng.uniform(100, 400)
+    passes = max(2, int(rng.uniform(40, 200) / working_width))
+    segments = []
+    x, y = 0.0, 0.0
+    for p in range(passes):
+        direction = 1 if p % 2 == 0 else -1
+        x_end = x + direction * length
+        segments.append((x, y, x_end, y, rng.uniform(1.4, 2.2), True))
+        if p < passes - 1:
+            segments.append((x_end, y, x_end, y + working_width, 0.8, False))
+        x, y = x_end, y + working_width
+    return segments
+
+
+def track_points(rng, origin_lat, origin_lon, heading, segments, idle, interval, max_seconds):
+    """Yield (offset_seconds, lat, lon, is_moving, pto_on, speed_kmh)."""
+    cos_h, sin_h = math.cos(heading), math.sin(heading)
+    lon_scale = METERS_PER_DEGREE * math.cos(math.radians(origin_lat))
+
+    def to_latlon(x, y):
+        rx = x * cos_h - y * sin_h + rng.gauss(0, 0.5)
+        ry = x * sin_h + y * cos_h + rng.gauss(0, 0.5)
+        return origin_lat + ry / METERS_PER_DEGREE, origin_lon + rx / lon_scale
+
+    t = 0.0
+    while t < idle:
+        lat, lon = to_latlon(0.0, 0.0)
+        yield t, lat, lon, False, False, 0.0
+        t += interval
+
+    carry = 0.0
+    for x0, y0, x1, y1, speed, pto in segments:
+        seg_len = math.hypot(x1 - x0, y1 - y0)
+        pos = carry
+        step = speed * interval
+        while pos < seg_len:
+            if t >= max_seconds:
+                return
+            f = pos / seg_len
+            lat, lon = to_latlon(x0 + (x1 - x0) * f, y0 + (y1 - y0) * f)
+            yield t, lat, lon, True, pto, round(speed * 3.6 + rng.gauss(0, 0.3), 2)
+            t += interval
+            pos += step
+        carry = pos - seg_len
+
+
+def plan_operations(args, tractor, end):
+    rng = random.Random(f"{args.seed}:tractor:{tractor['index']}")
+    span = timedelta(days=args.days).total_seconds()
+    slot = span / max(args.operations_per_tractor, 1)
+    start_of_span = end - timedelta(days=args.days)
+
+    operations = []
+    for n in range(args.operations_per_tractor):
+        implement = rng.choice(tractor["implements"])
+        start = start_of_span + timedelta(seconds=n * slot + rng.uniform(0, slot * 0.3))
+        operations.append({
+            "id": make_uuid(rng),
+            "tractor": tractor,
+            "implement": implement,
+            "operator_id": rng.choice(tractor["operator_ids"]),
+            "start": start.replace(microsecond=0),
+            "max_seconds": slot * 0.65,
+            "track_seed": rng.getrandbits(64),
+            "field_lat": tractor["farm_lat"] + rng.uniform(-0.02, 0.02),
+            "field_lon": tractor["farm_lon"] + rng.uniform(-0.02, 0.02),
+            "heading": rng.uniform(0, math.pi),
+            "fuel_rate": rng.uniform(3.0, 8.0),
+            "alert": rng.random() < args.alert_rate,
+            "alert_seed": rng.getrandbits(32),
+        })
+        operations[-1]["end"] = operations[-1]["start"] + timedelta(seconds=operation_duration(args, operations[-1]))
+    return operations
+
+
+def _track_plan(op):
+    rng = random.Random(op["track_seed"])
+    segments = field_segments(rng, op["implement"]["working_width"])
+    idle = rng.randint(30, 120)
+    return rng, segments, idle
+
+
+def operation_duration(args, op):
+    # Operations are copied before their telemetry (foreign key), so the end
+    # time is derived from the track plan rather than from the last point.
+    _, segments, idle = _track_plan(op)
+    moving = sum(math.hypot(x1 - x0, y1 - y0) / speed for x0, y0, x1, y1, speed, _ in segments)
+    return math.ceil(min(idle + moving, op["max_seconds"]) + args.interval_seconds)
+
+
+def operation_track(args, op):
+    rng, segments, idle = _track_plan(op)
+    return track_points(rng, op["field_lat"], op["field_lon"], op["heading"], segments,
+                        idle, args.interval_seconds, op["max_seconds"])
+
+
+def telemetry_rows(args, operations, stats):
+    for op in operations:
+        rng = random.Random(op["track_seed"] ^ 0x5EED)
+        tractor_id = op["tractor"]["id"]
+        for offset, lat, lon, moving, pto, speed in operation_track(args, op):
+            stats["telemetry"] += 1
+            yield (make_uuid(rng), op["id"], tractor_id, fmt_ts(op["start"] + timedelta(seconds=offset)),
+                   "t", f"{lat:.7f}", f"{lon:.7f}", fmt_bool(moving), fmt_bool(pto), str(speed), NULL)
+
+
+def operation_rows(operations):
+    for op in operations:
+        yield (op["id"], op["tractor"]["id"], op["implement"]["id"], op["operator_id"],
+               op["implement"]["operation_type"], "completed", fmt_ts(op["start"]), fmt_ts(op["end"]), NULL)
+
+
+def fuel_log_rows(operations):
+    for op in operations:
+        hours = (op["end"] - op["start"]).total_seconds() / 3600
+        yield (make_uuid(random.Random(op["alert_seed"] ^ 0xF0E1)), op["tractor"]["id"], op["operator_id"], op["id"],
+               fmt_ts(op["end"]), f"{max(hours * op['fuel_rate'], 1.0):.2f}", NULL)
+
+
+def alert_rows(operations):
+    for op in operations:
+        if not op["alert"]:
+            continue
+        rng = random.Random(op["alert_seed"])
+        duration = (op["end"] - op["start"]).total_seconds()
+        alert_type = rng.choice(ALERT_TYPES)
+        yield (make_uuid(rng), op["tractor"]["id"], op["id"],
+               fmt_ts(op["start"] + timedelta(seconds=int(rng.uniform(0, duration)))),
+               alert_type, f"Generated {alert_type} alert", fmt_bool(rng.random() < 0.7))
+
+
+def rebuild_derived(cursor, tractor_id, operations):
+    cursor.execute("SELECT rebuild_state_intervals(%s::uuid[])", ([tractor_id],))
+    cursor.execute("SELECT rebuild_tractor_counters(%s::uuid[])", ([tractor_id],))
+    for op in operations:
+        compute_summary(cursor, op["id"])
+
+
+def load_tractors(job):
+    args, tractors, end = job
+    stats = {"operations": 0, "telemetry": 0}
+    conn = psycopg2.connect(**get_db_config())
+    cursor = conn.cursor()
+    try:
+        for tractor in tractors:
+            operations = plan_operations(args, tractor, end)
+            copy_rows(cursor, "operations",
+                      ["id", "tractor_id", "implement_id", "operator_id", "operation_type",
+                       "status", "start_time", "end_time", "notes"],
+                      operation_rows(operations))
+            copy_rows(cursor, "telemetry",
+                      ["id", "operation_id", "tractor_id", "timestamp", "engine_on", "latitude",
+                       "longitude", "is_moving", "pto_on", "speed", "implement_data"],
+                      telemetry_rows(args, operations, stats))
+            copy_rows(cursor, "fuel_logs",
+                      ["id", "tractor_id", "operator_id", "operation_id", "timestamp", "quantity", "notes"],
+                      fuel_log_rows(operations))
+            copy_rows(cursor, "alerts",
+                      ["id", "tractor_id", "operation_id", "timestamp", "alert_type", "message", "is_resolved"],
+                      alert_rows(operations))
+            rebuild_derived(cursor, tractor["id"], operations)
+            stats["operations"] += len(operations)
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--owners", type=int, default=10)
+    parser.add_argument("--operators-per-owner", type=int, default=3)
+    parser.add_argument("--tractors-per-owner", type=int, default=5)
+    parser.add_argument("--implements-per-owner", type=int, default=4)
+    parser.add_argument("--operations-per-tractor", type=int, default=20)
+    parser.add_argument("--interval-seconds", type=float, default=5.0, help="telemetry sampling interval")
+    parser.add_argument("--days", type=int, default=90, help="time span covered by operations")
+    parser.add_argument("--end", default="2025-01-01", help="end of the time span (ISO date)")
+    parser.add_argument("--alert-rate", type=float, default=0.2, help="probability of an alert per operation")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    end = datetime.fromisoformat(args.end)
+    started = datetime.now()
+    users, tractors, implements = build_fleet(args)
+
+    conn = psycopg2.connect(**get_db_config())
+    cursor = conn.cursor()
+    copy_rows(cursor, "users", ["id", "username", "password", "full_name", "role", "owner_id"], iter(users))
+    copy_rows(cursor, "tractors",
+              ["id", "owner_id", "manufacturer_name", "model", "registration_number"],
+              ((t["id"], t["owner_id"], t["manufacturer_name"], t["model"], t["registration_number"]) for t in tractors))
+    copy_rows(cursor, "implements",
+              ["id", "owner_id", "operation_type", "name", "brand_name", "working_width"],
+              ((i["id"], i["owner_id"], i["operation_type"], i["name"], i["brand_name"], str(i["working_width"]))
+               for i in implements))
+    conn.commit()
+    cursor.close()
+    conn.close()
+    print(f"Created {len(users)} users, {len(tractors)} tractors, {len(implements)} implements")
+
+    jobs = max(1, min(args.jobs, len(tractors)))
+    chunks = [(args, tractors[i::jobs], end) for i in range(jobs)]
+    totals = {"operations": 0, "telemetry": 0}
+    with multiprocessing.Pool(jobs) as pool:
+        for stats in pool.imap_unordered(load_tractors, chunks):
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"  {totals['operations']} operations, {totals['telemetry']} telemetry rows")
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(f"Done in {elapsed:.1f}s ({totals['telemetry'] / max(elapsed, 0.001):.0f} telemetry rows/s)")
+
+
+if __name__ == "__main__":
+    main()
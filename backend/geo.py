@@ -0,0 +1,59 @@
+"""
+Small geometry helpers for field boundaries and tracks.
+
+Polygons are sequences of (latitude, longitude) pairs in degrees. Fields are
+small enough that treating degrees as planar coordinates is accurate for
+containment tests; areas use a local equirectangular projection.
+"""
+import math
+
+EARTH_RADIUS_M = 6371008.8
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M / 1000 * math.asin(math.sqrt(a))
+
+
+def bounding_box(polygon):
+    """Return (min_lat, min_lon, max_lat, max_lon)."""
+    lats = [p[0] for p in polygon]
+    lons = [p[1] for p in polygon]
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Ray casting test; points on an edge may fall either way."""
+    inside = False
+    count = len(polygon)
+    j = count - 1
+    for i in range(count):
+        lat_i, lon_i = polygon[i]
+        lat_j, lon_j = polygon[j]
+        if (lat_i > lat) != (lat_j > lat):
+            crossing = lon_i + (lat - lat_i) * (lon_j - lon_i) / (lat_j - lat_i)
+            if lon < crossing:
+                inside = not inside
+        j = i
+    return inside
+
+
+def polygon_area_hectares(polygon):
+    """Area of a small polygon using the shoelace formula on projected metres."""
+    if len(polygon) < 3:
+        return 0.0
+    lat0 = math.radians(sum(p[0] for p in polygon) / len(polygon))
+    scale_x = math.radians(1) * EARTH_RADIUS_M * math.cos(lat0)
+    scale_y = math.radians(1) * EARTH_RADIUS_M
+    points = [(p[1] * scale_x, p[0] * scale_y) for p in polygon]
+    area = 0.0
+    for i in range(len(points)):
+        x1, y1 = points[i]
+        x2, y2 = points[(i + 1) % len(points)]
+        area += x1 * y2 - x2 * y1
+    return abs(area) / 2 / 10000
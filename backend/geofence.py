@@ -0,0 +1,159 @@
+"""
+Geofencing: assign telemetry points to fields and flag field exits.
+
+Each owner's active fields are loaded once into a FenceIndex, a uniform grid
+of GEOFENCE_CELL_DEG degrees where every cell lists the fences whose bounding
+box overlaps it. Locating a point is a dict lookup for its cell, a bounding
+box check and an exact point-in-polygon test for the few fences in that cell,
+so the cost does not grow with the number of fences a farm has. Bounding
+boxes come from the min/max columns stored with each field; the field
+endpoints reject boundaries spanning more than GEOFENCE_MAX_SPAN_DEG, which
+bounds the number of cells a single fence can occupy.
+
+Indexes are cached per owner and invalidated through refcache.invalidate()
+whenever a field changes, so other workers drop them too when
+REFCACHE_CROSS_WORKER is enabled.
+"""
+import os
+import json
+import math
+import time
+import threading
+
+from database import get_db_cursor
+from geo import bounding_box, point_in_polygon, polygon_area_hectares
+from ingest import add_handler
+from refcache import register_cache
+from alerting import insert_alert
+
+GEOFENCE_CELL_DEG = float(os.environ.get("GEOFENCE_CELL_DEG", "0.01"))
+GEOFENCE_TTL = float(os.environ.get("GEOFENCE_TTL", "300"))
+GEOFENCE_MAX_SPAN_DEG = float(os.environ.get("GEOFENCE_MAX_SPAN_DEG", "0.5"))
+
+
+class Fence:
+    __slots__ = ("id", "name", "polygon", "bbox", "area")
+
+    def __init__(self, id, name, polygon, bbox=None):
+        self.id = id
+        self.name = name
+        self.polygon = polygon
+        self.bbox = bbox or bounding_box(polygon)
+        self.area = polygon_area_hectares(polygon)
+
+    def contains(self, lat, lon):
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        if lat < min_lat or lat > max_lat or lon < min_lon or lon > max_lon:
+            return False
+        return point_in_polygon(lat, lon, self.polygon)
+
+
+class FenceIndex:
+    def __init__(self, fences, cell=GEOFENCE_CELL_DEG):
+        self.cell = cell
+        self.fences = {fence.id: fence for fence in fences}
+        self.cells = {}
+        # Smallest fence first, so a field nested in another wins.
+        for fence in sorted(fences, key=lambda f: f.area):
+            min_lat, min_lon, max_lat, max_lon = fence.bbox
+            for x in range(self._key(min_lat), self._key(max_lat) + 1):
+                for y in range(self._key(min_lon), self._key(max_lon) + 1):
+                    self.cells.setdefault((x, y), []).append(fence)
+
+    def _key(self, degrees):
+        return math.floor(degrees / self.cell)
+
+    def locate(self, lat, lon):
+        for fence in self.cells.get((self._key(lat), self._key(lon)), ()):
+            if fence.contains(lat, lon):
+                return fence
+        return None
+
+
+def boundary_polygon(boundary):
+    """Convert a stored boundary ([{latitude, longitude}, ...]) to (lat, lon) pairs."""
+    if isinstance(boundary, str):
+        boundary = json.loads(boundary)
+    return [(float(p["latitude"]), float(p["longitude"])) for p in boundary]
+
+
+class GeofenceCache:
+    name = "geofences"
+
+    def __init__(self, ttl=GEOFENCE_TTL):
+        self.ttl = ttl
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get(self, conn, owner_id):
+        owner_id = str(owner_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._indexes.get(owner_id)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        cursor = get_db_cursor(conn)
+        cursor.execute(
+            """SELECT id, name, boundary, min_latitude, min_longitude, max_latitude, max_longitude
+               FROM fields WHERE owner_id = %s AND is_active = TRUE""",
+            (owner_id,)
+        )
+        fences = [
+            Fence(str(row["id"]), row["name"], boundary_polygon(row["boundary"]),
+                  (row["min_latitude"], row["min_longitude"], row["max_latitude"], row["max_longitude"]))
+            for row in cursor.fetchall()
+        ]
+        cursor.close()
+        index = FenceIndex(fences)
+        with self._lock:
+            self._indexes[owner_id] = (now + self.ttl, index)
+        return index
+
+    def locate(self, conn, owner_id, lat, lon):
+        if lat is None or lon is None:
+            return None
+        return self.get(conn, owner_id).locate(lat, lon)
+
+    def discard(self, owner_id):
+        with self._lock:
+            self._indexes.pop(str(owner_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._indexes.clear()
+
+
+GEOFENCES = GeofenceCache()
+register_cache(GEOFENCES)
+
+
+class ExitDetector:
+    """Remembers each tractor's current field and raises geofence_exit on leaving it."""
+
+    def __init__(self):
+        self._fields = {}
+        self._lock = threading.Lock()
+
+    def on_point(self, cursor, point):
+        if point["latitude"] is None or point["longitude"] is None:
+            return
+        tractor_id = str(point["tractor_id"])
+        field_id = str(point["field_id"]) if point.get("field_id") else None
+        with self._lock:
+            previous = self._fields.get(tractor_id)
+            self._fields[tractor_id] = (field_id, point.get("field_name"))
+        if previous is None or previous[0] is None or previous[0] == field_id:
+            return
+        insert_alert(
+            cursor, point["tractor_id"], point["operation_id"], "geofence_exit",
+            f"Left field {previous[1]}", point["timestamp"]
+        )
+
+    def forget(self, tractor_id):
+        with self._lock:
+            self._fields.pop(str(tractor_id), None)
+
+
+EXIT_DETECTOR = ExitDetector()
+add_handler(EXIT_DETECTOR.on_point)
@@ -0,0 +1,31 @@
+"""
+Post-insert processing of telemetry points.
+
+create_telemetry, and starting or stopping an operation, hand every newly
+stored point to process_point(), which runs the registered handlers in order
+inside the ingesting transaction, so anything a handler writes commits
+together with the point. Handlers keep the per-tractor state they need in
+memory or in a few indexed rows and must do O(1) work per point.
+
+A point is the inserted telemetry row (snake_case keys) plus
+``operation_status``, the status of the operation it was reported for.
+"""
+import psycopg2
+
+_handlers = []
+
+
+def add_handler(handler):
+    """Register handler(cursor, point) to run for every ingested point."""
+    _handlers.append(handler)
+
+
+def process_point(cursor, point):
+    for handler in _handlers:
+        try:
+            handler(cursor, point)
+        except psycopg2.Error:
+            raise
+        except Exception as e:
+            # A broken rule must not cost us the telemetry itself.
+            print(f"Telemetry handler {getattr(handler, '__name__', handler)} failed: {e}")
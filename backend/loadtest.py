@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Load generator simulating a fleet of tractors against the API.
+
+Every simulated tractor starts an operation, streams telemetry at a fixed
+interval, stops the operation and starts again. Simulated managers poll the
+dashboard and reports. At the end a JSON summary with p50/p95/p99 latency,
+error rate and throughput per endpoint is printed (or written to --output),
+so two runs can be diffed.
+
+    python loadtest.py --spawn --tractors 2000 --duration 120 --output run.json
+
+--spawn starts `uvicorn main:app` against DATABASE_URL for the duration of
+the run; without it the harness targets --base-url.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from datetime import datetime
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self.started = time.monotonic()
+
+    def record(self, endpoint, seconds, ok):
+        self.samples.setdefault(endpoint, []).append(seconds)
+        if not ok:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        endpoints = {}
+        total = 0
+        total_errors = 0
+        for endpoint, samples in sorted(self.samples.items()):
+            samples.sort()
+            errors = self.errors.get(endpoint, 0)
+            total += len(samples)
+            total_errors += errors
+            endpoints[endpoint] = {
+                "requests": len(samples),
+                "errors": errors,
+                "errorRate": errors / len(samples),
+                "throughputRps": len(samples) / elapsed,
+                "p50Ms": percentile(samples, 50) * 1000,
+                "p95Ms": percentile(samples, 95) * 1000,
+                "p99Ms": percentile(samples, 99) * 1000,
+                "maxMs": samples[-1] * 1000,
+            }
+        return {
+            "elapsedSeconds": elapsed,
+            "requests": total,
+            "errors": total_errors,
+            "errorRate": total_errors / total if total else 0,
+            "throughputRps": total / elapsed if elapsed else 0,
+            "endpoints": endpoints,
+        }
+
+
+def percentile(sorted_samples, pct):
+    if not sorted_samples:
+        return 0.0
+    rank = min(len(sorted_samples) - 1, max(0, math.ceil(pct / 100 * len(sorted_samples)) - 1))
+    return sorted_samples[rank]
+
+
+async def call(client, recorder, endpoint, method, url, token=None, **kwargs):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    started = time.monotonic()
+    try:
+        response = await client.request(method, url, headers=headers, **kwargs)
+        ok = response.status_code < 400
+    except httpx.HTTPError:
+        response = None
+        ok = False
+    recorder.record(endpoint, time.monotonic() - started, ok)
+    return response if ok else None
+
+
+async def register(client, recorder, username, role):
+    response = await call(client, recorder, "POST /api/auth/register", "POST", "/api/auth/register", json={
+        "username": username, "password": "loadtest", "fullName": username, "role": role,
+    })
+    if response is None:
+        raise SystemExit(f"Could not register {username}; is the API up and the database migrated?")
+    return response.json()
+
+
+async def setup_fleet(client, recorder, args, tag):
+    owner = await register(client, recorder, f"lt_{tag}_owner", "owner")
+    owner_token, owner_id = owner["token"], owner["user"]["id"]
+    operator_tokens = [operator["token"] for operator in await asyncio.gather(*[
+        register(client, recorder, f"lt_{tag}_operator_{i}", "operator") for i in range(args.operators)
+    ])]
+
+    semaphore = asyncio.Semaphore(args.connections)
+
+    # Operators only see tractors of the owner whose team they are on, and
+    # join it by accepting the owner's invitation.
+    for i, operator_token in enumerate(operator_tokens):
+        response = await call(client, recorder, "POST /api/team", "POST", "/api/team", owner_token,
+                              json={"username": f"lt_{tag}_operator_{i}"})
+        if response is not None:
+            response = await call(client, recorder, "POST /api/team/invites/{owner_id}/accept", "POST",
+                                  f"/api/team/invites/{owner_id}/accept", operator_token)
+        if response is None:
+            raise SystemExit(f"Could not add lt_{tag}_operator_{i} to the owner's team")
+
+    async def create(endpoint, url, payload):
+        async with semaphore:
+            response = await call(client, recorder, endpoint, "POST", url, owner_token, json=payload)
+            return response.json()["id"] if response else None
+
+    implement_ids = await asyncio.gather(*[
+        create("POST /api/implements", "/api/implements", {
+            "operationType": "tillage", "name": f"LT implement {tag} {i}",
+            "brandName": "Loadtest", "workingWidth": 3.0,
+        }) for i in range(max(1, args.tractors // 10))
+    ])
+    tractor_ids = await asyncio.gather(*[
+        create("POST /api/tractors", "/api/tractors", {
+            "manufacturerName": "Loadtest", "model": "LT", "registrationNumber": f"LT-{tag}-{i}",
+        }) for i in range(args.tractors)
+    ])
+    return (
+        owner_token,
+        operator_tokens or [owner_token],
+        [t for t in tractor_ids if t],
+        [i for i in implement_ids if i],
+    )
+
+
+async def tractor_loop(client, recorder, args, token, tractor_id, implement_ids, deadline):
+    rng = random.Random(tractor_id)
+    # Spread the fleet so tractors do not all start in the same instant.
+    await asyncio.sleep(rng.uniform(0, args.telemetry_interval))
+    lat, lon = rng.uniform(17, 27), rng.uniform(73, 85)
+
+    while time.monotonic() < deadline:
+        response = await call(client, recorder, "POST /api/operations", "POST", "/api/operations", token, json={
+            "tractorId": tractor_id, "implementId": rng.choice(implement_ids), "operationType": "tillage",
+        })
+        if response is None:
+            await asyncio.sleep(args.telemetry_interval)
+            continue
+        operation_id = response.json()["id"]
+
+        points = rng.randint(args.points_per_operation // 2, args.points_per_operation)
+        for _ in range(points):
+            if time.monotonic() >= deadline:
+                break
+            lat += rng.uniform(-0.00005, 0.00005)
+            lon += rng.uniform(-0.00005, 0.00005)
+            await call(client, recorder, "POST /api/telemetry", "POST", "/api/telemetry", token, json={
+                "operationId": operation_id, "tractorId": tractor_id, "engineOn": True,
+                "latitude": lat, "longitude": lon, "isMoving": True, "ptoOn": rng.random() < 0.8,
+                "speed": rng.uniform(3, 9),
+            })
+            await asyncio.sleep(args.telemetry_interval)
+
+        await call(client, recorder, "POST /api/operations/{id}/stop", "POST",
+                   f"/api/operations/{operation_id}/stop", token)
+
+
+async def manager_loop(client, recorder, args, token, deadline):
+    rng = random.Random()
+    await asyncio.sleep(rng.uniform(0, args.poll_interval))
+    while time.monotonic() < deadline:
+        await call(client, recorder, "GET /api/dashboard/stats", "GET", "/api/dashboard/stats", token)
+        await call(client, recorder, "GET /api/reports", "GET", "/api/reports", token)
+        if rng.random() < 0.3:
+            await call(client, recorder, "GET /api/operations", "GET", "/api/operations", token)
+        await asyncio.sleep(args.poll_interval)
+
+
+async def run(args):
+    tag = datetime.now().strftime("%Y%m%d%H%M%S")
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        setup_recorder = Recorder()
+        owner_token, operator_tokens, tractor_ids, implement_ids = await setup_fleet(client, setup_recorder, args, tag)
+        if not tractor_ids or not implement_ids:
+            raise SystemExit("Fleet setup failed; see errors above")
+
+        recorder = Recorder()
+        deadline = time.monotonic() + args.duration
+        tasks = [
+            tractor_loop(client, recorder, args, operator_tokens[i % len(operator_tokens)], tractor_id,
+                         implement_ids, deadline)
+            for i, tractor_id in enumerate(tractor_ids)
+        ]
+        tasks += [manager_loop(client, recorder, args, owner_token, deadline) for _ in range(args.managers)]
+        await asyncio.gather(*tasks)
+
+    result = recorder.summary()
+    result["setup"] = setup_recorder.summary()
+    result["config"] = {k: v for k, v in vars(args).items() if k != "output"}
+    result["createdAt"] = datetime.now().isoformat()
+    return result
+
+
+def spawn_server(args):
+    port = args.base_url.rsplit(":", 1)[-1].strip("/")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", port, "--workers", str(args.workers),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"{args.base_url}/api/docs", timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("API server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--spawn", action="store_true", help="start uvicorn main:app for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when --spawn is used")
+    parser.add_argument("--tractors", type=int, default=200)
+    parser.add_argument("--operators", type=int, default=20)
+    parser.add_argument("--managers", type=int, default=5)
+    parser.add_argument("--duration", type=float, default=60, help="seconds of steady-state load")
+    parser.add_argument("--telemetry-interval", type=float, default=1.0, help="seconds between points per tractor")
+    parser.add_argument("--points-per-operation", type=int, default=60)
+    parser.add_argument("--poll-interval", type=float, default=5.0, help="seconds between manager polls")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="write the JSON summary to this file")
+    args = parser.parse_args()
+
+    process = spawn_server(args) if args.spawn else None
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    output = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
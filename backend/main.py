@@ -1,5 +1,6 @@
 import os
 import sys
+import csv
 import json
 import uuid
 from datetime import datetime, timedelta
@@ -7,28 +8,54 @@ from typing import Optional
 
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from database import get_db, get_db_cursor, init_db
 from schemas import (
-    LoginInput, RegisterInput, TokenResponse, UserResponse,
+    LoginInput, RegisterInput, TokenResponse, UserResponse, TeamMemberInput,
     TractorCreate, TractorUpdate, TractorResponse,
     ImplementCreate, ImplementUpdate, ImplementResponse,
     OperationCreate, OperationResponse,
+    FieldCreate, FieldUpdate,
     TelemetryCreate, TelemetryResponse,
     FuelLogCreate, FuelLogResponse,
-    AlertCreate, AlertResponse,
+    AlertCreate, AlertResponse, AlertResolveInput,
+    CounterReadingInput, MaintenanceScheduleCreate,
+    BulkUploadInput,
     DashboardStats, ReportResponse
 )
 from auth import (
     get_password_hash, verify_password, create_access_token,
     get_current_user, require_role
 )
+from metrics import MetricsMiddleware, TELEMETRY_POINTS, render_metrics
+from querytrace import QueryTraceMiddleware
+from profiling import ProfilingMiddleware, list_profiles, profile_path
+from refcache import TRACTORS, IMPLEMENTS, USERS, invalidate, start_listener
+from bulk_import import TRACTOR_IMPORT, IMPLEMENT_IMPORT, IMPORT_MODES, iter_rows, import_assets
+from tenancy import tenant_id, tenant_filter, owned_ids, require_tractor, require_implement, require_operation
+from ingest import process_point
+from alerting import ALERT_ENGINE, insert_alert
+from geofence import GEOFENCES, EXIT_DETECTOR, GEOFENCE_MAX_SPAN_DEG
+from geo import bounding_box, polygon_area_hectares
+from summaries import compute_summary, get_summaries
+from progress import PROGRESS, covered_area, get_progress
+from utilization import get_intervals, utilization
+from track import MIN_ZOOM, MAX_ZOOM, encode_polyline, get_track
+from coverage import SCOPES as COVERAGE_SCOPES, FORMATS as TILE_FORMATS, MAX_ZOOM as TILE_MAX_ZOOM, get_tile
+from replay import FORMATS as REPLAY_FORMATS, replay
+from export import DATASETS as EXPORT_DATASETS, FORMATS as EXPORT_FORMATS, stream_export
+from reports import CSV_EXPORTS, report_window, stream_csv
+from spatial import bbox_params, tractors_in_bbox, points_in_bbox
+from maintenance import count_operation, set_counters, create_schedules, record_service, due_schedules
+from bulk_upload import apply_batch
+
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
 
 app = FastAPI(title="Fleet Management API", docs_url="/api/docs", redoc_url="/api/redoc")
 
@@ -39,6 +66,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryTraceMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 def dict_from_row(row):
     if row is None:
@@ -57,6 +87,17 @@ def dict_from_row(row):
             result[key] = value
     return result
 
+# Bookkeeping columns that are never part of API responses.
+INTERNAL_COLUMNS = {"sync_xid"}
+
+SYNC_ENTITIES = [
+    ("tractors", "tractors"),
+    ("implements", "implements"),
+    ("operations", "operations"),
+    ("fuel_logs", "fuelLogs"),
+    ("alerts", "alerts"),
+]
+
 def camel_case(snake_str):
     components = snake_str.split('_')
     return components[0] + ''.join(x.title() for x in components[1:])
@@ -66,6 +107,8 @@ def row_to_camel_case(row):
         return None
     result = {}
     for key, value in dict_from_row(row).items():
+        if key in INTERNAL_COLUMNS:
+            continue
         if isinstance(value, datetime):
             result[camel_case(key)] = value.isoformat()
         elif isinstance(value, uuid.UUID):
@@ -74,6 +117,12 @@ def row_to_camel_case(row):
             result[camel_case(key)] = value
     return result
 
+def parse_datetime(value, name):
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+
 @app.on_event("startup")
 async def startup_event():
     try:
@@ -81,6 +130,24 @@ async def startup_event():
         print("Database initialized successfully")
     except Exception as e:
         print(f"Database initialization error: {e}")
+    start_listener()
+
+@app.get("/api/metrics", response_class=PlainTextResponse)
+async def get_metrics(request: Request):
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=403, detail="Access denied")
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/profiles")
+async def get_profiles(current_user = Depends(require_role("owner"))):
+    return list_profiles(tenant_id(current_user))
+
+@app.get("/api/profiles/{name}")
+async def download_profile(name: str, current_user = Depends(require_role("owner"))):
+    path = profile_path(tenant_id(current_user), name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=name)
 
 @app.post("/api/auth/register", response_model=TokenResponse)
 async def register(data: RegisterInput, conn = Depends(get_db)):
@@ -158,30 +225,132 @@ async def login(data: LoginInput, conn = Depends(get_db)):
         }
     }
 
+@app.get("/api/team")
+async def get_team(
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT id, username, full_name, role, phone, is_active FROM users
+           WHERE owner_id = %s ORDER BY full_name""",
+        (current_user["id"],)
+    )
+    members = [row_to_camel_case(row) for row in cursor.fetchall()]
+    cursor.close()
+    return members
+
+@app.post("/api/team")
+async def add_team_member(
+    data: TeamMemberInput,
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT id, username, full_name, role, phone, is_active FROM users
+           WHERE username = %s AND role = 'operator' AND owner_id IS NULL""",
+        (data.username,)
+    )
+    member = cursor.fetchone()
+    
+    if not member:
+        cursor.close()
+        raise HTTPException(status_code=404, detail="No unassigned operator with this username")
+    
+    # The operator joins only after accepting the invitation.
+    cursor.execute(
+        "INSERT INTO team_invites (owner_id, operator_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+        (current_user["id"], member["id"])
+    )
+    conn.commit()
+    cursor.close()
+    
+    return dict(row_to_camel_case(member), status="invited")
+
+@app.get("/api/team/invites")
+async def get_team_invites(
+    current_user = Depends(require_role("operator")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT i.owner_id, u.username, u.full_name, i.created_at FROM team_invites i
+           JOIN users u ON u.id = i.owner_id
+           WHERE i.operator_id = %s ORDER BY i.created_at DESC""",
+        (current_user["id"],)
+    )
+    invites = [row_to_camel_case(row) for row in cursor.fetchall()]
+    cursor.close()
+    return invites
+
+@app.post("/api/team/invites/{owner_id}/accept")
+async def accept_team_invite(
+    owner_id: str,
+    current_user = Depends(require_role("operator")),
+    conn = Depends(get_db)
+):
+    if current_user.get("owner_id"):
+        raise HTTPException(status_code=409, detail="Already on a team")
+    
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT EXISTS (SELECT 1 FROM tractors WHERE owner_id = %(id)s)
+               OR EXISTS (SELECT 1 FROM implements WHERE owner_id = %(id)s) AS owns_data""",
+        {"id": current_user["id"]}
+    )
+    if cursor.fetchone()["owns_data"]:
+        # Joining would hide them: their tenant becomes the owner's.
+        cursor.close()
+        raise HTTPException(status_code=409, detail="Transfer or delete your own tractors and implements first")
+    
+    cursor.execute(
+        "DELETE FROM team_invites WHERE owner_id = %s AND operator_id = %s RETURNING owner_id",
+        (owner_id, current_user["id"])
+    )
+    if not cursor.fetchone():
+        conn.rollback()
+        cursor.close()
+        raise HTTPException(status_code=404, detail="Invitation not found")
+    
+    cursor.execute(
+        """UPDATE users SET owner_id = %s WHERE id = %s AND owner_id IS NULL
+           RETURNING id, username, full_name, role, phone, is_active, owner_id""",
+        (owner_id, current_user["id"])
+    )
+    member = cursor.fetchone()
+    cursor.execute("DELETE FROM team_invites WHERE operator_id = %s", (current_user["id"],))
+    conn.commit()
+    cursor.close()
+    
+    return row_to_camel_case(member)
+
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(
     current_user = Depends(get_current_user),
     conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
+    tenant = tenant_id(current_user)
     
-    cursor.execute("SELECT COUNT(*) as count FROM tractors")
+    cursor.execute("SELECT COUNT(*) as count FROM tractors WHERE owner_id = %s", (tenant,))
     tractors_count = cursor.fetchone()["count"]
     
-    cursor.execute("SELECT COUNT(*) as count FROM implements")
+    cursor.execute("SELECT COUNT(*) as count FROM implements WHERE owner_id = %s", (tenant,))
     implements_count = cursor.fetchone()["count"]
     
-    cursor.execute("SELECT COUNT(*) as count FROM operations WHERE status = 'active'")
+    cursor.execute(f"SELECT COUNT(*) as count FROM operations WHERE status = 'active' AND {tenant_filter()}", (tenant,))
     active_ops_count = cursor.fetchone()["count"]
     
-    cursor.execute("SELECT COUNT(*) as count FROM alerts WHERE is_resolved = FALSE")
+    cursor.execute(f"SELECT COUNT(*) as count FROM alerts WHERE is_resolved = FALSE AND {tenant_filter()}", (tenant,))
     unresolved_alerts_count = cursor.fetchone()["count"]
     
     today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
     tomorrow = today + timedelta(days=1)
     cursor.execute(
-        "SELECT COALESCE(SUM(quantity), 0) as total FROM fuel_logs WHERE timestamp >= %s AND timestamp < %s",
-        (today, tomorrow)
+        f"""SELECT COALESCE(SUM(quantity), 0) as total FROM fuel_logs
+            WHERE {tenant_filter()} AND timestamp >= %s AND timestamp < %s""",
+        (tenant, today, tomorrow)
     )
     today_fuel = cursor.fetchone()["total"]
     
@@ -190,7 +359,9 @@ async def get_dashboard_stats(
            FROM operations o
            JOIN tractors t ON o.tractor_id = t.id
            JOIN users u ON o.operator_id = u.id
-           ORDER BY o.start_time DESC LIMIT 5"""
+           WHERE t.owner_id = %s
+           ORDER BY o.start_time DESC LIMIT 5""",
+        (tenant,)
     )
     
     recent_ops = []
@@ -221,7 +392,7 @@ async def get_tractors(
     conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
-    cursor.execute("SELECT * FROM tractors ORDER BY created_at DESC")
+    cursor.execute("SELECT * FROM tractors WHERE owner_id = %s ORDER BY created_at DESC", (tenant_id(current_user),))
     tractors = [row_to_camel_case(row) for row in cursor.fetchall()]
     cursor.close()
     return tractors
@@ -239,10 +410,11 @@ async def create_tractor(
         cursor.execute(
             """INSERT INTO tractors (id, owner_id, manufacturer_name, model, registration_number, specifications, is_active)
                VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (tractor_id, current_user["id"], data.manufacturerName, data.model, 
+            (tractor_id, tenant_id(current_user), data.manufacturerName, data.model, 
              data.registrationNumber, json.dumps(data.specifications) if data.specifications else None,
              data.isActive if data.isActive is not None else True)
         )
+        invalidate(cursor, TRACTORS, tractor_id)
         conn.commit()
     except psycopg2.IntegrityError:
         conn.rollback()
@@ -283,18 +455,22 @@ async def update_tractor(
         updates.append("is_active = %s")
         params.append(data.isActive)
     
+    tenant = tenant_id(current_user)
     if not updates:
-        cursor.execute("SELECT * FROM tractors WHERE id = %s", (tractor_id,))
+        cursor.execute("SELECT * FROM tractors WHERE id = %s AND owner_id = %s", (tractor_id, tenant))
         tractor = cursor.fetchone()
         cursor.close()
+        if not tractor:
+            raise HTTPException(status_code=404, detail="Tractor not found")
         return row_to_camel_case(tractor)
     
-    params.append(tractor_id)
-    query = f"UPDATE tractors SET {', '.join(updates)} WHERE id = %s"
+    params.extend([tractor_id, tenant])
+    query = f"UPDATE tractors SET {', '.join(updates)} WHERE id = %s AND owner_id = %s"
     cursor.execute(query, params)
+    invalidate(cursor, TRACTORS, tractor_id)
     conn.commit()
     
-    cursor.execute("SELECT * FROM tractors WHERE id = %s", (tractor_id,))
+    cursor.execute("SELECT * FROM tractors WHERE id = %s AND owner_id = %s", (tractor_id, tenant))
     tractor = cursor.fetchone()
     cursor.close()
     
@@ -311,10 +487,14 @@ async def delete_tractor(
 ):
     cursor = get_db_cursor(conn)
     
-    cursor.execute("DELETE FROM tractors WHERE id = %s", (tractor_id,))
+    cursor.execute("DELETE FROM tractors WHERE id = %s AND owner_id = %s", (tractor_id, tenant_id(current_user)))
+    deleted = cursor.rowcount
+    invalidate(cursor, TRACTORS, tractor_id)
     conn.commit()
+    ALERT_ENGINE.forget(tractor_id)
+    EXIT_DETECTOR.forget(tractor_id)
     
-    if cursor.rowcount == 0:
+    if deleted == 0:
         cursor.close()
         raise HTTPException(status_code=404, detail="Tractor not found")
     
@@ -327,7 +507,7 @@ async def get_implements(
     conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
-    cursor.execute("SELECT * FROM implements ORDER BY created_at DESC")
+    cursor.execute("SELECT * FROM implements WHERE owner_id = %s ORDER BY created_at DESC", (tenant_id(current_user),))
     implements = [row_to_camel_case(row) for row in cursor.fetchall()]
     cursor.close()
     return implements
@@ -341,7 +521,7 @@ async def create_implement(
     cursor = get_db_cursor(conn)
     implement_id = str(uuid.uuid4())
     
-    cursor.execute("SELECT id FROM implements WHERE owner_id = %s AND name = %s", (current_user["id"], data.name))
+    cursor.execute("SELECT id FROM implements WHERE owner_id = %s AND name = %s", (tenant_id(current_user), data.name))
     if cursor.fetchone():
         cursor.close()
         raise HTTPException(status_code=409, detail="Implement with this name already exists for the owner")
@@ -350,10 +530,11 @@ async def create_implement(
         cursor.execute(
             """INSERT INTO implements (id, owner_id, operation_type, name, brand_name, working_width, specifications, is_active)
                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-            (implement_id, current_user["id"], data.operationType, data.name, data.brandName,
+            (implement_id, tenant_id(current_user), data.operationType, data.name, data.brandName,
              data.workingWidth, json.dumps(data.specifications) if data.specifications else None,
              data.isActive if data.isActive is not None else True)
         )
+        invalidate(cursor, IMPLEMENTS, implement_id)
         conn.commit()
     except psycopg2.IntegrityError:
         conn.rollback()
@@ -397,18 +578,22 @@ async def update_implement(
         updates.append("is_active = %s")
         params.append(data.isActive)
     
+    tenant = tenant_id(current_user)
     if not updates:
-        cursor.execute("SELECT * FROM implements WHERE id = %s", (implement_id,))
+        cursor.execute("SELECT * FROM implements WHERE id = %s AND owner_id = %s", (implement_id, tenant))
         implement = cursor.fetchone()
         cursor.close()
+        if not implement:
+            raise HTTPException(status_code=404, detail="Implement not found")
         return row_to_camel_case(implement)
     
-    params.append(implement_id)
-    query = f"UPDATE implements SET {', '.join(updates)} WHERE id = %s"
+    params.extend([implement_id, tenant])
+    query = f"UPDATE implements SET {', '.join(updates)} WHERE id = %s AND owner_id = %s"
     cursor.execute(query, params)
+    invalidate(cursor, IMPLEMENTS, implement_id)
     conn.commit()
     
-    cursor.execute("SELECT * FROM implements WHERE id = %s", (implement_id,))
+    cursor.execute("SELECT * FROM implements WHERE id = %s AND owner_id = %s", (implement_id, tenant))
     implement = cursor.fetchone()
     cursor.close()
     
@@ -425,52 +610,220 @@ async def delete_implement(
 ):
     cursor = get_db_cursor(conn)
     
-    cursor.execute("DELETE FROM implements WHERE id = %s", (implement_id,))
+    cursor.execute("DELETE FROM implements WHERE id = %s AND owner_id = %s", (implement_id, tenant_id(current_user)))
+    deleted = cursor.rowcount
+    invalidate(cursor, IMPLEMENTS, implement_id)
     conn.commit()
     
-    if cursor.rowcount == 0:
+    if deleted == 0:
         cursor.close()
         raise HTTPException(status_code=404, detail="Implement not found")
     
     cursor.close()
     return {"success": True}
 
+def run_import(kind, file, mode, current_user, conn):
+    if mode not in IMPORT_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of: {', '.join(IMPORT_MODES)}")
+    rows = iter_rows(file.file, file.filename, file.content_type)
+    try:
+        return import_assets(conn, kind, tenant_id(current_user), rows, mode)
+    except (ValueError, csv.Error) as e:
+        conn.rollback()
+        raise HTTPException(status_code=400, detail=f"Could not parse import file: {e}")
+
+@app.post("/api/import/tractors")
+async def import_tractors(
+    file: UploadFile = File(...),
+    mode: str = "skip",
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    return run_import(TRACTOR_IMPORT, file, mode, current_user, conn)
+
+@app.post("/api/import/implements")
+async def import_implements(
+    file: UploadFile = File(...),
+    mode: str = "skip",
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    return run_import(IMPLEMENT_IMPORT, file, mode, current_user, conn)
+
+def field_geometry(boundary):
+    polygon = [(p.latitude, p.longitude) for p in boundary]
+    min_lat, min_lon, max_lat, max_lon = bounding_box(polygon)
+    if max_lat - min_lat > GEOFENCE_MAX_SPAN_DEG or max_lon - min_lon > GEOFENCE_MAX_SPAN_DEG:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Field boundary may span at most {GEOFENCE_MAX_SPAN_DEG} degrees of latitude and longitude"
+        )
+    return {
+        "boundary": json.dumps([p.model_dump() for p in boundary]),
+        "min_latitude": min_lat,
+        "min_longitude": min_lon,
+        "max_latitude": max_lat,
+        "max_longitude": max_lon,
+        "area_hectares": polygon_area_hectares(polygon),
+    }
+
+@app.get("/api/fields")
+async def get_fields(
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute("SELECT * FROM fields WHERE owner_id = %s ORDER BY name", (tenant_id(current_user),))
+    fields = [row_to_camel_case(row) for row in cursor.fetchall()]
+    cursor.close()
+    return fields
+
+@app.post("/api/fields")
+async def create_field(
+    data: FieldCreate,
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    field_id = str(uuid.uuid4())
+    tenant = tenant_id(current_user)
+    geometry = field_geometry(data.boundary)
+    
+    try:
+        cursor.execute(
+            """INSERT INTO fields (id, owner_id, name, boundary, min_latitude, min_longitude,
+                                   max_latitude, max_longitude, area_hectares, is_active)
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+               RETURNING *""",
+            (field_id, tenant, data.name, geometry["boundary"], geometry["min_latitude"],
+             geometry["min_longitude"], geometry["max_latitude"], geometry["max_longitude"],
+             geometry["area_hectares"], data.isActive if data.isActive is not None else True)
+        )
+        field = cursor.fetchone()
+        invalidate(cursor, GEOFENCES, tenant)
+        conn.commit()
+    except psycopg2.IntegrityError:
+        conn.rollback()
+        cursor.close()
+        raise HTTPException(status_code=409, detail="Field with this name already exists")
+    
+    cursor.close()
+    return row_to_camel_case(field)
+
+@app.patch("/api/fields/{field_id}")
+async def update_field(
+    field_id: str,
+    data: FieldUpdate,
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    tenant = tenant_id(current_user)
+    
+    updates = []
+    params = []
+    
+    if data.name is not None:
+        updates.append("name = %s")
+        params.append(data.name)
+    if data.boundary is not None:
+        for column, value in field_geometry(data.boundary).items():
+            updates.append(f"{column} = %s")
+            params.append(value)
+    if data.isActive is not None:
+        updates.append("is_active = %s")
+        params.append(data.isActive)
+    
+    if not updates:
+        cursor.execute("SELECT * FROM fields WHERE id = %s AND owner_id = %s", (field_id, tenant))
+    else:
+        params.extend([field_id, tenant])
+        try:
+            cursor.execute(
+                f"UPDATE fields SET {', '.join(updates)} WHERE id = %s AND owner_id = %s RETURNING *",
+                params
+            )
+        except psycopg2.IntegrityError:
+            conn.rollback()
+            cursor.close()
+            raise HTTPException(status_code=409, detail="Field with this name already exists")
+    
+    field = cursor.fetchone()
+    if updates:
+        invalidate(cursor, GEOFENCES, tenant)
+        conn.commit()
+    cursor.close()
+    
+    if not field:
+        raise HTTPException(status_code=404, detail="Field not found")
+    
+    return row_to_camel_case(field)
+
+@app.delete("/api/fields/{field_id}")
+async def delete_field(
+    field_id: str,
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    tenant = tenant_id(current_user)
+    
+    cursor.execute("DELETE FROM fields WHERE id = %s AND owner_id = %s", (field_id, tenant))
+    deleted = cursor.rowcount
+    invalidate(cursor, GEOFENCES, tenant)
+    conn.commit()
+    cursor.close()
+    
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Field not found")
+    
+    return {"success": True}
+
 @app.get("/api/operations")
 async def get_operations(
     current_user = Depends(get_current_user),
     conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
-    cursor.execute(
-        """SELECT o.*, t.manufacturer_name, t.model, t.registration_number, i.name as implement_name, i.brand_name, i.working_width, u.full_name
-           FROM operations o
-           LEFT JOIN tractors t ON o.tractor_id = t.id
-           LEFT JOIN implements i ON o.implement_id = i.id
-           LEFT JOIN users u ON o.operator_id = u.id
-           ORDER BY o.start_time DESC"""
-    )
+    cursor.execute(f"SELECT * FROM operations WHERE {tenant_filter()} ORDER BY start_time DESC", (tenant_id(current_user),))
+    rows = cursor.fetchall()
+    cursor.close()
+    
+    tractors = TRACTORS.get_many(conn, [row["tractor_id"] for row in rows])
+    implements = IMPLEMENTS.get_many(conn, [row["implement_id"] for row in rows])
+    operators = USERS.get_many(conn, [row["operator_id"] for row in rows])
     
     result = []
-    for row in cursor.fetchall():
+    for row in rows:
+        tractor = tractors.get(str(row["tractor_id"]))
+        implement = implements.get(str(row["implement_id"]))
+        operator = operators.get(str(row["operator_id"]))
+        
         op = row_to_camel_case(row)
+        op["manufacturerName"] = tractor["manufacturer_name"] if tractor else None
+        op["model"] = tractor["model"] if tractor else None
+        op["registrationNumber"] = tractor["registration_number"] if tractor else None
+        op["implementName"] = implement["name"] if implement else None
+        op["brandName"] = implement["brand_name"] if implement else None
+        op["workingWidth"] = implement["working_width"] if implement else None
+        op["fullName"] = operator["full_name"] if operator else None
         op["tractor"] = {
             "id": str(row["tractor_id"]),
-            "manufacturerName": row["manufacturer_name"],
-            "model": row["model"],
-            "registrationNumber": row["registration_number"]
+            "manufacturerName": op["manufacturerName"],
+            "model": op["model"],
+            "registrationNumber": op["registrationNumber"]
         } if row["tractor_id"] else None
         op["implement"] = {
             "id": str(row["implement_id"]),
-            "name": row["implement_name"],
-            "brandName": row["brand_name"],
-            "workingWidth": row["working_width"]
+            "name": op["implementName"],
+            "brandName": op["brandName"],
+            "workingWidth": op["workingWidth"]
         } if row["implement_id"] else None
         op["operator"] = {
-            "fullName": row["full_name"]
-        } if row["full_name"] else None
+            "fullName": op["fullName"]
+        } if op["fullName"] else None
         result.append(op)
     
-    cursor.close()
     return result
 
 @app.post("/api/operations")
@@ -479,6 +832,8 @@ async def create_operation(
     current_user = Depends(require_role("owner", "operator")),
     conn = Depends(get_db)
 ):
+    require_tractor(conn, current_user, data.tractorId)
+    require_implement(conn, current_user, data.implementId)
     cursor = get_db_cursor(conn)
     op_id = str(uuid.uuid4())
     telem_id = str(uuid.uuid4())
@@ -500,9 +855,13 @@ async def create_operation(
         cursor.execute(
             """INSERT INTO telemetry (id, operation_id, tractor_id, engine_on, pto_on, is_moving, speed, timestamp)
                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-               ON CONFLICT (operation_id, tractor_id, timestamp) DO NOTHING""",
+               ON CONFLICT (operation_id, tractor_id, timestamp) DO NOTHING
+               RETURNING *, 'active' AS operation_status""",
             (telem_id, op_id, data.tractorId, True, False, False, 0, now)
         )
+        telemetry = cursor.fetchone()
+        if telemetry:
+            process_point(cursor, telemetry)
 
         conn.commit()
     except psycopg2.IntegrityError:
@@ -526,33 +885,219 @@ async def stop_operation(
     now = datetime.now()
     telem_id = str(uuid.uuid4())
     
-    cursor.execute("SELECT tractor_id FROM operations WHERE id = %s", (operation_id,))
-    row = cursor.fetchone()
+    cursor.execute(
+        f"SELECT id FROM operations WHERE id = %s AND {tenant_filter()}",
+        (operation_id, tenant_id(current_user))
+    )
     
-    if not row:
+    if not cursor.fetchone():
         cursor.close()
         raise HTTPException(status_code=404, detail="Operation not found")
     
-    tractor_id = row["tractor_id"]
-    
     cursor.execute(
-        "UPDATE operations SET status = %s, end_time = %s WHERE id = %s",
+        "UPDATE operations SET status = %s, end_time = %s WHERE id = %s AND status = 'active' RETURNING tractor_id",
         ("completed", now, operation_id)
     )
+    row = cursor.fetchone()
+    
+    if not row:
+        conn.rollback()
+        cursor.close()
+        raise HTTPException(status_code=409, detail="Operation is not active")
     
+    tractor_id = row["tractor_id"]
+    
+    PROGRESS.finish(cursor, operation_id)
     cursor.execute(
         """INSERT INTO telemetry (id, operation_id, tractor_id, engine_on, pto_on, is_moving, speed, timestamp)
-           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+           RETURNING *, 'completed' AS operation_status""",
         (telem_id, operation_id, tractor_id, False, False, False, 0, now)
     )
+    process_point(cursor, cursor.fetchone())
+    count_operation(cursor, tractor_id)
     
+    summary = compute_summary(cursor, operation_id)
     conn.commit()
     
     cursor.execute("SELECT * FROM operations WHERE id = %s", (operation_id,))
+    operation = row_to_camel_case(cursor.fetchone())
+    cursor.close()
+    
+    operation["summary"] = row_to_camel_case(summary)
+    return operation
+
+@app.get("/api/operations/{operation_id}/summary")
+async def get_operation_summary(
+    operation_id: str,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        f"""SELECT o.status, s.* FROM operations o
+            LEFT JOIN operation_summaries s ON s.operation_id = o.id
+            WHERE o.id = %s AND {tenant_filter('o')}""",
+        (operation_id, tenant_id(current_user))
+    )
+    row = cursor.fetchone()
+    
+    if not row:
+        cursor.close()
+        raise HTTPException(status_code=404, detail="Operation not found")
+    if row["status"] == "active":
+        cursor.close()
+        raise HTTPException(status_code=409, detail="Operation is still active")
+    
+    summary = row if row["operation_id"] else None
+    if summary is None:
+        # Operations finished before summaries existed are computed on first read.
+        summary = compute_summary(cursor, operation_id)
+        conn.commit()
+    else:
+        summary = dict(summary)
+        del summary["status"]
+    cursor.close()
+    
+    return row_to_camel_case(summary)
+
+@app.get("/api/operations/{operation_id}/progress")
+async def get_operation_progress(
+    operation_id: str,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        f"SELECT id, status, implement_id, start_time, end_time FROM operations WHERE id = %s AND {tenant_filter()}",
+        (operation_id, tenant_id(current_user))
+    )
     operation = cursor.fetchone()
     cursor.close()
     
-    return row_to_camel_case(operation)
+    if not operation:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    
+    row = get_progress(conn, [operation_id]).get(str(operation["id"]))
+    implement = IMPLEMENTS.get(conn, operation["implement_id"])
+    end_time = operation["end_time"] or datetime.now()
+    moving_hours = row["moving_seconds"] / 3600 if row else 0
+    
+    return {
+        "operationId": str(operation["id"]),
+        "status": operation["status"],
+        "elapsedSeconds": (end_time - operation["start_time"]).total_seconds(),
+        "distanceKm": row["distance_km"] if row else 0,
+        "movingSeconds": row["moving_seconds"] if row else 0,
+        "ptoSeconds": row["pto_seconds"] if row else 0,
+        "avgSpeed": row["moving_km"] / moving_hours if moving_hours else 0,
+        "coveredArea": covered_area(row, implement["working_width"] if implement else None) if row else 0,
+        "pointCount": row["point_count"] if row else 0,
+        "lastTimestamp": row["last_timestamp"].isoformat() if row and row["last_timestamp"] else None
+    }
+
+@app.get("/api/operations/{operation_id}/track")
+async def get_operation_track(
+    operation_id: str,
+    zoom: int = 16,
+    encoded: bool = False,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        f"SELECT id, status FROM operations WHERE id = %s AND {tenant_filter()}",
+        (operation_id, tenant_id(current_user))
+    )
+    operation = cursor.fetchone()
+    cursor.close()
+    
+    if not operation:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    
+    zoom = max(MIN_ZOOM, min(MAX_ZOOM, zoom))
+    points, original_count = get_track(conn, operation, zoom)
+    
+    track = {
+        "operationId": str(operation["id"]),
+        "zoom": zoom,
+        "pointCount": len(points),
+        "originalCount": original_count
+    }
+    if encoded:
+        track["polyline"] = encode_polyline(points)
+    else:
+        track["points"] = [{"latitude": lat, "longitude": lon} for lat, lon in points]
+    return track
+
+@app.get("/api/coverage/{scope}/{scope_id}/{z}/{x}/{y}.{fmt}")
+async def get_coverage_tile(
+    scope: str,
+    scope_id: str,
+    z: int,
+    x: int,
+    y: int,
+    fmt: str,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    if scope not in COVERAGE_SCOPES or fmt not in TILE_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown tile type")
+    if not 0 <= z <= TILE_MAX_ZOOM or not 0 <= x < 2 ** z or not 0 <= y < 2 ** z:
+        raise HTTPException(status_code=400, detail="Tile out of range")
+    
+    tenant = tenant_id(current_user)
+    if scope == "operation":
+        cursor = get_db_cursor(conn)
+        cursor.execute(f"SELECT id FROM operations WHERE id = %s AND {tenant_filter()}", (scope_id, tenant))
+        found = cursor.fetchone()
+        cursor.close()
+        if not found:
+            raise HTTPException(status_code=404, detail="Operation not found")
+    elif scope == "field":
+        cursor = get_db_cursor(conn)
+        cursor.execute("SELECT id FROM fields WHERE id = %s AND owner_id = %s", (scope_id, tenant))
+        found = cursor.fetchone()
+        cursor.close()
+        if not found:
+            raise HTTPException(status_code=404, detail="Field not found")
+    
+    try:
+        tile = get_tile(conn, scope, scope_id, tenant, z, x, y, fmt)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid day")
+    
+    return Response(content=tile, media_type=TILE_FORMATS[fmt], headers={"Cache-Control": "private, max-age=60"})
+
+@app.get("/api/operations/{operation_id}/replay")
+async def replay_operation(
+    operation_id: str,
+    speed: float = 1,
+    format: str = "ndjson",
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    if format not in REPLAY_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be ndjson or sse")
+    if speed < 0:
+        raise HTTPException(status_code=400, detail="speed must not be negative")
+    
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        f"SELECT id FROM operations WHERE id = %s AND {tenant_filter()}",
+        (operation_id, tenant_id(current_user))
+    )
+    operation = cursor.fetchone()
+    cursor.close()
+    
+    if not operation:
+        raise HTTPException(status_code=404, detail="Operation not found")
+    
+    return StreamingResponse(
+        replay(str(operation["id"]), speed, format, row_to_camel_case),
+        media_type=REPLAY_FORMATS[format],
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/api/telemetry/{operation_id}")
 async def get_telemetry(
@@ -562,8 +1107,8 @@ async def get_telemetry(
 ):
     cursor = get_db_cursor(conn)
     cursor.execute(
-        "SELECT * FROM telemetry WHERE operation_id = %s ORDER BY timestamp DESC",
-        (operation_id,)
+        f"SELECT * FROM telemetry WHERE operation_id = %s AND {tenant_filter()} ORDER BY timestamp DESC",
+        (operation_id, tenant_id(current_user))
     )
     telemetry = [row_to_camel_case(row) for row in cursor.fetchall()]
     cursor.close()
@@ -575,28 +1120,38 @@ async def create_telemetry(
     current_user = Depends(require_role("owner", "operator")),
     conn = Depends(get_db)
 ):
+    require_tractor(conn, current_user, data.tractorId)
+    require_operation(conn, current_user, data.operationId, data.tractorId)
     cursor = get_db_cursor(conn)
+    
+    field = GEOFENCES.locate(conn, tenant_id(current_user), data.latitude, data.longitude)
     telem_id = str(uuid.uuid4())
     now = datetime.now()
     
     cursor.execute(
-        """INSERT INTO telemetry (id, operation_id, tractor_id, engine_on, latitude, longitude, is_moving, pto_on, speed, implement_data, timestamp)
-           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """INSERT INTO telemetry (id, operation_id, tractor_id, engine_on, latitude, longitude, is_moving, pto_on, speed, implement_data, field_id, timestamp)
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
            ON CONFLICT (operation_id, tractor_id, timestamp) DO NOTHING
-           RETURNING *""",
+           RETURNING *, (SELECT status FROM operations WHERE id = telemetry.operation_id) AS operation_status""",
         (telem_id, data.operationId, data.tractorId, data.engineOn, data.latitude, data.longitude,
          data.isMoving or False, data.ptoOn or False, data.speed or 0,
-         json.dumps(data.implementData) if data.implementData else None, now)
+         json.dumps(data.implementData) if data.implementData else None,
+         field.id if field else None, now)
     )
 
     telemetry = cursor.fetchone()
-    if not telemetry:
+    if telemetry:
+        telemetry = dict(telemetry, field_name=field.name if field else None)
+        process_point(cursor, telemetry)
+        del telemetry["operation_status"], telemetry["field_name"]
+    else:
         cursor.execute("SELECT * FROM telemetry WHERE operation_id = %s AND tractor_id = %s AND timestamp = %s",
                        (data.operationId, data.tractorId, now))
         telemetry = cursor.fetchone()
 
     conn.commit()
     cursor.close()
+    TELEMETRY_POINTS.inc()
 
     return row_to_camel_case(telemetry)
 
@@ -606,29 +1161,34 @@ async def get_fuel_logs(
     conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
-    cursor.execute(
-        """SELECT f.*, t.registration_number, t.manufacturer_name, t.model, u.full_name
-           FROM fuel_logs f
-           LEFT JOIN tractors t ON f.tractor_id = t.id
-           LEFT JOIN users u ON f.operator_id = u.id
-           ORDER BY f.timestamp DESC"""
-    )
+    cursor.execute(f"SELECT * FROM fuel_logs WHERE {tenant_filter()} ORDER BY timestamp DESC", (tenant_id(current_user),))
+    rows = cursor.fetchall()
+    cursor.close()
+    
+    tractors = TRACTORS.get_many(conn, [row["tractor_id"] for row in rows])
+    operators = USERS.get_many(conn, [row["operator_id"] for row in rows])
     
     result = []
-    for row in cursor.fetchall():
+    for row in rows:
+        tractor = tractors.get(str(row["tractor_id"]))
+        operator = operators.get(str(row["operator_id"]))
+        
         log = row_to_camel_case(row)
+        log["registrationNumber"] = tractor["registration_number"] if tractor else None
+        log["manufacturerName"] = tractor["manufacturer_name"] if tractor else None
+        log["model"] = tractor["model"] if tractor else None
+        log["fullName"] = operator["full_name"] if operator else None
         log["tractor"] = {
             "id": str(row["tractor_id"]),
-            "registrationNumber": row["registration_number"],
-            "manufacturerName": row["manufacturer_name"],
-            "model": row["model"]
+            "registrationNumber": log["registrationNumber"],
+            "manufacturerName": log["manufacturerName"],
+            "model": log["model"]
         } if row["tractor_id"] else None
         log["operator"] = {
-            "fullName": row["full_name"]
-        } if row["full_name"] else None
+            "fullName": log["fullName"]
+        } if log["fullName"] else None
         result.append(log)
     
-    cursor.close()
     return result
 
 @app.post("/api/fuel-logs")
@@ -637,6 +1197,9 @@ async def create_fuel_log(
     current_user = Depends(require_role("owner", "operator")),
     conn = Depends(get_db)
 ):
+    require_tractor(conn, current_user, data.tractorId)
+    if data.operationId:
+        require_operation(conn, current_user, data.operationId, data.tractorId)
     cursor = get_db_cursor(conn)
     log_id = str(uuid.uuid4())
     now = datetime.now()
@@ -659,30 +1222,230 @@ async def create_fuel_log(
 
     return row_to_camel_case(fuel_log)
 
-@app.get("/api/alerts")
-async def get_alerts(
+@app.get("/api/utilization")
+async def get_utilization(
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    tractorId: Optional[str] = None,
+    timeline: bool = True,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    end_time = parse_datetime(end, "end") if end else datetime.now()
+    start_time = parse_datetime(start, "start") if start else end_time - timedelta(days=1)
+    if start_time >= end_time:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    if tractorId:
+        require_tractor(conn, current_user, tractorId)
+        tractor_ids = [tractorId]
+    else:
+        cursor = get_db_cursor(conn)
+        cursor.execute("SELECT id FROM tractors WHERE owner_id = %s ORDER BY created_at DESC", (tenant_id(current_user),))
+        tractor_ids = [str(row["id"]) for row in cursor.fetchall()]
+        cursor.close()
+    
+    cursor = get_db_cursor(conn)
+    intervals = get_intervals(cursor, tractor_ids, start_time, end_time)
+    cursor.close()
+    
+    return {
+        "start": start_time.isoformat(),
+        "end": end_time.isoformat(),
+        "tractors": utilization(intervals, tractor_ids, start_time, end_time, timeline)
+    }
+
+@app.get("/api/spatial")
+async def get_spatial(
+    minLat: float,
+    minLon: float,
+    maxLat: float,
+    maxLon: float,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    includePoints: bool = False,
+    limit: int = 1000,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    if not (-90 <= minLat <= maxLat <= 90 and -180 <= minLon <= maxLon <= 180):
+        raise HTTPException(status_code=400, detail="Invalid bounding box")
+    end_time = parse_datetime(end, "end") if end else datetime.now()
+    start_time = parse_datetime(start, "start") if start else end_time - timedelta(days=1)
+    
+    try:
+        params = bbox_params(tenant_id(current_user), minLat, minLon, maxLat, maxLon, start_time, end_time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    cursor = get_db_cursor(conn)
+    rows = tractors_in_bbox(cursor, params)
+    points = points_in_bbox(cursor, params, max(1, min(limit, 10000))) if includePoints else None
+    cursor.close()
+    
+    tractors = TRACTORS.get_many(conn, [row["tractor_id"] for row in rows])
+    result = []
+    for row in rows:
+        tractor = tractors.get(str(row["tractor_id"]))
+        entry = row_to_camel_case(row)
+        entry["registrationNumber"] = tractor["registration_number"] if tractor else None
+        entry["manufacturerName"] = tractor["manufacturer_name"] if tractor else None
+        entry["model"] = tractor["model"] if tractor else None
+        result.append(entry)
+    
+    response = {"start": start_time.isoformat(), "end": end_time.isoformat(), "tractors": result}
+    if points is not None:
+        response["points"] = [row_to_camel_case(point) for point in points]
+    return response
+
+@app.get("/api/tractors/{tractor_id}/maintenance")
+async def get_tractor_maintenance(
+    tractor_id: str,
     current_user = Depends(get_current_user),
     conn = Depends(get_db)
+):
+    require_tractor(conn, current_user, tractor_id)
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT engine_seconds, pto_seconds, distance_km, operation_count, tracked_since, updated_at
+           FROM tractor_counters WHERE tractor_id = %s""",
+        (tractor_id,)
+    )
+    counters = cursor.fetchone()
+    cursor.execute("SELECT * FROM maintenance_schedules WHERE tractor_id = %s ORDER BY name", (tractor_id,))
+    schedules = [row_to_camel_case(row) for row in cursor.fetchall()]
+    cursor.close()
+    
+    return {
+        "tractorId": tractor_id,
+        "engineHours": counters["engine_seconds"] / 3600 if counters else 0,
+        "ptoHours": counters["pto_seconds"] / 3600 if counters else 0,
+        "distanceKm": counters["distance_km"] if counters else 0,
+        "operationCount": counters["operation_count"] if counters else 0,
+        "schedules": schedules
+    }
+
+@app.put("/api/tractors/{tractor_id}/counters")
+async def update_tractor_counters(
+    tractor_id: str,
+    data: CounterReadingInput,
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    require_tractor(conn, current_user, tractor_id)
+    cursor = get_db_cursor(conn)
+    counters = set_counters(cursor, tractor_id, data.engineHours, data.distanceKm)
+    conn.commit()
+    cursor.close()
+    return row_to_camel_case(counters)
+
+@app.post("/api/maintenance/schedules")
+async def create_maintenance_schedule(
+    data: MaintenanceScheduleCreate,
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    if data.intervalEngineHours is None and data.intervalKm is None and data.intervalDays is None:
+        raise HTTPException(status_code=400, detail="At least one service interval is required")
+    
+    if data.tractorId:
+        require_tractor(conn, current_user, data.tractorId)
+        tractor_ids = [data.tractorId]
+    else:
+        cursor = get_db_cursor(conn)
+        cursor.execute("SELECT id FROM tractors WHERE owner_id = %s", (tenant_id(current_user),))
+        tractor_ids = [str(row["id"]) for row in cursor.fetchall()]
+        cursor.close()
+    
+    cursor = get_db_cursor(conn)
+    try:
+        schedules = create_schedules(
+            cursor, tractor_ids, data.name, data.intervalEngineHours, data.intervalKm, data.intervalDays
+        )
+        conn.commit()
+    except psycopg2.IntegrityError:
+        conn.rollback()
+        cursor.close()
+        raise HTTPException(status_code=409, detail="A schedule with this name already exists for the tractor")
+    cursor.close()
+    
+    return [row_to_camel_case(row) for row in schedules]
+
+@app.post("/api/maintenance/schedules/{schedule_id}/service")
+async def record_maintenance_service(
+    schedule_id: str,
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    schedule = record_service(cursor, schedule_id, tenant_id(current_user))
+    conn.commit()
+    cursor.close()
+    
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    return row_to_camel_case(schedule)
+
+@app.delete("/api/maintenance/schedules/{schedule_id}")
+async def delete_maintenance_schedule(
+    schedule_id: str,
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
 ):
     cursor = get_db_cursor(conn)
     cursor.execute(
-        """SELECT a.*, t.manufacturer_name, t.model
-           FROM alerts a
-           LEFT JOIN tractors t ON a.tractor_id = t.id
-           ORDER BY a.timestamp DESC"""
+        f"DELETE FROM maintenance_schedules WHERE id = %s AND {tenant_filter()}",
+        (schedule_id, tenant_id(current_user))
     )
+    deleted = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    
+    if deleted == 0:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    
+    return {"success": True}
+
+@app.get("/api/maintenance/due")
+async def get_maintenance_due(
+    withinHours: float = 0,
+    withinKm: float = 0,
+    withinDays: float = 0,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    due = due_schedules(cursor, tenant_id(current_user), withinHours, withinKm, withinDays)
+    cursor.close()
+    return due
+
+@app.get("/api/alerts")
+async def get_alerts(
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    cursor = get_db_cursor(conn)
+    cursor.execute(f"SELECT * FROM alerts WHERE {tenant_filter()} ORDER BY timestamp DESC", (tenant_id(current_user),))
+    rows = cursor.fetchall()
+    cursor.close()
+    
+    tractors = TRACTORS.get_many(conn, [row["tractor_id"] for row in rows])
     
     result = []
-    for row in cursor.fetchall():
+    for row in rows:
+        tractor = tractors.get(str(row["tractor_id"]))
+        
         alert = row_to_camel_case(row)
+        alert["manufacturerName"] = tractor["manufacturer_name"] if tractor else None
+        alert["model"] = tractor["model"] if tractor else None
         alert["tractor"] = {
             "id": str(row["tractor_id"]),
-            "manufacturerName": row["manufacturer_name"],
-            "model": row["model"]
+            "manufacturerName": alert["manufacturerName"],
+            "model": alert["model"]
         } if row["tractor_id"] else None
         result.append(alert)
     
-    cursor.close()
     return result
 
 @app.post("/api/alerts")
@@ -691,24 +1454,13 @@ async def create_alert(
     current_user = Depends(require_role("owner", "operator")),
     conn = Depends(get_db)
 ):
+    require_tractor(conn, current_user, data.tractorId)
+    if data.operationId:
+        require_operation(conn, current_user, data.operationId, data.tractorId)
     cursor = get_db_cursor(conn)
-    alert_id = str(uuid.uuid4())
     now = datetime.now()
     
-    cursor.execute(
-        """INSERT INTO alerts (id, tractor_id, operation_id, alert_type, message, timestamp)
-           VALUES (%s, %s, %s, %s, %s, %s)
-           ON CONFLICT (tractor_id, operation_id, alert_type, timestamp) DO NOTHING
-           RETURNING *""",
-        (alert_id, data.tractorId, data.operationId, data.alertType, data.message, now)
-    )
-
-    alert = cursor.fetchone()
-    if not alert:
-        cursor.execute("SELECT * FROM alerts WHERE tractor_id = %s AND operation_id = %s AND alert_type = %s AND timestamp = %s",
-                       (data.tractorId, data.operationId, data.alertType, now))
-        alert = cursor.fetchone()
-
+    alert = insert_alert(cursor, data.tractorId, data.operationId, data.alertType, data.message, now)
     conn.commit()
     cursor.close()
 
@@ -722,18 +1474,134 @@ async def resolve_alert(
 ):
     cursor = get_db_cursor(conn)
     
-    cursor.execute("UPDATE alerts SET is_resolved = TRUE WHERE id = %s", (alert_id,))
+    cursor.execute(
+        f"UPDATE alerts SET is_resolved = TRUE WHERE id = %s AND {tenant_filter()} RETURNING *",
+        (alert_id, tenant_id(current_user))
+    )
+    alert = cursor.fetchone()
     conn.commit()
+    cursor.close()
     
-    if cursor.rowcount == 0:
-        cursor.close()
+    if not alert:
         raise HTTPException(status_code=404, detail="Alert not found")
     
-    cursor.execute("SELECT * FROM alerts WHERE id = %s", (alert_id,))
-    alert = cursor.fetchone()
+    return row_to_camel_case(alert)
+
+@app.post("/api/alerts/resolve")
+async def resolve_alerts(
+    data: AlertResolveInput,
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    conditions = ["is_resolved = FALSE", tenant_filter()]
+    params = [tenant_id(current_user)]
+    
+    if data.ids is not None:
+        conditions.append("id = ANY(%s::uuid[])")
+        params.append(data.ids)
+    if data.tractorId is not None:
+        conditions.append("tractor_id = %s")
+        params.append(data.tractorId)
+    if data.alertType is not None:
+        conditions.append("alert_type = %s")
+        params.append(data.alertType)
+    if data.before is not None:
+        conditions.append("timestamp < %s")
+        params.append(data.before)
+    
+    if len(params) == 1:
+        raise HTTPException(status_code=400, detail="Provide ids or at least one filter")
+    
+    cursor = get_db_cursor(conn)
+    try:
+        cursor.execute(
+            f"UPDATE alerts SET is_resolved = TRUE WHERE {' AND '.join(conditions)} RETURNING id",
+            params
+        )
+    except psycopg2.DataError:
+        conn.rollback()
+        cursor.close()
+        raise HTTPException(status_code=400, detail="Invalid alert id")
+    ids = [str(row["id"]) for row in cursor.fetchall()]
+    conn.commit()
     cursor.close()
     
-    return row_to_camel_case(alert)
+    return {"resolved": len(ids), "ids": ids}
+
+@app.get("/api/export/{dataset}.{fmt}")
+async def export_dataset(
+    dataset: str,
+    fmt: str,
+    start: str,
+    end: str,
+    tractorId: Optional[list[str]] = Query(None),
+    current_user = Depends(require_role("owner")),
+    conn = Depends(get_db)
+):
+    if dataset not in EXPORT_DATASETS or fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    
+    tenant = tenant_id(current_user)
+    if tractorId and owned_ids(TRACTORS, conn, tenant, tractorId) != set(tractorId):
+        raise HTTPException(status_code=404, detail="Tractor not found")
+    
+    params = {"owner_id": tenant, "start": parse_datetime(start, "start"), "end": parse_datetime(end, "end")}
+    return StreamingResponse(
+        stream_export(EXPORT_DATASETS[dataset], fmt, params, tractorId),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{fmt}"'}
+    )
+
+@app.post("/api/bulk")
+async def bulk_upload(
+    data: BulkUploadInput,
+    current_user = Depends(require_role("owner", "operator")),
+    conn = Depends(get_db)
+):
+    ok, results = apply_batch(conn, current_user["id"], tenant_id(current_user), data.items, atomic=data.atomic)
+    return {"ok": ok, "results": results}
+
+@app.get("/api/sync")
+async def sync_changes(
+    since: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    conn = Depends(get_db)
+):
+    if since is not None and not since.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    
+    # One snapshot for every table. Transactions older than its xmin have all
+    # finished, so the next sync from that token cannot miss a late commit.
+    conn.rollback()
+    cursor = get_db_cursor(conn)
+    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY")
+    cursor.execute("SELECT pg_snapshot_xmin(pg_current_snapshot())::text AS token")
+    token = cursor.fetchone()["token"]
+    tenant = tenant_id(current_user)
+    
+    result = {"token": token, "full": since is None}
+    for table, key in SYNC_ENTITIES:
+        scope = "owner_id = %s" if table in ("tractors", "implements") else tenant_filter()
+        if since is None:
+            cursor.execute(f"SELECT * FROM {table} WHERE {scope}", (tenant,))
+        else:
+            cursor.execute(f"SELECT * FROM {table} WHERE {scope} AND sync_xid >= %s::xid8", (tenant, since))
+        result[key] = [row_to_camel_case(row) for row in cursor.fetchall()]
+    
+    result["deleted"] = {key: [] for _, key in SYNC_ENTITIES}
+    if since is not None:
+        entity_keys = dict(SYNC_ENTITIES)
+        cursor.execute(
+            "SELECT entity, entity_id FROM sync_tombstones WHERE owner_id = %s AND sync_xid >= %s::xid8",
+            (tenant, since)
+        )
+        for row in cursor.fetchall():
+            if row["entity"] in entity_keys:
+                result["deleted"][entity_keys[row["entity"]]].append(str(row["entity_id"]))
+    
+    conn.rollback()
+    cursor.close()
+    return result
 
 @app.get("/api/reports")
 async def get_reports(
@@ -747,46 +1615,50 @@ async def get_reports(
     conn = Depends(get_db)
 ):
     now = datetime.now()
-    
-    if filterType == "day" and date:
-        start = datetime.fromisoformat(date).replace(hour=0, minute=0, second=0, microsecond=0)
-        end = start.replace(hour=23, minute=59, second=59, microsecond=999999)
-    elif filterType == "date-range" and startDate and endDate:
-        start = datetime.fromisoformat(startDate).replace(hour=0, minute=0, second=0, microsecond=0)
-        end = datetime.fromisoformat(endDate).replace(hour=23, minute=59, second=59, microsecond=999999)
-    elif filterType == "datetime-range" and startDate and endDate and startTime and endTime:
-        start = datetime.fromisoformat(f"{startDate}T{startTime}")
-        end = datetime.fromisoformat(f"{endDate}T{endTime}")
-    else:
-        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    try:
+        start, end = report_window(filterType, date, startDate, endDate, startTime, endTime)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
     
     cursor = get_db_cursor(conn)
+    tenant = tenant_id(current_user)
     
     cursor.execute(
-        """SELECT o.*, t.manufacturer_name, t.model, i.working_width, u.full_name
-           FROM operations o
-           JOIN tractors t ON o.tractor_id = t.id
-           JOIN implements i ON o.implement_id = i.id
-           JOIN users u ON o.operator_id = u.id
-           WHERE o.start_time >= %s AND o.start_time <= %s
-           ORDER BY o.start_time DESC""",
-        (start, end)
+        f"""SELECT * FROM operations WHERE {tenant_filter()} AND start_time >= %s AND start_time <= %s
+            ORDER BY start_time DESC""",
+        (tenant, start, end)
     )
     
     operations = cursor.fetchall()
+    summaries = get_summaries(cursor, [op["id"] for op in operations])
+    progress = get_progress(conn, [op["id"] for op in operations if op["status"] == "active"])
+    tractors = TRACTORS.get_many(conn, [op["tractor_id"] for op in operations])
+    implements = IMPLEMENTS.get_many(conn, [op["implement_id"] for op in operations])
+    operators = USERS.get_many(conn, [op["operator_id"] for op in operations])
     total_hours = 0
     total_area = 0
     operation_details = []
     
     for op in operations:
-        start_time = op["start_time"]
-        end_time = op["end_time"] or now
-        duration_hours = (end_time - start_time).total_seconds() / 3600
-        
-        working_width = op["working_width"] or 2
-        avg_speed = 5
-        area_covered = (working_width * avg_speed * duration_hours) / 10
+        tractor = tractors.get(str(op["tractor_id"]))
+        implement = implements.get(str(op["implement_id"]))
+        operator = operators.get(str(op["operator_id"]))
+        summary = summaries.get(str(op["id"]))
+        if summary:
+            duration_hours = summary["duration_seconds"] / 3600
+            area_covered = summary["area_hectares"]
+        else:
+            start_time = op["start_time"]
+            end_time = op["end_time"] or now
+            duration_hours = (end_time - start_time).total_seconds() / 3600
+            
+            working_width = (implement["working_width"] if implement else None) or 2
+            live = progress.get(str(op["id"]))
+            if live:
+                area_covered = covered_area(live, working_width)
+            else:
+                avg_speed = 5
+                area_covered = (working_width * avg_speed * duration_hours) / 10
         
         total_hours += duration_hours
         total_area += area_covered
@@ -794,34 +1666,40 @@ async def get_reports(
         operation_details.append({
             "id": str(op["id"]),
             "operationType": op["operation_type"],
-            "tractorName": f"{op['manufacturer_name']} {op['model']}",
-            "operatorName": op["full_name"],
+            "tractorName": f"{tractor['manufacturer_name']} {tractor['model']}" if tractor else "Unknown",
+            "operatorName": operator["full_name"] if operator else "Unknown",
             "startTime": op["start_time"].isoformat() if op["start_time"] else None,
             "endTime": op["end_time"].isoformat() if op["end_time"] else None,
             "duration": duration_hours,
-            "areaCovered": area_covered
+            "areaCovered": area_covered,
+            "distanceKm": summary["distance_km"] if summary else None,
+            "fuelUsed": summary["fuel_liters"] if summary else None
         })
     
     cursor.execute(
-        "SELECT f.*, t.registration_number FROM fuel_logs f LEFT JOIN tractors t ON f.tractor_id = t.id WHERE f.timestamp >= %s AND f.timestamp <= %s ORDER BY f.timestamp DESC",
-        (start, end)
+        f"""SELECT * FROM fuel_logs WHERE {tenant_filter()} AND timestamp >= %s AND timestamp <= %s
+            ORDER BY timestamp DESC""",
+        (tenant, start, end)
     )
     
     fuel_logs = cursor.fetchall()
+    fuel_tractors = TRACTORS.get_many(conn, [log["tractor_id"] for log in fuel_logs])
     fuel_total = sum(log["quantity"] for log in fuel_logs)
     fuel_log_details = []
     
     for log in fuel_logs:
+        tractor = fuel_tractors.get(str(log["tractor_id"]))
         fuel_log_details.append({
             "id": str(log["id"]),
             "quantity": log["quantity"],
-            "tractorName": log["registration_number"] or "Unknown",
+            "tractorName": tractor["registration_number"] if tractor else "Unknown",
             "timestamp": log["timestamp"].isoformat() if log["timestamp"] else None
         })
     
     cursor.execute(
-        "SELECT * FROM alerts WHERE timestamp >= %s AND timestamp <= %s ORDER BY timestamp DESC",
-        (start, end)
+        f"""SELECT * FROM alerts WHERE {tenant_filter()} AND timestamp >= %s AND timestamp <= %s
+            ORDER BY timestamp DESC""",
+        (tenant, start, end)
     )
     
     alerts = cursor.fetchall()
@@ -850,6 +1728,36 @@ async def get_reports(
         "alertLogs": alert_logs
     }
 
+@app.get("/api/reports/{export}.csv")
+async def export_report_csv(
+    export: str,
+    filterType: Optional[str] = None,
+    date: Optional[str] = None,
+    startDate: Optional[str] = None,
+    endDate: Optional[str] = None,
+    startTime: Optional[str] = None,
+    endTime: Optional[str] = None,
+    gzip: bool = False,
+    current_user = Depends(get_current_user)
+):
+    if export not in CSV_EXPORTS:
+        raise HTTPException(status_code=404, detail="Unknown export")
+    
+    try:
+        start, end = report_window(filterType, date, startDate, endDate, startTime, endTime)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date")
+    params = {"owner_id": tenant_id(current_user), "start": start, "end": end}
+    headers = {"Content-Disposition": f'attachment; filename="{export}-{start.date()}-{end.date()}.csv"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    
+    return StreamingResponse(
+        stream_csv(CSV_EXPORTS[export], params, compress=gzip),
+        media_type="text/csv",
+        headers=headers
+    )
+
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", "8000"))
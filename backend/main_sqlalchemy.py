@@ -28,6 +28,7 @@ from auth import (
     get_password_hash, verify_password, create_access_token,
     get_current_user, require_role
 )
+from querytrace import QueryTraceMiddleware, instrument_engine
 
 app = FastAPI(title="Fleet Management API", docs_url="/api/docs", redoc_url="/api/redoc")
 
@@ -38,6 +39,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(QueryTraceMiddleware)
+instrument_engine(engine)
 
 
 def model_to_dict(obj, exclude=None):
@@ -0,0 +1,208 @@
+"""
+Cumulative engine-hour and distance counters, and service schedules.
+
+Every ingested point advances tractor_counters by the segment since the
+tractor's previous point: engine (and PTO) time if the engine was on, held
+as in summaries.py, and the haversine distance between the two positions.
+Segments longer than UTILIZATION_GAP_MINUTES add no time, matching the
+utilization runs. Stopping an operation bumps operation_count. Counters are
+never recomputed from telemetry. Setting a counter to an hour-meter or
+odometer reading moves the difference into its baseline, so usage rates
+(and predicted due dates) are based on tracked use only.
+
+A maintenance schedule stores the counter values and date at which its next
+service falls due (generated columns), so due checks compare stored columns.
+After the counters move, the tractor's not-yet-alerted schedules are checked
+and a maintenance_due alert is raised once per service interval.
+"""
+import uuid
+from datetime import datetime, timedelta
+
+from alerting import insert_alert
+from geo import haversine_km
+from ingest import add_handler
+from utilization import UTILIZATION_GAP_MINUTES
+
+
+def update_counters(cursor, point, gap=timedelta(minutes=UTILIZATION_GAP_MINUTES)):
+    tractor_id = point["tractor_id"]
+    timestamp = point["timestamp"]
+    cursor.execute("SELECT * FROM tractor_counters WHERE tractor_id = %s FOR UPDATE", (tractor_id,))
+    counters = cursor.fetchone()
+    if counters and counters["last_timestamp"] is not None and timestamp <= counters["last_timestamp"]:
+        return
+
+    engine = pto = km = 0.0
+    if counters and counters["last_timestamp"] is not None:
+        seconds = (timestamp - counters["last_timestamp"]).total_seconds()
+        if timestamp - counters["last_timestamp"] <= gap:
+            engine = seconds if counters["last_engine_on"] else 0.0
+            pto = seconds if counters["last_pto_on"] else 0.0
+        if counters["last_latitude"] is not None and point["latitude"] is not None:
+            km = haversine_km(counters["last_latitude"], counters["last_longitude"], point["latitude"], point["longitude"])
+
+    latitude, longitude = point["latitude"], point["longitude"]
+    if latitude is None and counters:
+        latitude, longitude = counters["last_latitude"], counters["last_longitude"]
+    cursor.execute(
+        """INSERT INTO tractor_counters (tractor_id, engine_seconds, pto_seconds, distance_km, last_timestamp,
+                                         last_latitude, last_longitude, last_engine_on, last_pto_on, tracked_since)
+           VALUES (%(tractor_id)s, 0, 0, 0, %(timestamp)s, %(latitude)s, %(longitude)s, %(engine_on)s, %(pto_on)s, %(timestamp)s)
+           ON CONFLICT (tractor_id) DO UPDATE SET
+               engine_seconds = tractor_counters.engine_seconds + %(engine)s,
+               pto_seconds = tractor_counters.pto_seconds + %(pto)s,
+               distance_km = tractor_counters.distance_km + %(km)s,
+               last_timestamp = EXCLUDED.last_timestamp,
+               last_latitude = EXCLUDED.last_latitude,
+               last_longitude = EXCLUDED.last_longitude,
+               last_engine_on = EXCLUDED.last_engine_on,
+               last_pto_on = EXCLUDED.last_pto_on,
+               updated_at = CURRENT_TIMESTAMP
+           RETURNING engine_seconds, distance_km""",
+        {
+            "tractor_id": tractor_id, "timestamp": timestamp, "latitude": latitude, "longitude": longitude,
+            "engine_on": point["engine_on"], "pto_on": point["pto_on"], "engine": engine, "pto": pto, "km": km,
+        }
+    )
+    totals = cursor.fetchone()
+
+    cursor.execute(
+        """UPDATE maintenance_schedules SET alerted = TRUE
+           WHERE tractor_id = %s AND NOT alerted
+             AND (due_engine_seconds <= %s OR due_km <= %s OR due_at <= %s)
+           RETURNING name""",
+        (tractor_id, totals["engine_seconds"], totals["distance_km"], timestamp)
+    )
+    for schedule in cursor.fetchall():
+        insert_alert(
+            cursor, tractor_id, point["operation_id"], "maintenance_due",
+            f"{schedule['name']} service is due", timestamp
+        )
+
+
+def count_operation(cursor, tractor_id):
+    cursor.execute(
+        """INSERT INTO tractor_counters (tractor_id, operation_count) VALUES (%s, 1)
+           ON CONFLICT (tractor_id) DO UPDATE SET operation_count = tractor_counters.operation_count + 1,
+               updated_at = CURRENT_TIMESTAMP""",
+        (tractor_id,)
+    )
+
+
+def set_counters(cursor, tractor_id, engine_hours=None, distance_km=None):
+    """Align the counters with the tractor's hour meter / odometer."""
+    cursor.execute(
+        """INSERT INTO tractor_counters (tractor_id, engine_seconds, distance_km, baseline_engine_seconds, baseline_km)
+           VALUES (%(tractor_id)s, COALESCE(%(engine)s, 0), COALESCE(%(km)s, 0), COALESCE(%(engine)s, 0), COALESCE(%(km)s, 0))
+           ON CONFLICT (tractor_id) DO UPDATE SET
+               baseline_engine_seconds = tractor_counters.baseline_engine_seconds
+                   + COALESCE(%(engine)s - tractor_counters.engine_seconds, 0),
+               baseline_km = tractor_counters.baseline_km + COALESCE(%(km)s - tractor_counters.distance_km, 0),
+               engine_seconds = COALESCE(%(engine)s, tractor_counters.engine_seconds),
+               distance_km = COALESCE(%(km)s, tractor_counters.distance_km),
+               updated_at = CURRENT_TIMESTAMP
+           RETURNING *""",
+        {"tractor_id": tractor_id, "engine": engine_hours * 3600 if engine_hours is not None else None, "km": distance_km}
+    )
+    return cursor.fetchone()
+
+
+def create_schedules(cursor, tractor_ids, name, interval_engine_hours, interval_km, interval_days):
+    """Add a schedule to each tractor, starting from its current counters."""
+    cursor.execute(
+        """INSERT INTO maintenance_schedules (id, tractor_id, name, interval_engine_hours, interval_km, interval_days,
+                                              last_service_engine_seconds, last_service_km)
+           SELECT (%s::uuid[])[t.ord], t.id, %s, %s, %s, %s, COALESCE(c.engine_seconds, 0), COALESCE(c.distance_km, 0)
+           FROM unnest(%s::uuid[]) WITH ORDINALITY AS t(id, ord)
+           LEFT JOIN tractor_counters c ON c.tractor_id = t.id
+           RETURNING *""",
+        ([str(uuid.uuid4()) for _ in tractor_ids], name, interval_engine_hours, interval_km, interval_days,
+         [str(i) for i in tractor_ids])
+    )
+    return cursor.fetchall()
+
+
+def record_service(cursor, schedule_id, tenant):
+    """Reset a schedule's baseline to the tractor's current counters."""
+    cursor.execute(
+        """UPDATE maintenance_schedules s
+           SET last_service_engine_seconds = COALESCE(c.engine_seconds, 0),
+               last_service_km = COALESCE(c.distance_km, 0),
+               last_service_at = CURRENT_TIMESTAMP,
+               alerted = FALSE
+           FROM tractors t
+           LEFT JOIN tractor_counters c ON c.tractor_id = t.id
+           WHERE s.id = %s AND t.id = s.tractor_id AND t.owner_id = %s
+           RETURNING s.*""",
+        (schedule_id, tenant)
+    )
+    return cursor.fetchone()
+
+
+DUE_SQL = """
+SELECT s.*, t.registration_number, t.manufacturer_name, t.model,
+       COALESCE(c.engine_seconds, 0) AS engine_seconds, COALESCE(c.distance_km, 0) AS distance_km,
+       COALESCE(c.baseline_engine_seconds, 0) AS baseline_engine_seconds, COALESCE(c.baseline_km, 0) AS baseline_km,
+       COALESCE(c.tracked_since, s.created_at) AS tracked_since
+FROM tractors t
+JOIN maintenance_schedules s ON s.tractor_id = t.id
+LEFT JOIN tractor_counters c ON c.tractor_id = t.id
+WHERE t.owner_id = %(tenant)s
+  AND (s.due_engine_seconds <= COALESCE(c.engine_seconds, 0) + %(seconds)s
+       OR s.due_km <= COALESCE(c.distance_km, 0) + %(km)s
+       OR s.due_at <= %(date)s)
+ORDER BY t.registration_number, s.name
+"""
+
+
+def _predict(now, remaining, used, since):
+    """Date a counter reaches its threshold at its average tracked rate so far."""
+    elapsed = (now - since).total_seconds()
+    if remaining <= 0:
+        return now
+    if used <= 0 or elapsed <= 0:
+        return None
+    return now + timedelta(seconds=remaining * elapsed / used)
+
+
+def due_schedules(cursor, tenant, within_hours=0, within_km=0, within_days=0):
+    """Schedules due now or within the given margins, across the tenant's fleet."""
+    now = datetime.now()
+    cursor.execute(DUE_SQL, {
+        "tenant": tenant,
+        "seconds": within_hours * 3600,
+        "km": within_km,
+        "date": now + timedelta(days=within_days),
+    })
+    result = []
+    for row in cursor.fetchall():
+        remaining_seconds = row["due_engine_seconds"] - row["engine_seconds"] if row["due_engine_seconds"] is not None else None
+        remaining_km = row["due_km"] - row["distance_km"] if row["due_km"] is not None else None
+        predictions = [row["due_at"]] if row["due_at"] is not None else []
+        if remaining_seconds is not None:
+            predictions.append(_predict(
+                now, remaining_seconds, row["engine_seconds"] - row["baseline_engine_seconds"], row["tracked_since"]
+            ))
+        if remaining_km is not None:
+            predictions.append(_predict(now, remaining_km, row["distance_km"] - row["baseline_km"], row["tracked_since"]))
+        predictions = [p for p in predictions if p is not None]
+        result.append({
+            "id": str(row["id"]),
+            "tractorId": str(row["tractor_id"]),
+            "tractorName": f"{row['manufacturer_name']} {row['model']}",
+            "registrationNumber": row["registration_number"],
+            "name": row["name"],
+            "engineHours": row["engine_seconds"] / 3600,
+            "distanceKm": row["distance_km"],
+            "remainingEngineHours": remaining_seconds / 3600 if remaining_seconds is not None else None,
+            "remainingKm": remaining_km,
+            "dueAt": row["due_at"].isoformat() if row["due_at"] else None,
+            "predictedDueAt": min(predictions).isoformat() if predictions else None,
+            "overdue": (remaining_seconds is not None and remaining_seconds <= 0)
+                       or (remaining_km is not None and remaining_km <= 0)
+                       or (row["due_at"] is not None and row["due_at"] <= now),
+        })
+    return result
+
+
+add_handler(update_counters)
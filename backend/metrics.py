@@ -0,0 +1,190 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+Each worker process keeps its own counters; Prometheus aggregates across
+workers at query time. Recording is a dict lookup plus a bisect under a lock,
+cheap enough to leave enabled in production.
+"""
+import time
+import bisect
+import threading
+import contextvars
+
+from database import add_query_observer, add_connect_observer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.extend(self._render_sample(label_values, value))
+        return lines
+
+    def _render_sample(self, label_values, value):
+        return [f"{self.name}{_format_labels(self.label_names, label_values)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_sample(self, label_values, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            labels = _format_labels(self.label_names, label_values, f'le="{le}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.label_names, label_values)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests currently being served.")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request", "Database queries issued per HTTP request.", ("route",), COUNT_BUCKETS
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request", "Time spent in database queries per HTTP request.", ("route",)
+)
+DB_QUERY_LATENCY = Histogram("db_query_duration_seconds", "Latency of individual database queries.")
+DB_CONNECT_WAIT = Histogram("db_connection_wait_seconds", "Time spent obtaining a database connection.")
+TELEMETRY_POINTS = Counter("telemetry_points_ingested_total", "Telemetry points accepted for ingestion.")
+
+ALL_METRICS = [
+    REQUEST_LATENCY, REQUESTS_IN_FLIGHT, DB_QUERIES_PER_REQUEST, DB_TIME_PER_REQUEST,
+    DB_QUERY_LATENCY, DB_CONNECT_WAIT, TELEMETRY_POINTS,
+]
+
+# [query count, query seconds] for the request being served; the list is
+# shared with the threadpool so dependencies running there add to it too.
+_request_db_stats = contextvars.ContextVar("request_db_stats", default=None)
+
+
+def _observe_query(query, params, seconds, rowcount):
+    DB_QUERY_LATENCY.observe(seconds)
+    stats = _request_db_stats.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += seconds
+
+
+add_query_observer(_observe_query)
+add_connect_observer(DB_CONNECT_WAIT.observe)
+
+
+def render_metrics():
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def route_template(app, scope):
+    """Return the path template of the matched route, e.g. /api/tractors/{tractor_id}."""
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    endpoint = scope.get("endpoint")
+    if endpoint is None:
+        return "unmatched"
+    templates = getattr(app, "_route_templates", None)
+    if templates is None:
+        templates = {r.endpoint: r.path for r in app.routes if hasattr(r, "endpoint")}
+        app._route_templates = templates
+    return templates.get(endpoint, "unmatched")
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_code[0] = message["status"]
+            await send(message)
+
+        stats = [0, 0.0]
+        token = _request_db_stats.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_FLIGHT.dec()
+            _request_db_stats.reset(token)
+            route = route_template(scope["app"], scope) if "app" in scope else "unmatched"
+            REQUEST_LATENCY.observe(elapsed, scope["method"], route, str(status_code[0]))
+            DB_QUERIES_PER_REQUEST.observe(stats[0], route)
+            DB_TIME_PER_REQUEST.observe(stats[1], route)
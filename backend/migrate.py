@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+
+Migrations are plain SQL files in ``migrations/`` named ``NNNN_description.sql``
+and applied in version order. Applied versions are recorded in the
+``schema_migrations`` table, so checking that the schema is current costs a
+single SELECT on startup.
+
+A file whose first line is ``-- migrate:no-transaction`` runs outside a
+transaction, one statement at a time. Use it for ``CREATE INDEX CONCURRENTLY``
+so large tables are never locked against writes while an index builds.
+
+Migrations never rescan large tables. Tables derived from telemetry are
+filled by ``backfill``, which calls the rebuild functions the migrations
+define one tractor per transaction, outside the startup path; run it once
+after upgrading a database that already holds telemetry.
+
+Usage:
+    python migrate.py            # apply pending migrations
+    python migrate.py status     # list applied and pending migrations
+    python migrate.py backfill   # rebuild derived per-tractor tables
+"""
+import os
+import re
+import sys
+
+import psycopg2
+import psycopg2.errors
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_db_config
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+NO_TRANSACTION_MARKER = "-- migrate:no-transaction"
+MIGRATION_FILE_PATTERN = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+
+# Rebuild functions run by backfill, in order, per tractor.
+BACKFILL_FUNCTIONS = ["rebuild_state_intervals", "rebuild_tractor_counters"]
+
+# Arbitrary key for pg_advisory_lock so that workers booting together apply
+# migrations once instead of racing each other.
+MIGRATION_LOCK_KEY = 802610026
+
+
+def load_migrations():
+    migrations = []
+    for filename in os.listdir(MIGRATIONS_DIR):
+        match = MIGRATION_FILE_PATTERN.match(filename)
+        if not match:
+            continue
+        migrations.append({
+            "version": int(match.group(1)),
+            "name": match.group(2),
+            "path": os.path.join(MIGRATIONS_DIR, filename),
+        })
+    migrations.sort(key=lambda m: m["version"])
+
+    versions = [m["version"] for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise ValueError("Duplicate migration version in " + MIGRATIONS_DIR)
+    return migrations
+
+
+def applied_versions(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT version FROM schema_migrations")
+        versions = {row[0] for row in cursor.fetchall()}
+    except psycopg2.errors.UndefinedTable:
+        conn.rollback()
+        versions = set()
+    finally:
+        cursor.close()
+    conn.commit()
+    return versions
+
+
+def pending_migrations(conn, migrations=None):
+    migrations = migrations if migrations is not None else load_migrations()
+    applied = applied_versions(conn)
+    return [m for m in migrations if m["version"] not in applied]
+
+
+def split_statements(sql):
+    """Split a no-transaction migration into statements.
+
+    Statements must end with a semicolon at the end of a line; this is only
+    used for plain DDL such as CREATE INDEX CONCURRENTLY, never for function
+    bodies.
+    """
+    statements = []
+    current = []
+    for line in sql.splitlines():
+        if line.strip().startswith("--") and not current:
+            continue
+        current.append(line)
+        if line.rstrip().endswith(";"):
+            statement = "\n".join(current).strip()
+            if statement.rstrip(";").strip():
+                statements.append(statement)
+            current = []
+    if "\n".join(current).strip():
+        statements.append("\n".join(current).strip())
+    return statements
+
+
+def _ensure_migrations_table(conn):
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+    """)
+    conn.commit()
+    cursor.close()
+
+
+INDEX_NAME_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?\"?(\w+)",
+    re.IGNORECASE
+)
+
+
+def _drop_invalid_indexes(cursor, statements):
+    # An interrupted CREATE INDEX CONCURRENTLY leaves an INVALID index behind,
+    # which IF NOT EXISTS would then silently skip on the retry. Only indexes
+    # this migration builds are considered, and never one whose build is
+    # still running in another session (it is invalid until it finishes).
+    names = [m.group(1) for m in map(INDEX_NAME_PATTERN.search, statements) if m]
+    if not names:
+        return
+    cursor.execute(
+        """SELECT c.relname
+           FROM pg_index i
+           JOIN pg_class c ON c.oid = i.indexrelid
+           JOIN pg_namespace n ON n.oid = c.relnamespace
+           WHERE NOT i.indisvalid AND n.nspname = current_schema() AND c.relname = ANY(%s)
+             AND NOT EXISTS (SELECT 1 FROM pg_stat_progress_create_index p WHERE p.index_relid = i.indexrelid)""",
+        (names,)
+    )
+    for (index_name,) in cursor.fetchall():
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{index_name}"')
+
+
+def apply_migration(conn, migration):
+    with open(migration["path"]) as f:
+        sql = f.read()
+
+    cursor = conn.cursor()
+    if sql.lstrip().startswith(NO_TRANSACTION_MARKER):
+        conn.autocommit = True
+        try:
+            statements = split_statements(sql)
+            _drop_invalid_indexes(cursor, statements)
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration["version"], migration["name"])
+            )
+        finally:
+            conn.autocommit = False
+    else:
+        try:
+            cursor.execute(sql)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name) VALUES (%s, %s)",
+                (migration["version"], migration["name"])
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    cursor.close()
+
+
+def migrate(conn=None):
+    """Apply pending migrations and return the list of versions applied."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = psycopg2.connect(**get_db_config())
+
+    try:
+        migrations = load_migrations()
+        if not pending_migrations(conn, migrations):
+            return []
+
+        _ensure_migrations_table(conn)
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        conn.commit()
+        try:
+            applied = []
+            # Another worker may have finished while we waited for the lock.
+            for migration in pending_migrations(conn, migrations):
+                print(f"Applying migration {migration['version']:04d}_{migration['name']}")
+                apply_migration(conn, migration)
+                applied.append(migration["version"])
+            return applied
+        finally:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+            conn.commit()
+            cursor.close()
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def backfill(conn=None):
+    """Run BACKFILL_FUNCTIONS for every tractor and return the number of tractors."""
+    owns_conn = conn is None
+    if owns_conn:
+        conn = psycopg2.connect(**get_db_config())
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT id FROM tractors ORDER BY id")
+        tractor_ids = [str(row[0]) for row in cursor.fetchall()]
+        conn.commit()
+        for done, tractor_id in enumerate(tractor_ids, 1):
+            for function in BACKFILL_FUNCTIONS:
+                cursor.execute(f"SELECT {function}(ARRAY[%s]::uuid[])", (tractor_id,))
+            conn.commit()
+            print(f"  {done}/{len(tractor_ids)} tractors", end="\r")
+        cursor.close()
+        return len(tractor_ids)
+    finally:
+        if owns_conn:
+            conn.close()
+
+
+def print_status():
+    conn = psycopg2.connect(**get_db_config())
+    try:
+        applied = applied_versions(conn)
+    finally:
+        conn.close()
+    for migration in load_migrations():
+        state = "applied" if migration["version"] in applied else "pending"
+        print(f"{migration['version']:04d}_{migration['name']}: {state}")
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "up"
+    if command == "status":
+        print_status()
+    elif command == "backfill":
+        count = backfill()
+        print(f"Backfilled {count} tractor(s)")
+    elif command == "up":
+        applied = migrate()
+        print(f"Applied {len(applied)} migration(s)")
+    else:
+        print(f"Unknown command: {command}")
+        sys.exit(1)
@@ -0,0 +1,27 @@
+-- migrate:no-transaction
+
+-- Lists and report windows: ORDER BY / range filters on time columns.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tractors_created_at_idx ON tractors (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS implements_created_at_idx ON implements (created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS operations_start_time_idx ON operations (start_time DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fuel_logs_timestamp_idx ON fuel_logs (timestamp DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_timestamp_idx ON alerts (timestamp DESC);
+
+-- Dashboard counters. Active operations are already covered by the partial
+-- unique index operations_active_unique.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_unresolved_idx ON alerts (timestamp DESC) WHERE is_resolved = FALSE;
+
+-- Telemetry reads are per operation, newest first.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS telemetry_operation_timestamp_idx ON telemetry (operation_id, timestamp DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS telemetry_tractor_timestamp_idx ON telemetry (tractor_id, timestamp DESC);
+
+-- Foreign keys without a leading index. Besides joins, these keep the
+-- referential checks behind DELETE FROM tractors/implements/users from
+-- scanning the child tables.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS operations_tractor_id_idx ON operations (tractor_id, start_time DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS operations_implement_id_idx ON operations (implement_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS operations_operator_id_idx ON operations (operator_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tractors_owner_id_idx ON tractors (owner_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fuel_logs_operator_id_idx ON fuel_logs (operator_id);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fuel_logs_operation_id_idx ON fuel_logs (operation_id) WHERE operation_id IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_operation_id_idx ON alerts (operation_id) WHERE operation_id IS NOT NULL;
@@ -0,0 +1,88 @@
+-- Change tracking for GET /api/sync. Every synced row carries the id of the
+-- transaction that last wrote it (sync_xid), and deletes leave a tombstone.
+-- Columns are added without a volatile default first so existing tables are
+-- not rewritten; rows from before this migration have NULL sync_xid and are
+-- only returned by a full sync.
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    entity TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    owner_id UUID,
+    sync_xid xid8 NOT NULL DEFAULT pg_current_xact_id(),
+    deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (entity, entity_id)
+);
+
+CREATE INDEX IF NOT EXISTS sync_tombstones_sync_xid_idx ON sync_tombstones (sync_xid);
+
+CREATE OR REPLACE FUNCTION sync_touch_row() RETURNS trigger AS $$
+BEGIN
+    NEW.sync_xid := pg_current_xact_id();
+    NEW.updated_at := CURRENT_TIMESTAMP;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION sync_record_tombstone() RETURNS trigger AS $$
+DECLARE
+    row_owner UUID;
+BEGIN
+    IF TG_TABLE_NAME IN ('tractors', 'implements') THEN
+        row_owner := OLD.owner_id;
+    ELSE
+        SELECT owner_id INTO row_owner FROM tractors WHERE id = OLD.tractor_id;
+    END IF;
+
+    INSERT INTO sync_tombstones (entity, entity_id, owner_id)
+    VALUES (TG_TABLE_NAME, OLD.id, row_owner)
+    ON CONFLICT (entity, entity_id) DO UPDATE
+        SET sync_xid = pg_current_xact_id(), deleted_at = CURRENT_TIMESTAMP, owner_id = EXCLUDED.owner_id;
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+
+ALTER TABLE tractors ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE tractors ADD COLUMN IF NOT EXISTS sync_xid xid8;
+ALTER TABLE tractors ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE tractors ALTER COLUMN sync_xid SET DEFAULT pg_current_xact_id();
+DROP TRIGGER IF EXISTS tractors_sync_touch ON tractors;
+CREATE TRIGGER tractors_sync_touch BEFORE UPDATE ON tractors FOR EACH ROW EXECUTE FUNCTION sync_touch_row();
+DROP TRIGGER IF EXISTS tractors_sync_tombstone ON tractors;
+CREATE TRIGGER tractors_sync_tombstone AFTER DELETE ON tractors FOR EACH ROW EXECUTE FUNCTION sync_record_tombstone();
+
+ALTER TABLE implements ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE implements ADD COLUMN IF NOT EXISTS sync_xid xid8;
+ALTER TABLE implements ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE implements ALTER COLUMN sync_xid SET DEFAULT pg_current_xact_id();
+DROP TRIGGER IF EXISTS implements_sync_touch ON implements;
+CREATE TRIGGER implements_sync_touch BEFORE UPDATE ON implements FOR EACH ROW EXECUTE FUNCTION sync_touch_row();
+DROP TRIGGER IF EXISTS implements_sync_tombstone ON implements;
+CREATE TRIGGER implements_sync_tombstone AFTER DELETE ON implements FOR EACH ROW EXECUTE FUNCTION sync_record_tombstone();
+
+ALTER TABLE operations ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE operations ADD COLUMN IF NOT EXISTS sync_xid xid8;
+ALTER TABLE operations ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE operations ALTER COLUMN sync_xid SET DEFAULT pg_current_xact_id();
+DROP TRIGGER IF EXISTS operations_sync_touch ON operations;
+CREATE TRIGGER operations_sync_touch BEFORE UPDATE ON operations FOR EACH ROW EXECUTE FUNCTION sync_touch_row();
+DROP TRIGGER IF EXISTS operations_sync_tombstone ON operations;
+CREATE TRIGGER operations_sync_tombstone AFTER DELETE ON operations FOR EACH ROW EXECUTE FUNCTION sync_record_tombstone();
+
+ALTER TABLE fuel_logs ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE fuel_logs ADD COLUMN IF NOT EXISTS sync_xid xid8;
+ALTER TABLE fuel_logs ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE fuel_logs ALTER COLUMN sync_xid SET DEFAULT pg_current_xact_id();
+DROP TRIGGER IF EXISTS fuel_logs_sync_touch ON fuel_logs;
+CREATE TRIGGER fuel_logs_sync_touch BEFORE UPDATE ON fuel_logs FOR EACH ROW EXECUTE FUNCTION sync_touch_row();
+DROP TRIGGER IF EXISTS fuel_logs_sync_tombstone ON fuel_logs;
+CREATE TRIGGER fuel_logs_sync_tombstone AFTER DELETE ON fuel_logs FOR EACH ROW EXECUTE FUNCTION sync_record_tombstone();
+
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS sync_xid xid8;
+ALTER TABLE alerts ALTER COLUMN updated_at SET DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE alerts ALTER COLUMN sync_xid SET DEFAULT pg_current_xact_id();
+DROP TRIGGER IF EXISTS alerts_sync_touch ON alerts;
+CREATE TRIGGER alerts_sync_touch BEFORE UPDATE ON alerts FOR EACH ROW EXECUTE FUNCTION sync_touch_row();
+DROP TRIGGER IF EXISTS alerts_sync_tombstone ON alerts;
+CREATE TRIGGER alerts_sync_tombstone AFTER DELETE ON alerts FOR EACH ROW EXECUTE FUNCTION sync_record_tombstone();
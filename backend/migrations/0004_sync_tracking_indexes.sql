@@ -0,0 +1,7 @@
+-- migrate:no-transaction
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tractors_sync_xid_idx ON tractors (sync_xid) WHERE sync_xid IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS implements_sync_xid_idx ON implements (sync_xid) WHERE sync_xid IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS operations_sync_xid_idx ON operations (sync_xid) WHERE sync_xid IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS fuel_logs_sync_xid_idx ON fuel_logs (sync_xid) WHERE sync_xid IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_sync_xid_idx ON alerts (sync_xid) WHERE sync_xid IS NOT NULL;
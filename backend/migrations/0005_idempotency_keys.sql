@@ -0,0 +1,10 @@
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id UUID NOT NULL REFERENCES users(id),
+    idempotency_key TEXT NOT NULL,
+    entity TEXT NOT NULL,
+    entity_id UUID NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, idempotency_key)
+);
+
+CREATE INDEX IF NOT EXISTS idempotency_keys_created_at_idx ON idempotency_keys (created_at);
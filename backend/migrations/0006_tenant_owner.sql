@@ -0,0 +1,4 @@
+-- Operators belong to the farm of the owner who added them to the team.
+-- Owners (and operators not yet on a team) have no owner_id and act as their
+-- own tenant.
+ALTER TABLE users ADD COLUMN IF NOT EXISTS owner_id UUID REFERENCES users(id);
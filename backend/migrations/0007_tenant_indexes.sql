@@ -0,0 +1,11 @@
+-- migrate:no-transaction
+
+-- Every read is scoped to one owner: tractors and implements directly, the
+-- other tables through their tractor.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS tractors_owner_created_at_idx ON tractors (owner_id, created_at DESC);
+DROP INDEX CONCURRENTLY IF EXISTS tractors_owner_id_idx;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS implements_owner_created_at_idx ON implements (owner_id, created_at DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_tractor_timestamp_idx ON alerts (tractor_id, timestamp DESC);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_tractor_unresolved_idx ON alerts (tractor_id) WHERE is_resolved = FALSE;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS users_owner_id_idx ON users (owner_id) WHERE owner_id IS NOT NULL;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS sync_tombstones_owner_sync_xid_idx ON sync_tombstones (owner_id, sync_xid);
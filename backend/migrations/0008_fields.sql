@@ -0,0 +1,22 @@
+-- Field boundaries for geofencing. boundary is a JSON array of
+-- {"latitude", "longitude"} vertices; the bounding box is kept in columns so
+-- spatial queries can prefilter in SQL.
+CREATE TABLE IF NOT EXISTS fields (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    owner_id UUID NOT NULL REFERENCES users(id),
+    name TEXT NOT NULL,
+    boundary JSONB NOT NULL,
+    min_latitude FLOAT NOT NULL,
+    min_longitude FLOAT NOT NULL,
+    max_latitude FLOAT NOT NULL,
+    max_longitude FLOAT NOT NULL,
+    area_hectares FLOAT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS fields_owner_name_unique ON fields (owner_id, name);
+
+-- Field a telemetry point was inside when it was ingested. No foreign key:
+-- deleting a field must not have to touch the telemetry history.
+ALTER TABLE telemetry ADD COLUMN IF NOT EXISTS field_id UUID;
@@ -0,0 +1,6 @@
+-- Repeated (tractor_id, alert_type) events within the coalescing window bump
+-- occurrence_count and last_seen on the open alert instead of adding rows.
+-- last_seen is NULL for rows written before this migration; readers fall
+-- back to timestamp.
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS occurrence_count INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE alerts ADD COLUMN IF NOT EXISTS last_seen TIMESTAMP;
@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+
+-- Finds the open alert to coalesce into; only unresolved rows are indexed.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS alerts_open_tractor_type_idx ON alerts (tractor_id, alert_type) WHERE is_resolved = FALSE;
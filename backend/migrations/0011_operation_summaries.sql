@@ -0,0 +1,16 @@
+-- One row per finished operation, computed from its telemetry when it is
+-- stopped, so reports and the operation screen do not re-read the track.
+CREATE TABLE IF NOT EXISTS operation_summaries (
+    operation_id UUID PRIMARY KEY REFERENCES operations(id) ON DELETE CASCADE,
+    duration_seconds FLOAT NOT NULL,
+    engine_on_seconds FLOAT NOT NULL,
+    pto_on_seconds FLOAT NOT NULL,
+    moving_seconds FLOAT NOT NULL,
+    distance_km FLOAT NOT NULL,
+    avg_speed FLOAT,
+    max_speed FLOAT,
+    area_hectares FLOAT NOT NULL,
+    fuel_liters FLOAT NOT NULL,
+    point_count INTEGER NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
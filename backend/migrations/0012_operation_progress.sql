@@ -0,0 +1,18 @@
+-- Running totals for operations in progress, checkpointed by the ingest
+-- pipeline every PROGRESS_PERSIST_SECONDS. The last_* columns let a worker
+-- resume accumulating after a restart.
+CREATE TABLE IF NOT EXISTS operation_progress (
+    operation_id UUID PRIMARY KEY REFERENCES operations(id) ON DELETE CASCADE,
+    distance_km FLOAT NOT NULL DEFAULT 0,
+    moving_km FLOAT NOT NULL DEFAULT 0,
+    pto_km FLOAT NOT NULL DEFAULT 0,
+    moving_seconds FLOAT NOT NULL DEFAULT 0,
+    pto_seconds FLOAT NOT NULL DEFAULT 0,
+    point_count INTEGER NOT NULL DEFAULT 0,
+    last_timestamp TIMESTAMP,
+    last_latitude FLOAT,
+    last_longitude FLOAT,
+    last_is_moving BOOLEAN,
+    last_pto_on BOOLEAN,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
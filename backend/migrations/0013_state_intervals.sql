@@ -0,0 +1,51 @@
+-- Run-length encoded engine / moving / PTO state per tractor. Each row is a
+-- run of consecutive samples with the state on; a state is held until the
+-- next sample, so a run ends at the first sample with the state off. Open
+-- runs (is_open) are extended as points arrive; a silence longer than
+-- UTILIZATION_GAP_MINUTES (10) ends a run at its last sample.
+CREATE TABLE IF NOT EXISTS tractor_state_intervals (
+    id BIGSERIAL PRIMARY KEY,
+    tractor_id UUID NOT NULL REFERENCES tractors(id) ON DELETE CASCADE,
+    state VARCHAR(10) NOT NULL,
+    start_time TIMESTAMP NOT NULL,
+    end_time TIMESTAMP NOT NULL,
+    is_open BOOLEAN NOT NULL DEFAULT TRUE
+);
+
+-- At most one open run per tractor and state.
+CREATE UNIQUE INDEX IF NOT EXISTS tractor_state_intervals_open_idx
+    ON tractor_state_intervals (tractor_id, state) WHERE is_open;
+
+CREATE INDEX IF NOT EXISTS tractor_state_intervals_tractor_end_idx
+    ON tractor_state_intervals (tractor_id, end_time);
+
+-- Rebuild the runs of the given tractors from their stored telemetry (gaps
+-- and islands). Used by `python migrate.py backfill` for telemetry stored
+-- before this migration and by fleet_datagen.py, which loads telemetry with
+-- COPY instead of through the ingest handlers.
+CREATE OR REPLACE FUNCTION rebuild_state_intervals(tractor_ids UUID[]) RETURNS void LANGUAGE sql AS $$
+DELETE FROM tractor_state_intervals WHERE tractor_id = ANY(tractor_ids);
+
+WITH samples AS (
+    SELECT t.tractor_id, s.state, t.timestamp, s.value,
+           LAG(t.timestamp) OVER w AS prev_timestamp,
+           LAG(s.value) OVER w AS prev_value,
+           LEAD(t.timestamp) OVER w AS next_timestamp
+    FROM telemetry t
+    CROSS JOIN LATERAL (VALUES ('engine', t.engine_on), ('moving', t.is_moving), ('pto', t.pto_on)) AS s(state, value)
+    WHERE t.tractor_id = ANY(tractor_ids)
+    WINDOW w AS (PARTITION BY t.tractor_id, s.state ORDER BY t.timestamp)
+), runs AS (
+    SELECT *,
+           SUM(CASE WHEN value AND (prev_value IS NOT TRUE OR timestamp - prev_timestamp > INTERVAL '10 minutes')
+                    THEN 1 ELSE 0 END) OVER (PARTITION BY tractor_id, state ORDER BY timestamp) AS run
+    FROM samples
+)
+INSERT INTO tractor_state_intervals (tractor_id, state, start_time, end_time, is_open)
+SELECT tractor_id, state, MIN(timestamp),
+       MAX(CASE WHEN next_timestamp - timestamp <= INTERVAL '10 minutes' THEN next_timestamp ELSE timestamp END),
+       BOOL_OR(next_timestamp IS NULL)
+FROM runs
+WHERE value
+GROUP BY tractor_id, state, run;
+$$;
@@ -0,0 +1,119 @@
+-- Cumulative per-tractor counters, advanced by the ingest pipeline. The
+-- last_* columns hold the previous sample so each point adds one segment.
+-- The baseline_* columns are the part of each counter that comes from
+-- manual hour-meter / odometer readings rather than tracked telemetry.
+CREATE TABLE IF NOT EXISTS tractor_counters (
+    tractor_id UUID PRIMARY KEY REFERENCES tractors(id) ON DELETE CASCADE,
+    engine_seconds FLOAT NOT NULL DEFAULT 0,
+    pto_seconds FLOAT NOT NULL DEFAULT 0,
+    distance_km FLOAT NOT NULL DEFAULT 0,
+    operation_count INTEGER NOT NULL DEFAULT 0,
+    baseline_engine_seconds FLOAT NOT NULL DEFAULT 0,
+    baseline_km FLOAT NOT NULL DEFAULT 0,
+    last_timestamp TIMESTAMP,
+    last_latitude FLOAT,
+    last_longitude FLOAT,
+    last_engine_on BOOLEAN,
+    last_pto_on BOOLEAN,
+    tracked_since TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Service intervals. The due_* columns are the counter values (or date) at
+-- which the next service falls due, so the fleet-wide due check compares
+-- stored columns instead of recomputing thresholds.
+CREATE TABLE IF NOT EXISTS maintenance_schedules (
+    id UUID PRIMARY KEY,
+    tractor_id UUID NOT NULL REFERENCES tractors(id) ON DELETE CASCADE,
+    name VARCHAR(100) NOT NULL,
+    interval_engine_hours FLOAT,
+    interval_km FLOAT,
+    interval_days INTEGER,
+    last_service_engine_seconds FLOAT NOT NULL DEFAULT 0,
+    last_service_km FLOAT NOT NULL DEFAULT 0,
+    last_service_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    due_engine_seconds FLOAT GENERATED ALWAYS AS (last_service_engine_seconds + interval_engine_hours * 3600) STORED,
+    due_km FLOAT GENERATED ALWAYS AS (last_service_km + interval_km) STORED,
+    due_at TIMESTAMP GENERATED ALWAYS AS (last_service_at + interval_days * INTERVAL '1 day') STORED,
+    alerted BOOLEAN NOT NULL DEFAULT FALSE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CHECK (interval_engine_hours IS NOT NULL OR interval_km IS NOT NULL OR interval_days IS NOT NULL)
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS maintenance_schedules_tractor_name_unique ON maintenance_schedules (tractor_id, name);
+
+-- Schedules still to be alerted, checked on every ingested point.
+CREATE INDEX IF NOT EXISTS maintenance_schedules_pending_idx ON maintenance_schedules (tractor_id) WHERE NOT alerted;
+
+-- Rebuild the counters of the given tractors from what is stored: engine
+-- and PTO runs, the distance between consecutive positioned points of each
+-- tractor (haversine, as in summaries.py), completed operations, and the
+-- last sample so the ingest handler carries on from it. Manual baselines
+-- are kept and added back. Used by `python migrate.py backfill` and by
+-- fleet_datagen.py; run rebuild_state_intervals first.
+CREATE OR REPLACE FUNCTION rebuild_tractor_counters(tractor_ids UUID[]) RETURNS void LANGUAGE sql AS $$
+INSERT INTO tractor_counters (tractor_id, engine_seconds, pto_seconds, distance_km, operation_count,
+                              last_timestamp, last_latitude, last_longitude, last_engine_on, last_pto_on,
+                              tracked_since)
+SELECT t.id,
+       COALESCE(i.engine_seconds, 0), COALESCE(i.pto_seconds, 0),
+       COALESCE(d.distance_km, 0), COALESCE(o.operation_count, 0),
+       l.timestamp, p.latitude, p.longitude, l.engine_on, l.pto_on,
+       COALESCE(LEAST(i.first_seen, o.first_seen), i.first_seen, o.first_seen, t.created_at)
+FROM tractors t
+LEFT JOIN (
+    SELECT tractor_id,
+           SUM(EXTRACT(EPOCH FROM end_time - start_time)) FILTER (WHERE state = 'engine') AS engine_seconds,
+           SUM(EXTRACT(EPOCH FROM end_time - start_time)) FILTER (WHERE state = 'pto') AS pto_seconds,
+           MIN(start_time) AS first_seen
+    FROM tractor_state_intervals
+    WHERE tractor_id = ANY(tractor_ids)
+    GROUP BY tractor_id
+) i ON i.tractor_id = t.id
+LEFT JOIN (
+    SELECT tractor_id,
+           SUM(2 * 6371.0088 * ASIN(SQRT(
+               POWER(SIN(RADIANS(latitude - prev_latitude) / 2), 2)
+               + COS(RADIANS(prev_latitude)) * COS(RADIANS(latitude))
+                 * POWER(SIN(RADIANS(longitude - prev_longitude) / 2), 2)
+           ))) AS distance_km
+    FROM (
+        SELECT tractor_id, latitude, longitude,
+               LAG(latitude) OVER w AS prev_latitude,
+               LAG(longitude) OVER w AS prev_longitude
+        FROM telemetry
+        WHERE tractor_id = ANY(tractor_ids) AND latitude IS NOT NULL AND longitude IS NOT NULL
+        WINDOW w AS (PARTITION BY tractor_id ORDER BY timestamp)
+    ) samples
+    WHERE prev_latitude IS NOT NULL
+    GROUP BY tractor_id
+) d ON d.tractor_id = t.id
+LEFT JOIN (
+    SELECT tractor_id, COUNT(*) FILTER (WHERE status = 'completed') AS operation_count,
+           MIN(start_time) AS first_seen
+    FROM operations
+    WHERE tractor_id = ANY(tractor_ids)
+    GROUP BY tractor_id
+) o ON o.tractor_id = t.id
+LEFT JOIN LATERAL (
+    SELECT timestamp, engine_on, pto_on FROM telemetry
+    WHERE tractor_id = t.id ORDER BY timestamp DESC LIMIT 1
+) l ON TRUE
+LEFT JOIN LATERAL (
+    SELECT latitude, longitude FROM telemetry
+    WHERE tractor_id = t.id AND latitude IS NOT NULL AND longitude IS NOT NULL ORDER BY timestamp DESC LIMIT 1
+) p ON TRUE
+WHERE t.id = ANY(tractor_ids)
+ON CONFLICT (tractor_id) DO UPDATE SET
+    engine_seconds = EXCLUDED.engine_seconds + tractor_counters.baseline_engine_seconds,
+    pto_seconds = EXCLUDED.pto_seconds,
+    distance_km = EXCLUDED.distance_km + tractor_counters.baseline_km,
+    operation_count = EXCLUDED.operation_count,
+    last_timestamp = EXCLUDED.last_timestamp,
+    last_latitude = EXCLUDED.last_latitude,
+    last_longitude = EXCLUDED.last_longitude,
+    last_engine_on = EXCLUDED.last_engine_on,
+    last_pto_on = EXCLUDED.last_pto_on,
+    tracked_since = EXCLUDED.tracked_since,
+    updated_at = CURRENT_TIMESTAMP;
+$$;
@@ -0,0 +1,10 @@
+-- Simplified tracks of finished operations, one row per zoom level, built on
+-- first request and dropped when late telemetry arrives for the operation.
+CREATE TABLE IF NOT EXISTS operation_tracks (
+    operation_id UUID NOT NULL REFERENCES operations(id) ON DELETE CASCADE,
+    zoom SMALLINT NOT NULL,
+    points FLOAT[][] NOT NULL,
+    original_count INTEGER NOT NULL,
+    computed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (operation_id, zoom)
+);
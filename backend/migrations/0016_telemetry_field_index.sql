@@ -0,0 +1,4 @@
+-- migrate:no-transaction
+
+-- Coverage tiles of a field read its telemetry and newest timestamp.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS telemetry_field_timestamp_idx ON telemetry (field_id, timestamp DESC) WHERE field_id IS NOT NULL;
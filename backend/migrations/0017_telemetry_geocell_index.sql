@@ -0,0 +1,9 @@
+-- migrate:no-transaction
+
+-- Grid cell of each positioned point for bounding-box queries (spatial.py):
+-- 0.01 degree cells numbered row by row, 36000 cells per latitude band. An
+-- expression index, so telemetry is neither rewritten nor locked; queries
+-- must repeat the expression exactly (spatial.GEOCELL).
+CREATE INDEX CONCURRENTLY IF NOT EXISTS telemetry_geocell_timestamp_idx ON telemetry (
+    (FLOOR((latitude + 90) / 0.01)::BIGINT * 36000 + FLOOR((longitude + 180) / 0.01)::BIGINT), timestamp
+);
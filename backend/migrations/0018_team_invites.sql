@@ -0,0 +1,10 @@
+-- Pending invitations of operators to an owner's team. An operator joins a
+-- team only by accepting one; all their invitations are removed then.
+CREATE TABLE IF NOT EXISTS team_invites (
+    owner_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    operator_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (owner_id, operator_id)
+);
+
+CREATE INDEX IF NOT EXISTS team_invites_operator_idx ON team_invites (operator_id);
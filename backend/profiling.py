@@ -0,0 +1,181 @@
+"""
+On-demand sampling profiler for individual requests.
+
+A request is profiled when an owner sends ``X-Profile: 1`` (or ``?profile=1``)
+or when it is picked by PROFILE_SAMPLE_RATE. While it runs, a background
+thread samples the event loop thread's stack every PROFILE_INTERVAL_MS and
+the result is written to PROFILE_DIR in the folded-stack format understood by
+flamegraph.pl and speedscope. Endpoints in this app are ``async def`` with
+blocking psycopg2 calls, so time spent waiting on Postgres shows up under
+``database.py:execute``.
+
+Only the event loop thread is sampled. Frames of other requests running on
+the loop at the same time end up in the profile too, and work done in the
+threadpool (sync dependencies such as get_db's connect, run_in_threadpool
+calls) is missing; profile on a quiet worker for a clean picture.
+
+Profiles an owner asked for are stored under PROFILE_DIR/<owner id> and
+served to that owner only. Sampled profiles go to PROFILE_DIR/sampled and
+are read on the server.
+"""
+import os
+import re
+import sys
+import time
+import random
+import logging
+import threading
+from datetime import datetime
+
+from auth import decode_token
+
+PROFILE_DIR = os.environ.get(
+    "PROFILE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles")
+)
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_MS = float(os.environ.get("PROFILE_INTERVAL_MS", "2"))
+PROFILE_MAX_FILES = int(os.environ.get("PROFILE_MAX_FILES", "200"))
+PROFILE_NAME_PATTERN = re.compile(r"^[\w.-]+\.folded$")
+PROFILE_OWNER_PATTERN = re.compile(r"^[\w-]+$")
+SAMPLED = "sampled"
+
+logger = logging.getLogger("fleet.profile")
+
+
+class StackSampler:
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            key = ";".join(reversed(stack))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+            self.samples += 1
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in sorted(self.stacks.items()))
+
+
+def _requesting_owner(scope):
+    """Id of the owner who asked for this request to be profiled, if any."""
+    headers = dict(scope.get("headers") or [])
+    flagged = headers.get(b"x-profile") == b"1" or b"profile=1" in scope.get("query_string", b"").split(b"&")
+    if not flagged:
+        return None
+    authorization = headers.get(b"authorization", b"").decode("latin-1")
+    if not authorization.lower().startswith("bearer "):
+        return None
+    try:
+        payload = decode_token(authorization[7:])
+    except Exception:
+        return None
+    return payload.get("id") if payload.get("role") == "owner" else None
+
+
+def profile_owner(scope):
+    """Owner id (or SAMPLED) a profile of this request belongs to; None to skip profiling."""
+    if scope["path"].startswith("/api/profiles"):
+        return None
+    owner = _requesting_owner(scope)
+    if owner:
+        return owner
+    if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+        return SAMPLED
+    return None
+
+
+def _owner_dir(owner):
+    owner = str(owner)
+    return os.path.join(PROFILE_DIR, owner) if PROFILE_OWNER_PATTERN.match(owner) else None
+
+
+def profile_name(scope):
+    slug = re.sub(r"[^\w-]+", "_", scope["path"]).strip("_")[:80]
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}_{scope['method']}_{slug}.folded"
+
+
+def save_profile(owner, name, sampler):
+    directory = _owner_dir(owner)
+    if directory is None:
+        return
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, name), "w") as f:
+        f.write(sampler.folded())
+
+    profiles = sorted(p for p in os.listdir(directory) if PROFILE_NAME_PATTERN.match(p))
+    for old in profiles[:-PROFILE_MAX_FILES]:
+        os.remove(os.path.join(directory, old))
+
+
+def list_profiles(owner):
+    directory = _owner_dir(owner)
+    if directory is None or not os.path.isdir(directory):
+        return []
+    result = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if PROFILE_NAME_PATTERN.match(name):
+            stat = os.stat(os.path.join(directory, name))
+            result.append({
+                "name": name,
+                "size": stat.st_size,
+                "createdAt": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            })
+    return result
+
+
+def profile_path(owner, name):
+    directory = _owner_dir(owner)
+    if directory is None or not PROFILE_NAME_PATTERN.match(name):
+        return None
+    path = os.path.join(directory, name)
+    return path if os.path.isfile(path) else None
+
+
+class ProfilingMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        owner = profile_owner(scope) if scope["type"] == "http" else None
+        if owner is None:
+            await self.app(scope, receive, send)
+            return
+
+        name = profile_name(scope)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-profile-id", name.encode())]
+            await send(message)
+
+        sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000)
+        sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stop()
+            save_profile(owner, name, sampler)
+            elapsed = (time.perf_counter() - started) * 1000
+            logger.info("Saved request profile %s (%d samples, %.0f ms)", name, sampler.samples, elapsed)
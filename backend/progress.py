@@ -0,0 +1,156 @@
+"""
+Live progress of active operations.
+
+Every ingested point updates the operation's running totals in O(1): the
+segment from the previous point counts towards distance (haversine), and
+towards moving or PTO time and distance according to the previous point's
+state, the same attribution summaries.py uses at stop time. Totals live in
+memory and are checkpointed to operation_progress at most every
+PROGRESS_PERSIST_SECONDS, inside the ingesting transaction. A worker that
+sees an operation for the first time resumes from the checkpoint; as with the
+alert engine, a tractor's points are expected to reach one worker.
+"""
+import os
+import time
+import threading
+
+from database import get_db_cursor
+from geo import haversine_km
+from ingest import add_handler
+
+PROGRESS_PERSIST_SECONDS = float(os.environ.get("PROGRESS_PERSIST_SECONDS", "30"))
+
+COUNTERS = ("distance_km", "moving_km", "pto_km", "moving_seconds", "pto_seconds", "point_count")
+LAST_STATE = ("last_timestamp", "last_latitude", "last_longitude", "last_is_moving", "last_pto_on")
+
+
+class OperationProgress:
+    __slots__ = COUNTERS + LAST_STATE + ("persisted_at",)
+
+    def __init__(self, row=None):
+        for name in COUNTERS + LAST_STATE:
+            setattr(self, name, row[name] if row else (None if name in LAST_STATE else 0))
+        self.persisted_at = time.monotonic()
+
+    def add(self, point):
+        timestamp = point["timestamp"]
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            # Late or duplicate point: counted, but it cannot extend the track.
+            self.point_count += 1
+            return
+        if self.last_timestamp is not None:
+            seconds = (timestamp - self.last_timestamp).total_seconds()
+            km = 0.0
+            if self.last_latitude is not None and point["latitude"] is not None:
+                km = haversine_km(self.last_latitude, self.last_longitude, point["latitude"], point["longitude"])
+            self.distance_km += km
+            if self.last_is_moving:
+                self.moving_seconds += seconds
+                self.moving_km += km
+                if self.last_pto_on:
+                    self.pto_km += km
+            if self.last_pto_on:
+                self.pto_seconds += seconds
+        self.point_count += 1
+        self.last_timestamp = timestamp
+        if point["latitude"] is not None:
+            self.last_latitude = point["latitude"]
+            self.last_longitude = point["longitude"]
+        self.last_is_moving = point["is_moving"]
+        self.last_pto_on = point["pto_on"]
+
+    def as_row(self):
+        return {name: getattr(self, name) for name in COUNTERS + LAST_STATE}
+
+
+def covered_area(row, working_width):
+    """Hectares covered: implement width over PTO distance, else over moving distance."""
+    km = row["pto_km"] if row["pto_km"] > 0 else row["moving_km"]
+    return (working_width or 2) * km / 10
+
+
+def _load(cursor, operation_id):
+    cursor.execute("SELECT * FROM operation_progress WHERE operation_id = %s", (operation_id,))
+    return cursor.fetchone()
+
+
+def _save(cursor, operation_id, row):
+    columns = COUNTERS + LAST_STATE
+    cursor.execute(
+        f"""INSERT INTO operation_progress (operation_id, {', '.join(columns)}, updated_at)
+            VALUES (%s, {', '.join(['%s'] * len(columns))}, CURRENT_TIMESTAMP)
+            ON CONFLICT (operation_id) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in columns)}, updated_at = EXCLUDED.updated_at""",
+        [operation_id] + [row[c] for c in columns]
+    )
+
+
+class ProgressTracker:
+    def __init__(self, persist_seconds=PROGRESS_PERSIST_SECONDS):
+        self.persist_seconds = persist_seconds
+        self._operations = {}
+        self._lock = threading.Lock()
+
+    def on_point(self, cursor, point):
+        operation_id = str(point["operation_id"])
+        if point.get("operation_status") != "active":
+            # Stopped elsewhere; nothing more to accumulate.
+            with self._lock:
+                self._operations.pop(operation_id, None)
+            return
+        with self._lock:
+            progress = self._operations.get(operation_id)
+        if progress is None:
+            progress = OperationProgress(_load(cursor, operation_id))
+            with self._lock:
+                progress = self._operations.setdefault(operation_id, progress)
+
+        with self._lock:
+            progress.add(point)
+            now = time.monotonic()
+            due = now - progress.persisted_at >= self.persist_seconds
+            if due:
+                progress.persisted_at = now
+                row = progress.as_row()
+        if due:
+            _save(cursor, operation_id, row)
+
+    def snapshot(self, operation_id):
+        """In-memory totals for the operation, or None if this worker has none."""
+        with self._lock:
+            progress = self._operations.get(str(operation_id))
+            return progress.as_row() if progress else None
+
+    def finish(self, cursor, operation_id):
+        """Write the final totals and stop tracking the operation."""
+        with self._lock:
+            progress = self._operations.pop(str(operation_id), None)
+        if progress is not None:
+            _save(cursor, str(operation_id), progress.as_row())
+
+    def forget(self, operation_id):
+        with self._lock:
+            self._operations.pop(str(operation_id), None)
+
+
+def get_progress(conn, operation_ids):
+    """Latest totals per operation: this worker's live state, else the last checkpoint."""
+    result = {}
+    for operation_id in operation_ids:
+        row = PROGRESS.snapshot(operation_id)
+        if row is not None:
+            result[str(operation_id)] = row
+    missing = [str(i) for i in operation_ids if str(i) not in result]
+    if missing:
+        cursor = get_db_cursor(conn)
+        cursor.execute(
+            "SELECT * FROM operation_progress WHERE operation_id = ANY(%s::uuid[])", (missing,)
+        )
+        for row in cursor.fetchall():
+            result[str(row["operation_id"])] = row
+        cursor.close()
+    return result
+
+
+PROGRESS = ProgressTracker()
+add_handler(PROGRESS.on_point)
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Query-plan benchmark for the hot queries in main.py.
+
+Runs EXPLAIN (ANALYZE, BUFFERS) for every query the API issues on its read
+paths and records planning/execution time and whether the plan falls back to
+a sequential scan. Results are written as JSON so two runs can be compared.
+
+Run it against a scratch database, never production:
+
+    python query_bench.py --seed 2000 --output before.json
+    python migrate.py
+    python query_bench.py --output after.json --compare before.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from database import get_db_config
+from spatial import TRACTORS_SQL as SPATIAL_TRACTORS_SQL, bbox_params
+
+TENANT = "tractor_id IN (SELECT id FROM tractors WHERE owner_id = %(owner_id)s)"
+
+HOT_QUERIES = {
+    "dashboard.tractors_count": ("SELECT COUNT(*) as count FROM tractors WHERE owner_id = %(owner_id)s", ("owner_id",)),
+    "dashboard.implements_count": ("SELECT COUNT(*) as count FROM implements WHERE owner_id = %(owner_id)s", ("owner_id",)),
+    "dashboard.active_operations": (
+        f"SELECT COUNT(*) as count FROM operations WHERE status = 'active' AND {TENANT}", ("owner_id",)
+    ),
+    "dashboard.unresolved_alerts": (
+        f"SELECT COUNT(*) as count FROM alerts WHERE is_resolved = FALSE AND {TENANT}", ("owner_id",)
+    ),
+    "dashboard.today_fuel": (
+        f"SELECT COALESCE(SUM(quantity), 0) as total FROM fuel_logs WHERE {TENANT} AND timestamp >= %(day_start)s AND timestamp < %(day_end)s",
+        ("owner_id", "day_start", "day_end"),
+    ),
+    "dashboard.recent_operations": (
+        """SELECT o.id, o.operation_type, o.status, o.start_time, t.manufacturer_name, t.model, u.full_name
+           FROM operations o
+           JOIN tractors t ON o.tractor_id = t.id
+           JOIN users u ON o.operator_id = u.id
+           WHERE t.owner_id = %(owner_id)s
+           ORDER BY o.start_time DESC LIMIT 5""",
+        ("owner_id",),
+    ),
+    "tractors.list": ("SELECT * FROM tractors WHERE owner_id = %(owner_id)s ORDER BY created_at DESC", ("owner_id",)),
+    "implements.list": ("SELECT * FROM implements WHERE owner_id = %(owner_id)s ORDER BY created_at DESC", ("owner_id",)),
+    "operations.list": (f"SELECT * FROM operations WHERE {TENANT} ORDER BY start_time DESC", ("owner_id",)),
+    "operations.active_for_tractor": (
+        "SELECT id FROM operations WHERE tractor_id = %(tractor_id)s AND status = 'active'",
+        ("tractor_id",),
+    ),
+    "telemetry.by_operation": (
+        f"SELECT * FROM telemetry WHERE operation_id = %(operation_id)s AND {TENANT} ORDER BY timestamp DESC",
+        ("operation_id", "owner_id"),
+    ),
+    "fuel_logs.list": (f"SELECT * FROM fuel_logs WHERE {TENANT} ORDER BY timestamp DESC", ("owner_id",)),
+    "alerts.list": (f"SELECT * FROM alerts WHERE {TENANT} ORDER BY timestamp DESC", ("owner_id",)),
+    "reports.operations": (
+        f"SELECT * FROM operations WHERE {TENANT} AND start_time >= %(day_start)s AND start_time <= %(day_end)s ORDER BY start_time DESC",
+        ("owner_id", "day_start", "day_end"),
+    ),
+    "reports.fuel_logs": (
+        f"SELECT * FROM fuel_logs WHERE {TENANT} AND timestamp >= %(day_start)s AND timestamp <= %(day_end)s ORDER BY timestamp DESC",
+        ("owner_id", "day_start", "day_end"),
+    ),
+    "reports.alerts": (
+        f"SELECT * FROM alerts WHERE {TENANT} AND timestamp >= %(day_start)s AND timestamp <= %(day_end)s ORDER BY timestamp DESC",
+        ("owner_id", "day_start", "day_end"),
+    ),
+    "spatial.tractors_in_bbox": (
+        SPATIAL_TRACTORS_SQL,
+        ("owner_id", "lo", "hi", "start", "end", "min_lat", "min_lon", "max_lat", "max_lon"),
+    ),
+}
+
+SEED_SQL = [
+    """INSERT INTO users (username, password, full_name, role)
+       SELECT 'bench_user_' || n || '_' || %(tag)s, 'x', 'Bench User ' || n,
+              (CASE WHEN n %% 10 = 0 THEN 'owner' ELSE 'operator' END)::user_role
+       FROM generate_series(1, GREATEST(%(tractors)s / 5, 2)) n""",
+    """INSERT INTO tractors (owner_id, manufacturer_name, model, registration_number)
+       SELECT u.id, 'Bench', 'T' || n, 'BENCH-' || %(tag)s || '-' || n
+       FROM generate_series(1, %(tractors)s) n
+       CROSS JOIN LATERAL (SELECT id FROM users WHERE username LIKE 'bench\\_user\\_%%' ORDER BY random() + n LIMIT 1) u""",
+    """INSERT INTO implements (owner_id, operation_type, name, brand_name, working_width)
+       SELECT owner_id, 'tillage', 'Bench implement ' || %(tag)s || ' ' || registration_number, 'Bench', 2 + random() * 4
+       FROM tractors WHERE registration_number LIKE 'BENCH-' || %(tag)s || '-%%'""",
+    """INSERT INTO operations (tractor_id, implement_id, operator_id, operation_type, status, start_time, end_time)
+       SELECT t.id, i.id, t.owner_id, 'tillage', 'completed', s.start_time, s.start_time + interval '3 hours'
+       FROM tractors t
+       JOIN implements i ON i.owner_id = t.owner_id AND i.name = 'Bench implement ' || %(tag)s || ' ' || t.registration_number
+       CROSS JOIN LATERAL (
+           SELECT now() - (random() * interval '365 days') AS start_time
+           FROM generate_series(1, %(operations_per_tractor)s)
+       ) s
+       WHERE t.registration_number LIKE 'BENCH-' || %(tag)s || '-%%'""",
+    """INSERT INTO telemetry (operation_id, tractor_id, timestamp, engine_on, latitude, longitude, is_moving, pto_on, speed)
+       SELECT o.id, o.tractor_id, o.start_time + n * interval '30 seconds', TRUE,
+              18.5 + random() * 0.01, 73.8 + random() * 0.01, TRUE, n %% 3 <> 0, 4 + random() * 3
+       FROM operations o
+       JOIN tractors t ON t.id = o.tractor_id AND t.registration_number LIKE 'BENCH-' || %(tag)s || '-%%'
+       CROSS JOIN generate_series(1, %(telemetry_per_operation)s) n""",
+    """INSERT INTO fuel_logs (tractor_id, operator_id, operation_id, timestamp, quantity)
+       SELECT o.tractor_id, o.operator_id, o.id, o.start_time + interval '1 hour', 10 + random() * 40
+       FROM operations o
+       JOIN tractors t ON t.id = o.tractor_id AND t.registration_number LIKE 'BENCH-' || %(tag)s || '-%%'
+       ON CONFLICT DO NOTHING""",
+    """INSERT INTO alerts (tractor_id, operation_id, timestamp, alert_type, message, is_resolved)
+       SELECT o.tractor_id, o.id, o.start_time + interval '2 hours',
+              CASE WHEN random() < 0.2 THEN 'breakdown' ELSE 'warning' END, 'Bench alert', random() < 0.8
+       FROM operations o
+       JOIN tractors t ON t.id = o.tractor_id AND t.registration_number LIKE 'BENCH-' || %(tag)s || '-%%'
+       WHERE random() < 0.3
+       ON CONFLICT DO NOTHING""",
+]
+
+
+def seed(conn, tractors, operations_per_tractor, telemetry_per_operation):
+    tag = datetime.now().strftime("%Y%m%d%H%M%S")
+    params = {
+        "tag": tag,
+        "tractors": tractors,
+        "operations_per_tractor": operations_per_tractor,
+        "telemetry_per_operation": telemetry_per_operation,
+    }
+    cursor = conn.cursor()
+    for statement in SEED_SQL:
+        cursor.execute(statement, params)
+        print(f"  seeded {cursor.rowcount} rows")
+    conn.commit()
+    cursor.execute("ANALYZE")
+    conn.commit()
+    cursor.close()
+
+
+def sample_params(conn):
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT o.id, o.tractor_id, o.start_time, t.owner_id
+           FROM operations o JOIN tractors t ON t.id = o.tractor_id
+           ORDER BY o.start_time DESC LIMIT 1"""
+    )
+    row = cursor.fetchone()
+    cursor.close()
+    if row is None:
+        raise SystemExit("No operations found; run with --seed first")
+
+    day_start = row[2].replace(hour=0, minute=0, second=0, microsecond=0)
+    # The seeded telemetry lies in this box.
+    bbox = bbox_params(row[3], 18.5, 73.8, 18.51, 73.81, day_start, day_start + timedelta(days=1))
+    return dict(bbox, **{
+        "operation_id": row[0],
+        "tractor_id": row[1],
+        "owner_id": row[3],
+        "day_start": day_start,
+        "day_end": day_start + timedelta(days=1),
+    })
+
+
+def _plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def explain(conn, sql, params, repeat):
+    cursor = conn.cursor()
+    runs = []
+    plan = None
+    for _ in range(repeat):
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, params)
+        result = cursor.fetchone()[0][0]
+        runs.append((result["Planning Time"], result["Execution Time"]))
+        plan = result["Plan"]
+    conn.rollback()
+    cursor.close()
+
+    nodes = list(_plan_nodes(plan))
+    return {
+        "planningMs": statistics.median(r[0] for r in runs),
+        "executionMs": statistics.median(r[1] for r in runs),
+        "rootNode": plan["Node Type"],
+        "seqScans": sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"}),
+        "sharedBlocksRead": sum(n.get("Shared Read Blocks", 0) for n in nodes),
+    }
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get("queries", {}).get(name)
+        if not before:
+            continue
+        ratio = result["executionMs"] / max(before["executionMs"], 0.001)
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:32} {before['executionMs']:10.2f} -> {result['executionMs']:10.2f} ms{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=0, help="seed this many synthetic tractors first")
+    parser.add_argument("--operations-per-tractor", type=int, default=50)
+    parser.add_argument("--telemetry-per-operation", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5, help="EXPLAIN ANALYZE runs per query (median is kept)")
+    parser.add_argument("--only", action="append", help="run only queries with this name prefix")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(**get_db_config())
+    try:
+        if args.seed:
+            print(f"Seeding {args.seed} tractors...")
+            seed(conn, args.seed, args.operations_per_tractor, args.telemetry_per_operation)
+
+        params = sample_params(conn)
+        results = {}
+        for name, (sql, keys) in HOT_QUERIES.items():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            query_params = {key: params[key] for key in keys} if keys else None
+            results[name] = explain(conn, sql, query_params, args.repeat)
+            seq = ", ".join(results[name]["seqScans"]) or "-"
+            print(f"{name:32} {results[name]['executionMs']:10.2f} ms  seq scans: {seq}")
+    finally:
+        conn.close()
+
+    report = {"createdAt": datetime.now().isoformat(), "repeat": args.repeat, "queries": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
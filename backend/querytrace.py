@@ -0,0 +1,155 @@
+"""
+Per-request SQL tracing: slow-query log and N+1 detection.
+
+Every query executed through database.get_db_cursor (psycopg2) or through an
+SQLAlchemy engine passed to instrument_engine() is normalized to its
+statement shape (literals and placeholders replaced by ``?``) and counted
+against the current request. Queries slower than SLOW_QUERY_MS are logged
+with parameter values redacted to their types, and a request that runs the
+same shape more than N_PLUS_ONE_THRESHOLD times is reported as a likely N+1.
+
+Set QUERY_TRACE=0 to disable.
+"""
+import os
+import re
+import time
+import logging
+import contextvars
+from functools import lru_cache
+
+from database import add_query_observer
+
+QUERY_TRACE_ENABLED = os.environ.get("QUERY_TRACE", "1") != "0"
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.environ.get("N_PLUS_ONE_THRESHOLD", "10"))
+
+logger = logging.getLogger("fleet.sql")
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s|(?<!:):(?!:)\w+|\$\d+")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+
+_current_trace = contextvars.ContextVar("query_trace", default=None)
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(sql):
+    if isinstance(sql, bytes):
+        sql = sql.decode("utf-8", "replace")
+    sql = _COMMENT.sub(" ", sql)
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _LIST.sub("(...)", sql)
+    sql = _VALUES.sub(r"\1", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def redact_params(params):
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [f"<{type(value).__name__}>" for value in params]
+    return f"<{type(params).__name__}>"
+
+
+class RequestTrace:
+    def __init__(self, label):
+        self.label = label
+        self.shapes = {}
+
+    def record(self, shape, seconds, rowcount):
+        entry = self.shapes.get(shape)
+        if entry is None:
+            entry = self.shapes[shape] = [0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] += max(rowcount or 0, 0)
+
+    @property
+    def query_count(self):
+        return sum(entry[0] for entry in self.shapes.values())
+
+    def report(self):
+        for shape, (count, seconds, rows) in self.shapes.items():
+            if count > N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    "Possible N+1 in %s: %d executions (%.1f ms, %d rows) of %s",
+                    self.label, count, seconds * 1000, rows, shape
+                )
+        if logger.isEnabledFor(logging.DEBUG):
+            total = sum(entry[1] for entry in self.shapes.values())
+            logger.debug("%s: %d queries, %.1f ms", self.label, self.query_count, total * 1000)
+
+
+def record_query(sql, params, seconds, rowcount):
+    trace = _current_trace.get()
+    if trace is None and seconds * 1000 < SLOW_QUERY_MS:
+        return
+    shape = normalize_sql(sql)
+    if trace is not None:
+        trace.record(shape, seconds, rowcount)
+    if seconds * 1000 >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, %s rows) in %s: %s params=%s",
+            seconds * 1000, rowcount, trace.label if trace else "-", shape, redact_params(params)
+        )
+
+
+def begin_trace(label):
+    """Start collecting queries for a unit of work; returns a token for end_trace."""
+    return _current_trace.set(RequestTrace(label))
+
+
+def end_trace(token):
+    trace = _current_trace.get()
+    _current_trace.reset(token)
+    if trace is not None:
+        trace.report()
+    return trace
+
+
+def instrument_engine(engine):
+    """Attach query tracing to an SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_trace_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_trace_started"].pop()
+        record_query(statement, parameters, time.perf_counter() - started, cursor.rowcount)
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_trace_started"):
+            conn.info["query_trace_started"].pop()
+
+
+class QueryTraceMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not QUERY_TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        token = begin_trace(f"{scope['method']} {scope['path']}")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            end_trace(token)
+
+
+if QUERY_TRACE_ENABLED:
+    add_query_observer(record_query)
@@ -0,0 +1,143 @@
+"""
+In-process read-through cache for reference data (tractors, implements, users).
+
+List endpoints fetch their own rows without joins and enrich them from these
+caches; misses are loaded with a single ``WHERE id = ANY(...)`` query. Each
+cache is a bounded LRU with a TTL as a safety net.
+
+Writes invalidate locally through invalidate(). With REFCACHE_CROSS_WORKER=1
+the invalidation is also published with pg_notify inside the writing
+transaction, and start_listener() runs a thread that LISTENs for it so every
+worker drops the entry once the write commits.
+"""
+import os
+import time
+import select
+import threading
+from collections import OrderedDict
+
+import psycopg2
+
+from database import get_db_config, get_db_cursor
+
+REFCACHE_SIZE = int(os.environ.get("REFCACHE_SIZE", "10000"))
+REFCACHE_TTL = float(os.environ.get("REFCACHE_TTL", "300"))
+REFCACHE_CROSS_WORKER = os.environ.get("REFCACHE_CROSS_WORKER") == "1"
+NOTIFY_CHANNEL = "refcache_invalidate"
+
+
+class ReferenceCache:
+    def __init__(self, name, query, max_size=REFCACHE_SIZE, ttl=REFCACHE_TTL):
+        self.name = name
+        self.query = query
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, conn, ids):
+        """Return {id: row} for the given ids, loading misses in one query."""
+        now = time.monotonic()
+        wanted = {str(i) for i in ids if i is not None}
+        found = {}
+        with self._lock:
+            for key in wanted:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    found[key] = entry[1]
+
+        missing = wanted - found.keys()
+        if missing:
+            cursor = get_db_cursor(conn)
+            cursor.execute(self.query, (list(missing),))
+            loaded = {str(row["id"]): dict(row) for row in cursor.fetchall()}
+            cursor.close()
+            found.update(loaded)
+            with self._lock:
+                for key, row in loaded.items():
+                    self._entries[key] = (now + self.ttl, row)
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_size:
+                    self._entries.popitem(last=False)
+        return found
+
+    def get(self, conn, id):
+        return self.get_many(conn, [id]).get(str(id))
+
+    def discard(self, id):
+        with self._lock:
+            self._entries.pop(str(id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+TRACTORS = ReferenceCache(
+    "tractors",
+    """SELECT id, owner_id, manufacturer_name, model, registration_number, is_active
+       FROM tractors WHERE id = ANY(%s::uuid[])"""
+)
+IMPLEMENTS = ReferenceCache(
+    "implements",
+    """SELECT id, owner_id, operation_type, name, brand_name, working_width, is_active
+       FROM implements WHERE id = ANY(%s::uuid[])"""
+)
+USERS = ReferenceCache(
+    "users",
+    "SELECT id, full_name, role FROM users WHERE id = ANY(%s::uuid[])"
+)
+CACHES = {cache.name: cache for cache in (TRACTORS, IMPLEMENTS, USERS)}
+
+
+def register_cache(cache):
+    """Make another cache (anything with name, discard() and clear()) reachable by invalidate()."""
+    CACHES[cache.name] = cache
+
+
+def invalidate(cursor, cache, id):
+    """Drop an entry here and, if enabled, in other workers once the transaction commits."""
+    cache.discard(id)
+    if REFCACHE_CROSS_WORKER:
+        cursor.execute("SELECT pg_notify(%s, %s)", (NOTIFY_CHANNEL, f"{cache.name}:{id}"))
+
+
+def _handle_notification(payload):
+    name, _, id = payload.partition(":")
+    cache = CACHES.get(name)
+    if cache is not None:
+        cache.discard(id)
+
+
+def _listen_forever():
+    backoff = 1
+    while True:
+        try:
+            conn = psycopg2.connect(**get_db_config())
+            conn.autocommit = True
+            cursor = conn.cursor()
+            cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+            # Invalidations may have been missed while disconnected.
+            for cache in CACHES.values():
+                cache.clear()
+            backoff = 1
+            while True:
+                if select.select([conn], [], [], 30) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    _handle_notification(conn.notifies.pop(0).payload)
+        except Exception as e:
+            print(f"Reference cache listener error: {e}")
+            for cache in CACHES.values():
+                cache.clear()
+            time.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+
+def start_listener():
+    if not REFCACHE_CROSS_WORKER:
+        return
+    thread = threading.Thread(target=_listen_forever, name="refcache-listener", daemon=True)
+    thread.start()
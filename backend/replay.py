@@ -0,0 +1,72 @@
+"""
+Replay of an operation's telemetry, paced like the original recording.
+
+Points are read in timestamp order one chunk at a time, so a day-long track
+starts streaming immediately and uses constant memory. Between two points
+the stream waits for their time difference divided by the speed multiplier,
+capped at REPLAY_MAX_GAP_SECONDS so long pauses in the recording do not stall
+the replay; speed 0 sends everything without waiting.
+
+Speed 0 reads from a server-side cursor (stream_query). A paced replay can
+take hours, so it reads keyset chunks instead (stream_keyset), each in a
+short transaction of its own, and holds no transaction or connection open
+while it waits.
+
+The stream is newline-delimited JSON or server-sent events, with a final
+``end`` event carrying the number of points sent.
+"""
+import os
+import json
+import asyncio
+from datetime import datetime
+
+from starlette.concurrency import run_in_threadpool
+
+from database import stream_keyset, stream_query
+
+REPLAY_MAX_GAP_SECONDS = float(os.environ.get("REPLAY_MAX_GAP_SECONDS", "5"))
+FORMATS = {"ndjson": "application/x-ndjson", "sse": "text/event-stream"}
+
+REPLAY_SQL = """SELECT id, operation_id, tractor_id, timestamp, engine_on, latitude, longitude, is_moving, pto_on,
+                       speed, implement_data, field_id
+                FROM telemetry WHERE operation_id = %(operation_id)s"""
+
+
+def _frame(fmt, event, payload):
+    data = json.dumps(payload)
+    if fmt == "sse":
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+
+async def replay(operation_id, speed, fmt, serialize):
+    params = {"operation_id": operation_id}
+    if speed > 0:
+        chunks = stream_keyset(
+            f"{REPLAY_SQL} AND timestamp > %(after)s ORDER BY timestamp LIMIT %(limit)s",
+            params, "timestamp", datetime.min
+        )
+    else:
+        chunks = stream_query(f"{REPLAY_SQL} ORDER BY timestamp", params)
+    previous = None
+    count = 0
+    try:
+        while True:
+            rows = await run_in_threadpool(next, chunks, None)
+            if rows is None:
+                break
+            for row in rows:
+                if speed > 0 and previous is not None:
+                    delay = min((row["timestamp"] - previous).total_seconds() / speed, REPLAY_MAX_GAP_SECONDS)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                previous = row["timestamp"]
+                count += 1
+                yield _frame(fmt, "point", serialize(row))
+        yield _frame(fmt, "end", {"pointCount": count})
+    finally:
+        try:
+            chunks.close()
+        except ValueError:
+            # Cancelled mid-fetch; the generator closes its connection when collected.
+            pass
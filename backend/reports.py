@@ -0,0 +1,116 @@
+"""
+Report windows and streaming CSV exports of report data.
+
+report_window() turns the filterType/date parameters shared by
+/api/reports and the CSV exports into a (start, end) pair. The CSV exports
+read rows from a server-side cursor (stream_query) and write them one chunk
+at a time, optionally gzip-compressed, so multi-year exports run in constant
+memory.
+"""
+import io
+import csv
+import zlib
+from datetime import datetime
+
+from database import stream_query
+
+
+def report_window(filterType=None, date=None, startDate=None, endDate=None, startTime=None, endTime=None):
+    """(start, end) of a report; today when the filter is missing or incomplete."""
+    now = datetime.now()
+    if filterType == "day" and date:
+        start = datetime.fromisoformat(date).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start.replace(hour=23, minute=59, second=59, microsecond=999999)
+    elif filterType == "date-range" and startDate and endDate:
+        start = datetime.fromisoformat(startDate).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = datetime.fromisoformat(endDate).replace(hour=23, minute=59, second=59, microsecond=999999)
+    elif filterType == "datetime-range" and startDate and endDate and startTime and endTime:
+        start = datetime.fromisoformat(f"{startDate}T{startTime}")
+        end = datetime.fromisoformat(f"{endDate}T{endTime}")
+    else:
+        start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        end = now.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return start, end
+
+
+# Same estimates as /api/reports: the stored summary, else the progress
+# checkpoint of a running operation, else 5 km/h over the elapsed time.
+OPERATIONS_CSV = (
+    ["id", "operation_type", "status", "tractor", "registration_number", "operator", "implement",
+     "start_time", "end_time", "duration_hours", "area_hectares", "distance_km", "fuel_liters"],
+    """SELECT o.id, o.operation_type, o.status, t.manufacturer_name || ' ' || t.model, t.registration_number,
+              u.full_name, i.name, o.start_time, o.end_time, h.hours,
+              COALESCE(s.area_hectares,
+                       COALESCE(i.working_width, 2) * (CASE WHEN p.pto_km > 0 THEN p.pto_km ELSE p.moving_km END) / 10,
+                       COALESCE(i.working_width, 2) * 5 * h.hours / 10),
+              s.distance_km, s.fuel_liters
+       FROM operations o
+       JOIN tractors t ON t.id = o.tractor_id
+       LEFT JOIN users u ON u.id = o.operator_id
+       LEFT JOIN implements i ON i.id = o.implement_id
+       LEFT JOIN operation_summaries s ON s.operation_id = o.id
+       LEFT JOIN operation_progress p ON p.operation_id = o.id
+       CROSS JOIN LATERAL (
+           SELECT COALESCE(s.duration_seconds,
+                           EXTRACT(EPOCH FROM COALESCE(o.end_time, now()::timestamp) - o.start_time)) / 3600 AS hours
+       ) h
+       WHERE t.owner_id = %(owner_id)s AND o.start_time >= %(start)s AND o.start_time <= %(end)s
+       ORDER BY o.start_time DESC""",
+)
+
+FUEL_LOGS_CSV = (
+    ["id", "timestamp", "registration_number", "quantity", "operator", "operation_id", "notes"],
+    """SELECT f.id, f.timestamp, t.registration_number, f.quantity, u.full_name, f.operation_id, f.notes
+       FROM fuel_logs f
+       JOIN tractors t ON t.id = f.tractor_id
+       LEFT JOIN users u ON u.id = f.operator_id
+       WHERE t.owner_id = %(owner_id)s AND f.timestamp >= %(start)s AND f.timestamp <= %(end)s
+       ORDER BY f.timestamp DESC""",
+)
+
+ALERTS_CSV = (
+    ["id", "timestamp", "last_seen", "registration_number", "alert_type", "message", "occurrence_count",
+     "is_resolved"],
+    """SELECT a.id, a.timestamp, a.last_seen, t.registration_number, a.alert_type, a.message, a.occurrence_count,
+              a.is_resolved
+       FROM alerts a
+       JOIN tractors t ON t.id = a.tractor_id
+       WHERE t.owner_id = %(owner_id)s AND a.timestamp >= %(start)s AND a.timestamp <= %(end)s
+       ORDER BY a.timestamp DESC""",
+)
+
+CSV_EXPORTS = {
+    "operations": OPERATIONS_CSV,
+    "fuel-logs": FUEL_LOGS_CSV,
+    "alerts": ALERTS_CSV,
+}
+
+
+def _value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def stream_csv(export, params, compress=False):
+    """Generator of CSV bytes (header first), gzip-compressed if requested."""
+    header, query = export
+    gzip = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+
+    def flush():
+        data = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+        return gzip.compress(data) if gzip else data
+
+    yield flush()
+    for rows in stream_query(query, params, cursor_factory=None):
+        writer.writerows([_value(v) for v in row] for row in rows)
+        data = flush()
+        if data:
+            yield data
+    if gzip:
+        yield gzip.flush()
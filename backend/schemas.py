@@ -2,6 +2,7 @@ from pydantic import BaseModel, Field
 from typing import Optional, Any
 from datetime import datetime
 from enum import Enum
+from uuid import UUID
 
 class UserRole(str, Enum):
     owner = "owner"
@@ -44,6 +45,9 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TeamMemberInput(BaseModel):
+    username: str = Field(..., min_length=1)
+
 class TokenResponse(BaseModel):
     token: str
     user: UserResponse
@@ -126,6 +130,20 @@ class OperationResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class GeoPoint(BaseModel):
+    latitude: float = Field(..., ge=-90, le=90)
+    longitude: float = Field(..., ge=-180, le=180)
+
+class FieldCreate(BaseModel):
+    name: str = Field(..., min_length=1)
+    boundary: list[GeoPoint] = Field(..., min_length=3)
+    isActive: Optional[bool] = True
+
+class FieldUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1)
+    boundary: Optional[list[GeoPoint]] = Field(None, min_length=3)
+    isActive: Optional[bool] = None
+
 class TelemetryCreate(BaseModel):
     operationId: str
     tractorId: str
@@ -187,11 +205,50 @@ class AlertResponse(BaseModel):
     alertType: str
     message: str
     isResolved: bool
+    occurrenceCount: int = 1
+    lastSeen: Optional[datetime] = None
     tractor: Optional[TractorResponse] = None
     
     class Config:
         from_attributes = True
 
+class CounterReadingInput(BaseModel):
+    engineHours: Optional[float] = Field(None, ge=0)
+    distanceKm: Optional[float] = Field(None, ge=0)
+
+class MaintenanceScheduleCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    tractorId: Optional[str] = None
+    intervalEngineHours: Optional[float] = Field(None, gt=0)
+    intervalKm: Optional[float] = Field(None, gt=0)
+    intervalDays: Optional[int] = Field(None, gt=0)
+
+class AlertResolveInput(BaseModel):
+    ids: Optional[list[str]] = Field(None, max_length=5000)
+    tractorId: Optional[str] = None
+    alertType: Optional[str] = None
+    before: Optional[datetime] = None
+
+class OfflineOperationCreate(OperationCreate):
+    id: Optional[UUID] = None
+    startTime: Optional[datetime] = None
+    endTime: Optional[datetime] = None
+
+class BulkItemType(str, Enum):
+    fuel_log = "fuelLog"
+    alert = "alert"
+    operation = "operation"
+
+class BulkUploadItem(BaseModel):
+    type: BulkItemType
+    idempotencyKey: str = Field(..., min_length=1, max_length=200)
+    clientTimestamp: Optional[datetime] = None
+    data: dict
+
+class BulkUploadInput(BaseModel):
+    items: list[BulkUploadItem] = Field(..., max_length=1000)
+    atomic: Optional[bool] = False
+
 class DashboardStats(BaseModel):
     tractorsCount: int
     implementsCount: int
@@ -0,0 +1,75 @@
+"""
+Bounding-box queries over telemetry.
+
+GEOCELL numbers a grid of SPATIAL_CELL_DEG degree cells row by row (row =
+latitude band, column = longitude band); telemetry has an expression index on
+it together with the timestamp. Cells of one row that fall inside a box are
+consecutive numbers, so a box becomes one geocell range per latitude band;
+each range is an index range scan, followed by an exact latitude and
+longitude check on the rows found.
+
+GEOCELL must match the indexed expression of migration 0017 exactly, or the
+planner will not use the index; SPATIAL_CELL_DEG cannot be tuned without a
+new index.
+"""
+import math
+
+SPATIAL_CELL_DEG = 0.01
+COLUMNS = round(360 / SPATIAL_CELL_DEG)
+MAX_ROWS = 500
+
+GEOCELL = "(FLOOR((t.latitude + 90) / 0.01)::BIGINT * 36000 + FLOOR((t.longitude + 180) / 0.01)::BIGINT)"
+
+HITS_SQL = f"""
+SELECT t.tractor_id, t.operation_id, t.timestamp, t.latitude, t.longitude, t.speed, t.engine_on
+FROM unnest(%(lo)s::bigint[], %(hi)s::bigint[]) AS r(lo, hi)
+JOIN telemetry t ON {GEOCELL} BETWEEN r.lo AND r.hi
+WHERE t.timestamp >= %(start)s AND t.timestamp < %(end)s
+  AND t.latitude BETWEEN %(min_lat)s AND %(max_lat)s
+  AND t.longitude BETWEEN %(min_lon)s AND %(max_lon)s
+  AND t.tractor_id IN (SELECT id FROM tractors WHERE owner_id = %(owner_id)s)
+"""
+
+TRACTORS_SQL = f"""
+WITH hits AS ({HITS_SQL})
+SELECT tractor_id, COUNT(*) AS point_count, MIN(timestamp) AS first_seen, MAX(timestamp) AS last_seen,
+       (ARRAY_AGG(latitude ORDER BY timestamp DESC))[1] AS latitude,
+       (ARRAY_AGG(longitude ORDER BY timestamp DESC))[1] AS longitude
+FROM hits
+GROUP BY tractor_id
+"""
+
+POINTS_SQL = f"{HITS_SQL} ORDER BY t.timestamp DESC LIMIT %(limit)s"
+
+
+def _cell(degrees, offset):
+    return math.floor((degrees + offset) / SPATIAL_CELL_DEG)
+
+
+def cell_ranges(min_lat, min_lon, max_lat, max_lon):
+    """([low], [high]) geocell ranges covering the box, one per latitude band."""
+    first_row, last_row = _cell(min_lat, 90), _cell(max_lat, 90)
+    if last_row - first_row + 1 > MAX_ROWS:
+        raise ValueError("Area too large")
+    first_column, last_column = _cell(min_lon, 180), _cell(max_lon, 180)
+    low = [row * COLUMNS + first_column for row in range(first_row, last_row + 1)]
+    high = [row * COLUMNS + last_column for row in range(first_row, last_row + 1)]
+    return low, high
+
+
+def bbox_params(owner_id, min_lat, min_lon, max_lat, max_lon, start, end):
+    low, high = cell_ranges(min_lat, min_lon, max_lat, max_lon)
+    return {
+        "owner_id": owner_id, "lo": low, "hi": high, "start": start, "end": end,
+        "min_lat": min_lat, "min_lon": min_lon, "max_lat": max_lat, "max_lon": max_lon,
+    }
+
+
+def tractors_in_bbox(cursor, params):
+    cursor.execute(TRACTORS_SQL, params)
+    return cursor.fetchall()
+
+
+def points_in_bbox(cursor, params, limit):
+    cursor.execute(POINTS_SQL, dict(params, limit=limit))
+    return cursor.fetchall()
@@ -0,0 +1,100 @@
+"""
+Operation summaries computed once, when an operation is stopped.
+
+A single statement walks the operation's telemetry in time order with LAG():
+each sample's state (engine, PTO, moving) is held until the next sample, and
+consecutive positions are joined with the haversine distance. Covered area is
+the implement's working width times the distance driven with the PTO engaged,
+or times the distance driven while moving for implements that never report
+PTO. Fuel is every log tagged with the operation plus untagged logs for the
+tractor inside the operation's time window.
+"""
+
+SUMMARY_SQL = """
+WITH op AS (
+    SELECT o.id, o.tractor_id, o.start_time, COALESCE(o.end_time, now()::timestamp) AS end_time,
+           COALESCE(i.working_width, 2) AS working_width
+    FROM operations o
+    LEFT JOIN implements i ON i.id = o.implement_id
+    WHERE o.id = %(operation_id)s
+), samples AS (
+    SELECT t.timestamp, t.speed, t.engine_on, t.pto_on, t.is_moving, t.latitude, t.longitude,
+           LAG(t.timestamp) OVER w AS prev_timestamp,
+           LAG(t.engine_on) OVER w AS prev_engine_on,
+           LAG(t.pto_on) OVER w AS prev_pto_on,
+           LAG(t.is_moving) OVER w AS prev_is_moving,
+           LAG(t.latitude) OVER w AS prev_latitude,
+           LAG(t.longitude) OVER w AS prev_longitude
+    FROM telemetry t
+    WHERE t.operation_id = %(operation_id)s
+    WINDOW w AS (ORDER BY t.timestamp)
+), segments AS (
+    SELECT *,
+           EXTRACT(EPOCH FROM timestamp - prev_timestamp) AS seconds,
+           CASE WHEN prev_latitude IS NULL OR latitude IS NULL THEN 0
+                ELSE 2 * 6371.0088 * ASIN(SQRT(
+                    POWER(SIN(RADIANS(latitude - prev_latitude) / 2), 2)
+                    + COS(RADIANS(prev_latitude)) * COS(RADIANS(latitude))
+                      * POWER(SIN(RADIANS(longitude - prev_longitude) / 2), 2)
+                ))
+           END AS km
+    FROM samples
+), totals AS (
+    SELECT COALESCE(SUM(seconds) FILTER (WHERE prev_engine_on), 0) AS engine_on_seconds,
+           COALESCE(SUM(seconds) FILTER (WHERE prev_pto_on), 0) AS pto_on_seconds,
+           COALESCE(SUM(seconds) FILTER (WHERE prev_is_moving), 0) AS moving_seconds,
+           COALESCE(SUM(km), 0) AS distance_km,
+           COALESCE(SUM(km) FILTER (WHERE prev_is_moving AND prev_pto_on), 0) AS pto_km,
+           COALESCE(SUM(km) FILTER (WHERE prev_is_moving), 0) AS moving_km,
+           AVG(speed) FILTER (WHERE is_moving) AS avg_speed,
+           MAX(speed) AS max_speed,
+           COUNT(*) AS point_count
+    FROM segments
+), fuel AS (
+    SELECT COALESCE(SUM(f.quantity), 0) AS fuel_liters
+    FROM fuel_logs f, op
+    WHERE f.operation_id = op.id
+       OR (f.operation_id IS NULL AND f.tractor_id = op.tractor_id
+           AND f.timestamp >= op.start_time AND f.timestamp <= op.end_time)
+)
+INSERT INTO operation_summaries (
+    operation_id, duration_seconds, engine_on_seconds, pto_on_seconds, moving_seconds, distance_km,
+    avg_speed, max_speed, area_hectares, fuel_liters, point_count, computed_at
+)
+SELECT op.id, EXTRACT(EPOCH FROM op.end_time - op.start_time), totals.engine_on_seconds,
+       totals.pto_on_seconds, totals.moving_seconds, totals.distance_km, totals.avg_speed,
+       totals.max_speed,
+       op.working_width * (CASE WHEN totals.pto_km > 0 THEN totals.pto_km ELSE totals.moving_km END) / 10,
+       fuel.fuel_liters, totals.point_count, CURRENT_TIMESTAMP
+FROM op, totals, fuel
+ON CONFLICT (operation_id) DO UPDATE SET
+    duration_seconds = EXCLUDED.duration_seconds,
+    engine_on_seconds = EXCLUDED.engine_on_seconds,
+    pto_on_seconds = EXCLUDED.pto_on_seconds,
+    moving_seconds = EXCLUDED.moving_seconds,
+    distance_km = EXCLUDED.distance_km,
+    avg_speed = EXCLUDED.avg_speed,
+    max_speed = EXCLUDED.max_speed,
+    area_hectares = EXCLUDED.area_hectares,
+    fuel_liters = EXCLUDED.fuel_liters,
+    point_count = EXCLUDED.point_count,
+    computed_at = EXCLUDED.computed_at
+RETURNING *
+"""
+
+
+def compute_summary(cursor, operation_id):
+    """Compute and store the summary of an operation; returns the row."""
+    cursor.execute(SUMMARY_SQL, {"operation_id": operation_id})
+    return cursor.fetchone()
+
+
+def get_summaries(cursor, operation_ids):
+    """Return {operation id: summary row} for the given operations."""
+    if not operation_ids:
+        return {}
+    cursor.execute(
+        "SELECT * FROM operation_summaries WHERE operation_id = ANY(%s::uuid[])",
+        ([str(i) for i in operation_ids],)
+    )
+    return {str(row["operation_id"]): row for row in cursor.fetchall()}
@@ -0,0 +1,78 @@
+"""
+Owner (tenant) scoping for queries.
+
+A tenant is one farm: an owner plus the operators on their team. Tractors and
+implements carry owner_id directly; operations, telemetry, fuel logs and
+alerts belong to the tenant of their tractor. Queries filter on
+``tractor_id IN (SELECT id FROM tractors WHERE owner_id = %s)``, which the
+planner turns into a join driven by tractors_owner_created_at_idx and the
+tractor-led indexes on the child tables.
+"""
+import uuid
+
+from fastapi import HTTPException
+
+from database import get_db_cursor
+from refcache import TRACTORS, IMPLEMENTS
+
+
+def tenant_id(user):
+    """Owner id whose data the user may see."""
+    return str(user.get("owner_id") or user["id"])
+
+
+def tenant_filter(alias=None):
+    """SQL condition restricting a tractor-owned table to one tenant."""
+    column = f"{alias}.tractor_id" if alias else "tractor_id"
+    return f"{column} IN (SELECT id FROM tractors WHERE owner_id = %s)"
+
+
+def _canonical(ids):
+    canonical = {}
+    for value in ids:
+        try:
+            canonical[value] = str(uuid.UUID(str(value)))
+        except ValueError:
+            pass
+    return canonical
+
+
+def owned_ids(cache, conn, tenant, ids):
+    """Subset of ids whose row in the reference cache belongs to the tenant."""
+    canonical = _canonical(ids)
+    rows = cache.get_many(conn, set(canonical.values()))
+    return {
+        value for value, key in canonical.items()
+        if key in rows and str(rows[key]["owner_id"]) == tenant
+    }
+
+
+def operation_tractors(conn, ids):
+    """Tractor id of each existing operation, keyed by the operation id as given."""
+    canonical = _canonical(ids)
+    if not canonical:
+        return {}
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        "SELECT id, tractor_id FROM operations WHERE id = ANY(%s::uuid[])",
+        (sorted(set(canonical.values())),)
+    )
+    tractors = {str(row["id"]): str(row["tractor_id"]) for row in cursor.fetchall()}
+    cursor.close()
+    return {value: tractors[key] for value, key in canonical.items() if key in tractors}
+
+
+def require_tractor(conn, user, tractor_id):
+    if tractor_id not in owned_ids(TRACTORS, conn, tenant_id(user), [tractor_id]):
+        raise HTTPException(status_code=404, detail="Tractor not found")
+
+
+def require_implement(conn, user, implement_id):
+    if implement_id not in owned_ids(IMPLEMENTS, conn, tenant_id(user), [implement_id]):
+        raise HTTPException(status_code=404, detail="Implement not found")
+
+
+def require_operation(conn, user, operation_id, tractor_id):
+    """404 unless the operation was run by tractor_id, which must already be checked with require_tractor."""
+    if operation_tractors(conn, [operation_id]).get(operation_id) != str(uuid.UUID(str(tractor_id))):
+        raise HTTPException(status_code=404, detail="Operation not found")
@@ -0,0 +1,67 @@
+import os
+import sys
+import uuid
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope="session")
+def client():
+    """API client against the database in DATABASE_URL (migrated on startup)."""
+    if not os.environ.get("DATABASE_URL"):
+        pytest.skip("DATABASE_URL is not set")
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as client:
+        yield client
+
+
+@pytest.fixture
+def register(client):
+    """Register a fresh user; returns (auth headers, user)."""
+
+    def register(role="owner"):
+        username = f"test_{role}_{uuid.uuid4().hex[:12]}"
+        response = client.post("/api/auth/register", json={
+            "username": username, "password": "secret123", "fullName": username, "role": role,
+        })
+        response.raise_for_status()
+        body = response.json()
+        return {"Authorization": f"Bearer {body['token']}"}, body["user"]
+
+    return register
+
+
+@pytest.fixture
+def fleet(client):
+    """Create a tractor and an implement for a user; returns their ids."""
+
+    def fleet(headers):
+        tractor = client.post("/api/tractors", headers=headers, json={
+            "manufacturerName": "Test", "model": "T1", "registrationNumber": f"T-{uuid.uuid4().hex[:10]}",
+        })
+        tractor.raise_for_status()
+        implement = client.post("/api/implements", headers=headers, json={
+            "operationType": "tillage", "name": f"Plough {uuid.uuid4().hex[:8]}", "brandName": "Test",
+            "workingWidth": 3.0,
+        })
+        implement.raise_for_status()
+        return tractor.json()["id"], implement.json()["id"]
+
+    return fleet
+
+
+@pytest.fixture
+def cursor(client):
+    """Cursor in a transaction that is rolled back after the test."""
+    from database import _connect, get_db_cursor
+
+    conn = _connect()
+    cursor = get_db_cursor(conn)
+    yield cursor
+    cursor.close()
+    conn.rollback()
+    conn.close()
@@ -0,0 +1,43 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from alerting import RULES, AlertEngine
+
+
+def _point(operation_id, timestamp, status="active"):
+    return {
+        "tractor_id": "tractor-1", "operation_id": operation_id, "operation_status": status,
+        "timestamp": timestamp, "engine_on": True, "is_moving": True, "pto_on": True, "speed": 8,
+    }
+
+
+def _gaps(fired):
+    return [message for rule, message in fired if rule.name == "telemetry_gap"]
+
+
+def test_telemetry_gap_within_operation():
+    engine = AlertEngine([rule for rule in RULES if rule.name == "telemetry_gap"])
+    start = datetime(2024, 5, 1, 8, 0)
+    assert _gaps(engine.evaluate(_point("op-a", start))) == []
+    assert _gaps(engine.evaluate(_point("op-a", start + timedelta(minutes=1)))) == []
+    assert len(_gaps(engine.evaluate(_point("op-a", start + timedelta(minutes=20))))) == 1
+
+
+def test_no_telemetry_gap_across_operations():
+    engine = AlertEngine([rule for rule in RULES if rule.name == "telemetry_gap"])
+    start = datetime(2024, 5, 1, 8, 0)
+    engine.evaluate(_point("op-a", start))
+    engine.evaluate(_point("op-a", start + timedelta(minutes=1), status="completed"))
+    assert _gaps(engine.evaluate(_point("op-b", start + timedelta(hours=5)))) == []
+    assert _gaps(engine.evaluate(_point("op-b", start + timedelta(hours=5, minutes=1)))) == []
+
+
+def test_no_telemetry_gap_after_points_without_active_operation():
+    engine = AlertEngine([rule for rule in RULES if rule.name == "telemetry_gap"])
+    start = datetime(2024, 5, 1, 8, 0)
+    engine.evaluate(_point("op-a", start))
+    engine.evaluate(_point(None, start + timedelta(minutes=30), status=None))
+    assert _gaps(engine.evaluate(_point("op-a", start + timedelta(minutes=60)))) == []
@@ -0,0 +1,47 @@
+import io
+import json
+
+import pytest
+
+import bulk_import
+from bulk_import import iter_rows
+
+
+def _rows(data, **kwargs):
+    return list(iter_rows(io.BytesIO(data.encode("utf-8")), **kwargs))
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64 * 1024])
+def test_json_array_across_chunk_boundaries(monkeypatch, chunk):
+    monkeypatch.setattr(bulk_import, "JSON_CHUNK_CHARS", chunk)
+    items = [{"registration_number": f"MH-{i}", "model": "575 " * i, "nested": {"a": [i, "]"]}} for i in range(20)]
+    rows = _rows("  " + json.dumps(items, indent=1) + "\n")
+    assert [number for number, _ in rows] == list(range(1, 21))
+    assert rows[3][1] == {"registrationNumber": "MH-3", "model": "575 " * 3, "nested": {"a": [3, "]"]}}
+
+
+def test_empty_json_array():
+    assert _rows("[ ]") == []
+
+
+@pytest.mark.parametrize("data, message", [
+    ('[{"a": 1},]', "Trailing comma"),
+    ('[{"a": 1} {"a": 2}]', "Expected ','"),
+    ('[{"a": 1}, {"a": 2}', "Unterminated"),
+])
+def test_malformed_json_array(data, message):
+    with pytest.raises(ValueError, match=message):
+        _rows(data)
+
+
+def test_json_array_element_too_large(monkeypatch):
+    monkeypatch.setattr(bulk_import, "JSON_CHUNK_CHARS", 16)
+    monkeypatch.setattr(bulk_import, "JSON_MAX_ROW_CHARS", 64)
+    with pytest.raises(ValueError, match="too large"):
+        _rows('[{"notes": "' + "x" * 200 + '"}]')
+
+
+def test_ndjson_and_csv():
+    assert _rows('{"model": "575"}\n\n{"model": "475"}\n') == [(1, {"model": "575"}), (2, {"model": "475"})]
+    rows = _rows("registration_number,model\nMH-1,575\n", filename="tractors.csv")
+    assert rows[0][0] == 1 and rows[0][1]["model"] == "575"
@@ -0,0 +1,96 @@
+import uuid
+
+import pytest
+
+
+@pytest.fixture
+def owner(register, fleet):
+    headers, user = register()
+    tractor_id, implement_id = fleet(headers)
+    return {"headers": headers, "tractor": tractor_id, "implement": implement_id}
+
+
+def _upload(client, owner, items, atomic=False):
+    response = client.post("/api/bulk", headers=owner["headers"], json={"items": items, "atomic": atomic})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _statuses(body):
+    return [result["status"] for result in body["results"]]
+
+
+def _operation(owner, key, operation_id=None, **times):
+    data = {"tractorId": owner["tractor"], "implementId": owner["implement"], "operationType": "tillage", **times}
+    if operation_id:
+        data["id"] = operation_id
+    return {"type": "operation", "idempotencyKey": key, "data": data}
+
+
+def _fuel_log(owner, key, quantity, timestamp, operation_id=None):
+    return {"type": "fuelLog", "idempotencyKey": key, "clientTimestamp": timestamp,
+            "data": {"tractorId": owner["tractor"], "operationId": operation_id, "quantity": quantity}}
+
+
+def test_replay_returns_original_ids(client, owner):
+    items = [
+        _fuel_log(owner, "fuel-1", 10, "2024-05-01T08:00:00"),
+        {"type": "alert", "idempotencyKey": "alert-1", "clientTimestamp": "2024-05-01T08:05:00",
+         "data": {"tractorId": owner["tractor"], "alertType": "custom", "message": "Check"}},
+        _operation(owner, "operation-1", startTime="2024-05-01T07:00:00"),
+    ]
+    first = _upload(client, owner, items)
+    assert first["ok"] and _statuses(first) == ["created"] * 3
+
+    second = _upload(client, owner, items)
+    assert second["ok"] and _statuses(second) == ["replayed"] * 3
+    assert [r["id"] for r in second["results"]] == [r["id"] for r in first["results"]]
+
+    logs = client.get("/api/fuel-logs", headers=owner["headers"]).json()
+    assert [log["id"] for log in logs] == [first["results"][0]["id"]]
+
+
+def test_duplicate_keys_within_batch(client, owner):
+    body = _upload(client, owner, [
+        _fuel_log(owner, "fuel-1", 10, "2024-05-01T08:00:00"),
+        _fuel_log(owner, "fuel-1", 10, "2024-05-01T08:00:00"),
+    ])
+    assert _statuses(body) == ["created", "duplicate"]
+    assert body["results"][1]["duplicateOf"] == 0
+
+
+def test_conflicting_record_is_not_remembered(client, owner):
+    first = _upload(client, owner, [_fuel_log(owner, "fuel-1", 10, "2024-05-01T08:00:00")])
+    assert _statuses(first) == ["created"]
+    # Same tractor and timestamp under a new key: skipped, and the key stays free.
+    body = _upload(client, owner, [_fuel_log(owner, "fuel-2", 12, "2024-05-01T08:00:00")])
+    assert not body["ok"] and _statuses(body) == ["conflict"]
+    body = _upload(client, owner, [_fuel_log(owner, "fuel-2", 12, "2024-05-01T08:01:00")])
+    assert _statuses(body) == ["created"]
+
+
+def test_atomic_batch_stores_nothing_on_failure(client, owner):
+    items = [
+        _fuel_log(owner, "fuel-1", 10, "2024-05-01T08:00:00"),
+        {"type": "fuelLog", "idempotencyKey": "fuel-2", "data": {"tractorId": str(uuid.uuid4()), "quantity": 1}},
+    ]
+    body = _upload(client, owner, items, atomic=True)
+    assert not body["ok"] and _statuses(body) == ["skipped", "failed"]
+    assert client.get("/api/fuel-logs", headers=owner["headers"]).json() == []
+
+    # The skipped item was not remembered, so a corrected batch creates it.
+    body = _upload(client, owner, items[:1], atomic=True)
+    assert body["ok"] and _statuses(body) == ["created"]
+
+
+def test_fuel_logs_refer_to_operation_in_same_batch(client, owner):
+    operation_id = str(uuid.uuid4())
+    body = _upload(client, owner, [
+        _fuel_log(owner, "fuel-1", 12.5, "2024-05-01T09:00:00", operation_id),
+        _operation(owner, "operation-1", operation_id, startTime="2024-05-01T08:00:00", endTime="2024-05-01T10:00:00"),
+    ])
+    assert body["ok"] and body["results"][1]["id"] == operation_id
+
+    summary = client.get(f"/api/operations/{operation_id}/summary", headers=owner["headers"]).json()
+    assert summary["durationSeconds"] == 7200
+    assert summary["fuelLiters"] == 12.5
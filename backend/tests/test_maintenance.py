@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+import maintenance
+from geo import haversine_km
+
+
+def test_predict_extrapolates_average_rate():
+    now = datetime(2024, 5, 11)
+    # 20 units over 10 days leaves 90 units for 45 more days.
+    assert maintenance._predict(now, 90, 20, now - timedelta(days=10)) == now + timedelta(days=45)
+
+
+def test_predict_edge_cases():
+    now = datetime(2024, 5, 11)
+    assert maintenance._predict(now, 0, 20, now - timedelta(days=10)) == now
+    assert maintenance._predict(now, 10, 0, now - timedelta(days=10)) is None
+    assert maintenance._predict(now, 10, 5, now) is None
+
+
+def _point(tractor_id, timestamp, latitude, longitude, engine_on=True, pto_on=False):
+    return {
+        "tractor_id": tractor_id, "operation_id": None, "timestamp": timestamp, "latitude": latitude,
+        "longitude": longitude, "engine_on": engine_on, "pto_on": pto_on,
+    }
+
+
+def _counters(cursor, tractor_id):
+    cursor.execute("SELECT * FROM tractor_counters WHERE tractor_id = %s", (tractor_id,))
+    return cursor.fetchone()
+
+
+def test_update_counters_adds_segments(cursor, register, fleet):
+    headers, _ = register()
+    tractor_id, _ = fleet(headers)
+    start = datetime(2024, 5, 1, 8, 0)
+    maintenance.update_counters(cursor, _point(tractor_id, start, 18.50, 73.80, pto_on=True))
+    maintenance.update_counters(cursor, _point(tractor_id, start + timedelta(minutes=2), 18.51, 73.80))
+    # Out of order: ignored.
+    maintenance.update_counters(cursor, _point(tractor_id, start + timedelta(minutes=1), 18.60, 73.80))
+    # Longer than the utilization gap: distance but no time.
+    maintenance.update_counters(cursor, _point(tractor_id, start + timedelta(hours=2), 18.51, 73.81))
+
+    counters = _counters(cursor, tractor_id)
+    assert counters["engine_seconds"] == 120
+    assert counters["pto_seconds"] == 120
+    assert counters["distance_km"] == pytest.approx(
+        haversine_km(18.50, 73.80, 18.51, 73.80) + haversine_km(18.51, 73.80, 18.51, 73.81)
+    )
+
+
+def test_manual_reading_does_not_count_as_usage(cursor, register, fleet):
+    headers, user = register()
+    tractor_id, _ = fleet(headers)
+    cursor.execute(
+        "INSERT INTO tractor_counters (tractor_id, engine_seconds, tracked_since) VALUES (%s, %s, %s)",
+        (tractor_id, 10 * 3600, datetime.now() - timedelta(days=10))
+    )
+    counters = maintenance.set_counters(cursor, tractor_id, engine_hours=3000)
+    assert counters["engine_seconds"] == 3000 * 3600
+    assert counters["baseline_engine_seconds"] == 2990 * 3600
+
+    maintenance.create_schedules(cursor, [tractor_id], "Oil", 100, None, None)
+    cursor.execute(
+        "UPDATE tractor_counters SET engine_seconds = engine_seconds + %s WHERE tractor_id = %s",
+        (10 * 3600, tractor_id)
+    )
+    (schedule,) = maintenance.due_schedules(cursor, user["id"], within_hours=1000)
+    assert schedule["engineHours"] == 3010
+    assert schedule["remainingEngineHours"] == 90
+    # 20 tracked hours in 10 days: 90 more hours take about 45 days.
+    predicted = datetime.fromisoformat(schedule["predictedDueAt"])
+    assert abs(predicted - (datetime.now() + timedelta(days=45))) < timedelta(hours=1)
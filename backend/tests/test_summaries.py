@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+
+from geo import haversine_km
+from summaries import compute_summary
+
+
+@pytest.fixture
+def operation(cursor, register, fleet):
+    """A completed 10-minute operation of a tractor with a 3 m implement."""
+    headers, user = register()
+    tractor_id, implement_id = fleet(headers)
+    operation_id = str(uuid.uuid4())
+    start = datetime(2024, 5, 1, 8, 0)
+    cursor.execute(
+        """INSERT INTO operations (id, tractor_id, implement_id, operator_id, operation_type, status, start_time, end_time)
+           VALUES (%s, %s, %s, %s, 'tillage', 'completed', %s, %s)""",
+        (operation_id, tractor_id, implement_id, user["id"], start, start + timedelta(minutes=10))
+    )
+    return {"id": operation_id, "tractor": tractor_id, "operator": user["id"], "start": start}
+
+
+def _telemetry(cursor, operation, minutes, latitude, longitude, engine_on=True, pto_on=False, is_moving=False,
+               speed=0):
+    cursor.execute(
+        """INSERT INTO telemetry (operation_id, tractor_id, timestamp, engine_on, latitude, longitude,
+                                  pto_on, is_moving, speed)
+           VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)""",
+        (operation["id"], operation["tractor"], operation["start"] + timedelta(minutes=minutes), engine_on,
+         latitude, longitude, pto_on, is_moving, speed)
+    )
+
+
+def _fuel(cursor, operation, minutes, quantity, operation_id=None):
+    cursor.execute(
+        """INSERT INTO fuel_logs (id, tractor_id, operator_id, operation_id, quantity, timestamp)
+           VALUES (%s, %s, %s, %s, %s, %s)""",
+        (str(uuid.uuid4()), operation["tractor"], operation["operator"], operation_id, quantity,
+         operation["start"] + timedelta(minutes=minutes))
+    )
+
+
+def test_summary_holds_each_state_until_the_next_sample(cursor, operation):
+    # Working with the PTO for 4 minutes, driving to the gate for 2, idling for 4.
+    _telemetry(cursor, operation, 0, 18.500, 73.800, pto_on=True, is_moving=True, speed=8)
+    _telemetry(cursor, operation, 4, 18.505, 73.800, is_moving=True, speed=12)
+    _telemetry(cursor, operation, 6, 18.510, 73.800)
+    _telemetry(cursor, operation, 10, 18.510, 73.800, engine_on=False)
+
+    summary = compute_summary(cursor, operation["id"])
+    pto_km = haversine_km(18.500, 73.800, 18.505, 73.800)
+    assert summary["duration_seconds"] == 600
+    assert summary["engine_on_seconds"] == 600
+    assert summary["pto_on_seconds"] == 240
+    assert summary["moving_seconds"] == 360
+    assert summary["distance_km"] == pytest.approx(haversine_km(18.500, 73.800, 18.510, 73.800))
+    assert summary["area_hectares"] == pytest.approx(3.0 * pto_km / 10)
+    assert summary["avg_speed"] == pytest.approx(10)
+    assert summary["max_speed"] == 12
+    assert summary["point_count"] == 4
+
+
+def test_summary_area_without_pto_uses_distance_moving(cursor, operation):
+    _telemetry(cursor, operation, 0, 18.500, 73.800, is_moving=True)
+    _telemetry(cursor, operation, 10, 18.510, 73.800, engine_on=False)
+
+    summary = compute_summary(cursor, operation["id"])
+    assert summary["area_hectares"] == pytest.approx(3.0 * haversine_km(18.500, 73.800, 18.510, 73.800) / 10)
+
+
+def test_summary_fuel(cursor, operation):
+    _telemetry(cursor, operation, 0, None, None)
+    _fuel(cursor, operation, 20, 30, operation_id=operation["id"])  # tagged: counts even after the end
+    _fuel(cursor, operation, 5, 10)                                # untagged, inside the window
+    _fuel(cursor, operation, 15, 99)                               # untagged, after the end
+
+    summary = compute_summary(cursor, operation["id"])
+    assert summary["fuel_liters"] == 40
+    assert summary["distance_km"] == 0
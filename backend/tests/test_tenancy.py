@@ -0,0 +1,98 @@
+import pytest
+
+
+def _start(client, headers, tractor_id, implement_id):
+    response = client.post("/api/operations", headers=headers, json={
+        "tractorId": tractor_id, "implementId": implement_id, "operationType": "tillage",
+    })
+    response.raise_for_status()
+    return response.json()["id"]
+
+
+@pytest.fixture
+def tenants(client, register, fleet):
+    """Two owners, each with a tractor, an implement and a running operation."""
+    result = []
+    for _ in range(2):
+        headers, user = register()
+        tractor_id, implement_id = fleet(headers)
+        operation_id = _start(client, headers, tractor_id, implement_id)
+        result.append({"headers": headers, "user": user, "tractor": tractor_id,
+                       "implement": implement_id, "operation": operation_id})
+    return result
+
+
+def test_other_tenants_records_are_invisible(client, tenants):
+    a, b = tenants
+    tractors = client.get("/api/tractors", headers=b["headers"]).json()
+    assert a["tractor"] not in {t["id"] for t in tractors}
+    operations = client.get("/api/operations", headers=b["headers"]).json()
+    assert a["operation"] not in {o["id"] for o in operations}
+    assert client.post(f"/api/operations/{a['operation']}/stop", headers=b["headers"]).status_code == 404
+    assert client.get(f"/api/operations/{a['operation']}/summary", headers=b["headers"]).status_code == 404
+
+
+def test_foreign_tractor_is_rejected(client, tenants):
+    a, b = tenants
+    response = client.post("/api/fuel-logs", headers=b["headers"], json={"tractorId": a["tractor"], "quantity": 5})
+    assert response.status_code == 404
+    response = client.post("/api/operations", headers=b["headers"], json={
+        "tractorId": a["tractor"], "implementId": b["implement"], "operationType": "tillage",
+    })
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("url, payload", [
+    ("/api/fuel-logs", {"quantity": 5}),
+    ("/api/alerts", {"alertType": "custom", "message": "Check"}),
+    ("/api/telemetry", {"engineOn": True}),
+])
+def test_foreign_operation_is_rejected(client, tenants, url, payload):
+    a, b = tenants
+    response = client.post(url, headers=b["headers"], json={
+        "tractorId": b["tractor"], "operationId": a["operation"], **payload,
+    })
+    assert response.status_code == 404
+    response = client.post(url, headers=b["headers"], json={
+        "tractorId": b["tractor"], "operationId": b["operation"], **payload,
+    })
+    assert response.status_code == 200
+
+
+def test_operation_of_another_tractor_is_rejected(client, fleet, tenants):
+    _, b = tenants
+    other_tractor, _ = fleet(b["headers"])
+    response = client.post("/api/telemetry", headers=b["headers"], json={
+        "tractorId": other_tractor, "operationId": b["operation"], "engineOn": True,
+    })
+    assert response.status_code == 404
+
+
+def test_operator_joins_by_accepting_invitation(client, register, tenants):
+    a, _ = tenants
+    operator_headers, operator = register("operator")
+    response = client.post("/api/team", headers=a["headers"], json={"username": operator["username"]})
+    assert response.json()["status"] == "invited"
+    # Invited but not yet on the team.
+    assert a["tractor"] not in {t["id"] for t in client.get("/api/tractors", headers=operator_headers).json()}
+
+    response = client.post(f"/api/team/invites/{a['user']['id']}/accept", headers=operator_headers)
+    assert response.status_code == 200
+    assert a["tractor"] in {t["id"] for t in client.get("/api/tractors", headers=operator_headers).json()}
+
+
+def test_bulk_rejects_foreign_tractor_and_operation(client, tenants):
+    a, b = tenants
+    response = client.post("/api/bulk", headers=b["headers"], json={"items": [
+        {"type": "fuelLog", "idempotencyKey": "foreign-tractor", "data": {"tractorId": a["tractor"], "quantity": 5}},
+        {"type": "alert", "idempotencyKey": "foreign-operation", "data": {
+            "tractorId": b["tractor"], "operationId": a["operation"], "alertType": "custom", "message": "Check",
+        }},
+        {"type": "fuelLog", "idempotencyKey": "own", "data": {
+            "tractorId": b["tractor"], "operationId": b["operation"], "quantity": 5,
+        }},
+    ]})
+    results = response.json()["results"]
+    assert [(r["status"], r.get("error")) for r in results] == [
+        ("failed", "Tractor not found"), ("failed", "Operation not found"), ("created", None),
+    ]
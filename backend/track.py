@@ -0,0 +1,141 @@
+"""
+Simplified operation tracks for map rendering.
+
+Tracks are simplified with Douglas-Peucker on locally projected metres. The
+tolerance follows the map zoom: TRACK_PIXEL_TOLERANCE screen pixels at the
+requested zoom level, so a whole-farm view gets a handful of vertices and a
+close-up keeps the turns. Tracks can be returned as Google encoded polylines.
+
+Tracks of finished operations are cached in operation_tracks per zoom level.
+Telemetry that arrives for a finished operation drops its cached tracks
+(an ingest handler), so the cache never serves a stale path.
+"""
+import os
+import math
+
+from database import get_db_cursor
+from geo import EARTH_RADIUS_M
+from ingest import add_handler
+
+TRACK_PIXEL_TOLERANCE = float(os.environ.get("TRACK_PIXEL_TOLERANCE", "1"))
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+
+
+def tolerance_for_zoom(zoom, latitude):
+    """Metres covered by TRACK_PIXEL_TOLERANCE pixels of a web-mercator tile at this zoom."""
+    metres_per_pixel = 2 * math.pi * EARTH_RADIUS_M * math.cos(math.radians(latitude)) / (256 * 2 ** zoom)
+    return metres_per_pixel * TRACK_PIXEL_TOLERANCE
+
+
+def _project(points):
+    lat0 = math.radians(points[0][0])
+    scale_x = math.radians(1) * EARTH_RADIUS_M * math.cos(lat0)
+    scale_y = math.radians(1) * EARTH_RADIUS_M
+    return [(lon * scale_x, lat * scale_y) for lat, lon in points]
+
+
+def _segment_distance(p, a, b):
+    dx = b[0] - a[0]
+    dy = b[1] - a[1]
+    if dx == 0 and dy == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def simplify(points, tolerance_m):
+    """Douglas-Peucker over (lat, lon) points; iterative, so long tracks cannot hit the recursion limit."""
+    if len(points) < 3:
+        return list(points)
+    projected = _project(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        worst, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _segment_distance(projected[i], projected[first], projected[last])
+            if distance > worst:
+                worst, index = distance, i
+        if index is not None and worst > tolerance_m:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+
+def encode_polyline(points, precision=5):
+    """Google encoded polyline of (lat, lon) points."""
+    factor = 10 ** precision
+    result = []
+    prev_lat = prev_lon = 0
+    for lat, lon in points:
+        lat = int(round(lat * factor))
+        lon = int(round(lon * factor))
+        result.append(_encode_value(lat - prev_lat))
+        result.append(_encode_value(lon - prev_lon))
+        prev_lat, prev_lon = lat, lon
+    return "".join(result)
+
+
+def load_points(conn, operation_id):
+    """Positions of an operation in time order, as (lat, lon) tuples."""
+    cursor = get_db_cursor(conn)
+    cursor.execute(
+        """SELECT latitude, longitude FROM telemetry
+           WHERE operation_id = %s AND latitude IS NOT NULL AND longitude IS NOT NULL
+           ORDER BY timestamp""",
+        (operation_id,)
+    )
+    points = [(row["latitude"], row["longitude"]) for row in cursor.fetchall()]
+    cursor.close()
+    return points
+
+
+def get_track(conn, operation, zoom):
+    """Simplified track of an operation at a zoom level: (points, original point count)."""
+    operation_id = str(operation["id"])
+    cacheable = operation["status"] != "active"
+    cursor = get_db_cursor(conn)
+    if cacheable:
+        cursor.execute(
+            "SELECT points, original_count FROM operation_tracks WHERE operation_id = %s AND zoom = %s",
+            (operation_id, zoom)
+        )
+        cached = cursor.fetchone()
+        if cached:
+            cursor.close()
+            return [tuple(p) for p in cached["points"]], cached["original_count"]
+
+    points = load_points(conn, operation_id)
+    simplified = simplify(points, tolerance_for_zoom(zoom, points[0][0])) if points else []
+    if cacheable:
+        cursor.execute(
+            """INSERT INTO operation_tracks (operation_id, zoom, points, original_count)
+               VALUES (%s, %s, %s, %s)
+               ON CONFLICT (operation_id, zoom) DO NOTHING""",
+            (operation_id, zoom, [list(p) for p in simplified], len(points))
+        )
+        conn.commit()
+    cursor.close()
+    return simplified, len(points)
+
+
+def drop_stale_tracks(cursor, point):
+    if point.get("operation_status") != "active" and point["latitude"] is not None:
+        cursor.execute("DELETE FROM operation_tracks WHERE operation_id = %s", (point["operation_id"],))
+
+
+add_handler(drop_stale_tracks)
@@ -0,0 +1,108 @@
+"""
+Engine, moving and PTO utilization from run-length encoded state intervals.
+
+Telemetry carries three boolean states per sample. Instead of re-reading the
+samples, every ingested point updates tractor_state_intervals: a run that is
+on is extended to the new point, a run that switched off is closed at the new
+point (a state is held until the next sample, as in summaries.py), and a
+state that switched on opens a new run. A silence longer than
+UTILIZATION_GAP_MINUTES closes open runs at their last sample instead of
+counting the silence as use.
+
+The open runs are read with FOR UPDATE, so concurrent workers serialise per
+tractor and nothing is kept in memory. Points older than an open run's end
+are late and ignored.
+"""
+import os
+from datetime import timedelta
+
+from psycopg2.extras import execute_values
+
+from ingest import add_handler
+
+UTILIZATION_GAP_MINUTES = float(os.environ.get("UTILIZATION_GAP_MINUTES", "10"))
+
+STATES = {"engine": "engine_on", "moving": "is_moving", "pto": "pto_on"}
+
+
+def update_intervals(cursor, point, gap=timedelta(minutes=UTILIZATION_GAP_MINUTES)):
+    tractor_id = point["tractor_id"]
+    timestamp = point["timestamp"]
+    cursor.execute(
+        "SELECT id, state, end_time FROM tractor_state_intervals WHERE tractor_id = %s AND is_open FOR UPDATE",
+        (tractor_id,)
+    )
+    open_runs = cursor.fetchall()
+    if any(run["end_time"] > timestamp for run in open_runs):
+        return
+
+    changes = []
+    still_open = set()
+    for run in open_runs:
+        if timestamp - run["end_time"] > gap:
+            changes.append((run["id"], run["end_time"], False))
+        elif point[STATES[run["state"]]]:
+            changes.append((run["id"], timestamp, True))
+            still_open.add(run["state"])
+        else:
+            changes.append((run["id"], timestamp, False))
+    if changes:
+        execute_values(
+            cursor,
+            """UPDATE tractor_state_intervals AS i SET end_time = c.end_time, is_open = c.is_open
+               FROM (VALUES %s) AS c (id, end_time, is_open) WHERE i.id = c.id""",
+            changes
+        )
+
+    opened = [
+        (tractor_id, state, timestamp, timestamp)
+        for state, column in STATES.items()
+        if point[column] and state not in still_open
+    ]
+    if opened:
+        execute_values(
+            cursor,
+            """INSERT INTO tractor_state_intervals (tractor_id, state, start_time, end_time) VALUES %s
+               ON CONFLICT (tractor_id, state) WHERE is_open DO NOTHING""",
+            opened
+        )
+
+
+def get_intervals(cursor, tractor_ids, start, end):
+    """Runs overlapping [start, end], clipped to it, ordered per tractor and state."""
+    cursor.execute(
+        """SELECT tractor_id, state, GREATEST(start_time, %(start)s) AS start_time,
+                  LEAST(end_time, %(end)s) AS end_time
+           FROM tractor_state_intervals
+           WHERE tractor_id = ANY(%(ids)s::uuid[]) AND end_time > %(start)s AND start_time < %(end)s
+           ORDER BY tractor_id, state, start_time""",
+        {"ids": [str(i) for i in tractor_ids], "start": start, "end": end}
+    )
+    return cursor.fetchall()
+
+
+def utilization(intervals, tractor_ids, start, end, timeline=True):
+    """Per-tractor seconds, percentage of the window and (optionally) runs for each state."""
+    window = (end - start).total_seconds()
+    result = {}
+    for tractor_id in tractor_ids:
+        entry = {"tractorId": str(tractor_id)}
+        for state in STATES:
+            entry[f"{state}Seconds"] = 0.0
+            if timeline:
+                entry.setdefault("timeline", {})[state] = []
+        result[str(tractor_id)] = entry
+
+    for run in intervals:
+        entry = result[str(run["tractor_id"])]
+        entry[f"{run['state']}Seconds"] += (run["end_time"] - run["start_time"]).total_seconds()
+        if timeline:
+            entry["timeline"][run["state"]].append([run["start_time"].isoformat(), run["end_time"].isoformat()])
+
+    for entry in result.values():
+        for state in STATES:
+            entry[f"{state}Percent"] = 100 * entry[f"{state}Seconds"] / window if window > 0 else 0
+    return list(result.values())
+
+
+add_handler(update_intervals)
@@ -1,5 +1,5 @@
 import React from 'react';
-import { View, Text, StyleSheet } from 'react-native';
+import { View, Text, StyleSheet, Image } from 'react-native';
 import { Ionicons } from '@expo/vector-icons';
 import { COLORS, SIZES, SHADOWS } from '../constants/theme';
 import { formatArea } from '../utils/helpers';
@@ -9,6 +9,7 @@ const AreaCalculationWidget = ({
   coveredArea = 0,
   operationType = 'Field',
   showMap = true,
+  coverageSource,
   style,
 }) => {
   const progress = totalArea > 0 ? (coveredArea / totalArea) * 100 : 0;
@@ -23,7 +24,14 @@ const AreaCalculationWidget = ({
         <Text style={styles.operationType}>{operationType}</Text>
       </View>
 
-      {showMap && (
+      {showMap && coverageSource && (
+        <View style={styles.mapPlaceholder}>
+          <Image source={coverageSource} style={styles.coverageTile} resizeMode="cover" />
+          <Text style={styles.mapLabel}>Worked Ground</Text>
+        </View>
+      )}
+
+      {showMap && !coverageSource && (
         <View style={styles.mapPlaceholder}>
           <View style={styles.mapGrid}>
             <View style={styles.gridRow}>
@@ -148,6 +156,9 @@ const styles = StyleSheet.create({
   partialCell: {
     backgroundColor: COLORS.secondaryLight + '60',
   },
+  coverageTile: {
+    ...StyleSheet.absoluteFillObject,
+  },
   tractorIcon: {
     position: 'absolute',
     top: '40%',
@@ -36,6 +36,9 @@ export const ENDPOINTS = {
     LIST: '/api/operations',
     CREATE: '/api/operations',
     STOP: (id) => `/api/operations/${id}/stop`,
+    SUMMARY: (id) => `/api/operations/${id}/summary`,
+    PROGRESS: (id) => `/api/operations/${id}/progress`,
+    TRACK: (id) => `/api/operations/${id}/track`,
   },
   TELEMETRY: {
     GET: (operationId) => `/api/telemetry/${operationId}`,
@@ -49,10 +52,20 @@ export const ENDPOINTS = {
     LIST: '/api/alerts',
     CREATE: '/api/alerts',
     RESOLVE: (id) => `/api/alerts/${id}/resolve`,
+    RESOLVE_MANY: '/api/alerts/resolve',
   },
   REPORTS: {
     GET: '/api/reports',
   },
+  COVERAGE: {
+    TILE: (scope, id, z, x, y) => `/api/coverage/${scope}/${id}/${z}/${x}/${y}.png`,
+  },
+  SYNC: {
+    GET: '/api/sync',
+  },
+  BULK: {
+    UPLOAD: '/api/bulk',
+  },
 };
 
 export const OPERATION_TYPES = [
@@ -113,7 +113,10 @@ const AlertsScreen = ({ navigation }) => {
       </View>
       <View style={styles.alertContent}>
         <View style={styles.alertHeader}>
-          <Text style={styles.alertType}>{item.alertType}</Text>
+          <Text style={styles.alertType}>
+            {item.alertType}
+            {item.occurrenceCount > 1 ? ` ×${item.occurrenceCount}` : ''}
+          </Text>
           {item.isResolved ? (
             <View style={styles.resolvedBadge}>
               <Ionicons name="checkmark-circle" size={14} color={COLORS.success} />
@@ -130,7 +133,7 @@ const AlertsScreen = ({ navigation }) => {
           {item.tractor
             ? `${item.tractor.manufacturerName} ${item.tractor.model}`
             : 'Unknown Tractor'}{' '}
-          - {formatDateTime(item.timestamp)}
+          - {formatDateTime(item.lastSeen || item.timestamp)}
         </Text>
       </View>
     </TouchableOpacity>
@@ -10,12 +10,24 @@ import {
 import { Ionicons } from '@expo/vector-icons';
 import { COLORS, SIZES, SHADOWS } from '../constants/theme';
 import { Header, Card, Button, AreaCalculationWidget, LoadingSpinner } from '../components';
-import { stopOperation, getTelemetry } from '../services/dataService';
-import { formatDateTime, getStatusColor, capitalizeFirst } from '../utils/helpers';
+import {
+  stopOperation,
+  getTelemetry,
+  getOperationSummary,
+  getOperationProgress,
+  getCoverageTileSource,
+} from '../services/dataService';
+import { formatDateTime, getStatusColor, capitalizeFirst, getTileForPosition } from '../utils/helpers';
+
+const PROGRESS_POLL_MS = 15000;
+const COVERAGE_ZOOM = 17;
 
 const OperationDetailsScreen = ({ navigation, route }) => {
   const { operation } = route.params;
   const [telemetry, setTelemetry] = useState([]);
+  const [summary, setSummary] = useState(null);
+  const [progress, setProgress] = useState(null);
+  const [coverageSource, setCoverageSource] = useState(null);
   const [loading, setLoading] = useState(true);
   const [stopping, setStopping] = useState(false);
 
@@ -24,6 +36,11 @@ const OperationDetailsScreen = ({ navigation, route }) => {
       try {
         const data = await getTelemetry(operation.id);
         setTelemetry(data);
+        const located = data.find((point) => point.latitude != null && point.longitude != null);
+        if (located) {
+          const tile = getTileForPosition(located.latitude, located.longitude, COVERAGE_ZOOM);
+          setCoverageSource(await getCoverageTileSource('operation', operation.id, tile));
+        }
       } catch (error) {
         console.error('Fetch telemetry error:', error);
       } finally {
@@ -33,6 +50,32 @@ const OperationDetailsScreen = ({ navigation, route }) => {
     fetchTelemetry();
   }, [operation.id]);
 
+  useEffect(() => {
+    if (operation.status === 'active') return;
+    getOperationSummary(operation.id)
+      .then(setSummary)
+      .catch((error) => console.error('Fetch summary error:', error));
+  }, [operation.id, operation.status]);
+
+  useEffect(() => {
+    if (operation.status !== 'active') return undefined;
+    const fetchProgress = () =>
+      getOperationProgress(operation.id)
+        .then(setProgress)
+        .catch((error) => console.error('Fetch progress error:', error));
+    fetchProgress();
+    const timer = setInterval(fetchProgress, PROGRESS_POLL_MS);
+    return () => clearInterval(timer);
+  }, [operation.id, operation.status]);
+
+  const coveredArea = summary
+    ? summary.areaHectares
+    : progress
+      ? progress.coveredArea
+      : operation.status === 'completed' ? 15.5 : 8.2;
+
+  const formatHours = (seconds) => `${((seconds || 0) / 3600).toFixed(1)} h`;
+
   const handleStop = () => {
     Alert.alert('Stop Operation', 'Are you sure you want to stop this operation?', [
       { text: 'Cancel', style: 'cancel' },
@@ -87,7 +130,8 @@ const OperationDetailsScreen = ({ navigation, route }) => {
 
         <AreaCalculationWidget
           totalArea={15.5}
-          coveredArea={operation.status === 'completed' ? 15.5 : 8.2}
+          coveredArea={coveredArea}
+          coverageSource={coverageSource}
           operationType={capitalizeFirst(operation.operationType)}
           style={styles.areaWidget}
         />
@@ -158,6 +202,21 @@ const OperationDetailsScreen = ({ navigation, route }) => {
           )}
         </Card>
 
+        {summary && (
+          <Card style={styles.card}>
+            <Text style={styles.cardTitle}>Summary</Text>
+            <InfoRow icon="navigate-outline" label="Distance" value={`${summary.distanceKm.toFixed(2)} km`} />
+            <InfoRow icon="time-outline" label="Engine Hours" value={formatHours(summary.engineOnSeconds)} />
+            <InfoRow icon="sync-outline" label="PTO Hours" value={formatHours(summary.ptoOnSeconds)} />
+            <InfoRow
+              icon="speedometer-outline"
+              label="Avg / Max Speed"
+              value={`${(summary.avgSpeed || 0).toFixed(1)} / ${(summary.maxSpeed || 0).toFixed(1)} km/h`}
+            />
+            <InfoRow icon="water-outline" label="Fuel" value={`${summary.fuelLiters.toFixed(1)} L`} />
+          </Card>
+        )}
+
         {telemetry.length > 0 && (
           <Card style={styles.card}>
             <Text style={styles.cardTitle}>Latest Telemetry</Text>
@@ -1,3 +1,4 @@
+import AsyncStorage from '@react-native-async-storage/async-storage';
 import api from './api';
 import { ENDPOINTS } from '../constants/api';
 
@@ -61,6 +62,29 @@ export const stopOperation = async (id) => {
   return response.data;
 };
 
+export const getOperationSummary = async (id) => {
+  const response = await api.get(ENDPOINTS.OPERATIONS.SUMMARY(id));
+  return response.data;
+};
+
+export const getOperationProgress = async (id) => {
+  const response = await api.get(ENDPOINTS.OPERATIONS.PROGRESS(id));
+  return response.data;
+};
+
+export const getOperationTrack = async (id, zoom = 16) => {
+  const response = await api.get(ENDPOINTS.OPERATIONS.TRACK(id), { params: { zoom } });
+  return response.data;
+};
+
+export const getCoverageTileSource = async (scope, id, { z, x, y }) => {
+  const token = await AsyncStorage.getItem('authToken');
+  return {
+    uri: `${api.defaults.baseURL}${ENDPOINTS.COVERAGE.TILE(scope, id, z, x, y)}`,
+    headers: token ? { Authorization: `Bearer ${token}` } : undefined,
+  };
+};
+
 export const getTelemetry = async (operationId) => {
   const response = await api.get(ENDPOINTS.TELEMETRY.GET(operationId));
   return response.data;
@@ -96,11 +120,27 @@ export const resolveAlert = async (id) => {
   return response.data;
 };
 
+export const resolveAlerts = async (filters) => {
+  const response = await api.post(ENDPOINTS.ALERTS.RESOLVE_MANY, filters);
+  return response.data;
+};
+
 export const getReports = async (params) => {
   const response = await api.get(ENDPOINTS.REPORTS.GET, { params });
   return response.data;
 };
 
+export const syncChanges = async (since) => {
+  const params = since ? { since } : {};
+  const response = await api.get(ENDPOINTS.SYNC.GET, { params });
+  return response.data;
+};
+
+export const bulkUpload = async (items, atomic = false) => {
+  const response = await api.post(ENDPOINTS.BULK.UPLOAD, { items, atomic });
+  return response.data;
+};
+
 export default {
   getDashboardStats,
   getTractors,
@@ -114,6 +154,10 @@ export default {
   getOperations,
   createOperation,
   stopOperation,
+  getOperationSummary,
+  getOperationProgress,
+  getOperationTrack,
+  getCoverageTileSource,
   getTelemetry,
   createTelemetry,
   getFuelLogs,
@@ -121,5 +165,8 @@ export default {
   getAlerts,
   createAlert,
   resolveAlert,
+  resolveAlerts,
   getReports,
+  syncChanges,
+  bulkUpload,
 };
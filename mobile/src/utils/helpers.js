@@ -93,6 +93,16 @@ export const truncateText = (text, maxLength = 50) => {
   return text.substring(0, maxLength) + '...';
 };
 
+export const getTileForPosition = (latitude, longitude, zoom) => {
+  const n = 2 ** zoom;
+  const lat = (latitude * Math.PI) / 180;
+  return {
+    z: zoom,
+    x: Math.floor(((longitude + 180) / 360) * n),
+    y: Math.floor(((1 - Math.log(Math.tan(lat) + 1 / Math.cos(lat)) / Math.PI) / 2) * n),
+  };
+};
+
 export default {
   formatDate,
   formatDateTime,
@@ -103,4 +113,5 @@ export default {
   getOperationTypeLabel,
   capitalizeFirst,
   truncateText,
+  getTileForPosition,
 };